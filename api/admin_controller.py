@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from core.db_connect import engine, async_engine, replica_engine, async_replica_engine
+from core.pool_metrics import get_pool_status
+from core.query_cache import query_cache
+from core.slow_query_log import slow_query_log
+from utils.jwt_utils import get_current_user
+
+admin_router = APIRouter()
+
+
+@admin_router.get("/db/pool")
+async def get_db_pool_stats(current_user: dict = Depends(get_current_user)):
+    """Live connection pool statistics (checked-out, overflow, checkout latency)"""
+    pools = {
+        "primary": get_pool_status(engine),
+        "async": get_pool_status(async_engine.sync_engine),
+    }
+    if replica_engine is not None:
+        pools["replica"] = get_pool_status(replica_engine)
+        pools["async_replica"] = get_pool_status(async_replica_engine.sync_engine)
+    return pools
+
+
+@admin_router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Most recent statements slower than the configured threshold, with sampled EXPLAIN plans"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.entries(limit)
+    }
+
+
+@admin_router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: dict = Depends(get_current_user)):
+    """Empty the slow query ring buffer"""
+    slow_query_log.clear()
+    return None
+
+
+@admin_router.get("/query-cache")
+async def get_query_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Query cache size, hit/miss counts per cached method and table generations"""
+    return query_cache.snapshot()
+
+
+@admin_router.delete("/query-cache", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_query_cache(current_user: dict = Depends(get_current_user)):
+    """Drop every cached result and reset the counters"""
+    query_cache.clear()
+    return None
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from dependencies.db_dependency import get_db
+from dependencies.db_dependency import get_db, get_async_db
 from services.attendance_service import AttendanceService
+from services.attendance_stats_service import AttendanceStatsService
 from schemas.attendance_schema import (
     AttendanceCreate,
     AttendanceResponse,
     BulkAttendanceUpdate,
-    BulkAttendanceSaveAll
+    BulkAttendanceSaveAll,
+    AttendanceMatrix,
+    SessionAttendanceStats,
+    StudentAttendanceStats
 )
 from typing import List
 import logging
@@ -38,21 +43,53 @@ def mark_attendance(attendance: AttendanceCreate, db: Session = Depends(get_db))
     try:
         result = AttendanceService.mark_attendance(db, attendance)
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/date/{attendance_date}")
-def get_attendance_for_date(session_id: int, attendance_date: str, db: Session = Depends(get_db)):
+async def get_attendance_for_date(session_id: int, attendance_date: str, db: AsyncSession = Depends(get_async_db)):
     """Get attendance status for all students on a specific date"""
     try:
         from datetime import date
         parsed_date = date.fromisoformat(attendance_date)
-        attendance_list = AttendanceService.get_attendance_for_date(db, session_id, parsed_date)
+        attendance_list = await AttendanceService.get_attendance_for_date_async(db, session_id, parsed_date)
         return attendance_list
     except Exception as e:
         logger.error(f"Get attendance error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/session/{session_id}/matrix", response_model=AttendanceMatrix)
+async def get_attendance_matrix(session_id: int, default_present: bool = True, db: AsyncSession = Depends(get_async_db)):
+    """Get attendance for all students on all dates of a session in one call"""
+    try:
+        matrix = await AttendanceService.get_attendance_matrix_async(db, session_id, default_present)
+    except Exception as e:
+        logger.error(f"Get attendance matrix error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    if matrix is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return matrix
+
+@router.get("/session/{session_id}/stats", response_model=SessionAttendanceStats)
+async def get_session_attendance_stats(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get recorded attendance totals and rate for a session, with a breakdown per date"""
+    try:
+        return await AttendanceStatsService.get_session_stats_async(db, session_id)
+    except Exception as e:
+        logger.error(f"Get attendance stats error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/session/{session_id}/stats/students", response_model=List[StudentAttendanceStats])
+async def get_student_attendance_stats(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get recorded attendance counts and rate for each student in a session"""
+    try:
+        return await AttendanceStatsService.get_student_stats_async(db, session_id)
+    except Exception as e:
+        logger.error(f"Get student attendance stats error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/bulk-update")
 def bulk_update_attendance(bulk_data: BulkAttendanceUpdate, db: Session = Depends(get_db)):
     """Bulk update attendance - saves all student records (present and absent)"""
@@ -70,6 +107,8 @@ def bulk_update_attendance(bulk_data: BulkAttendanceUpdate, db: Session = Depend
         )
         logger.info(f"Successfully updated attendance")
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Bulk update error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,6 +129,8 @@ def bulk_save_all_attendance(bulk_data: BulkAttendanceSaveAll, db: Session = Dep
         )
         logger.info(f"Successfully saved all attendance")
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Bulk save all error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
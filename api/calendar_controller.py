@@ -1,13 +1,16 @@
 # app/routers/calendar.py
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as DB
-from datetime import datetime
-from dependencies.db_dependency import get_db
+from dependencies.db_dependency import get_db, get_async_db
 from models.session import Session
-from fastapi.responses import JSONResponse, Response
-from utils.ical_utils import build_ics_from_session
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import func, select
+import hashlib
+from services.calendar_service import CalendarFeed, CalendarFeedService
+from utils.http_cache import make_etag, cache_headers, is_not_modified, not_modified_response
+from utils.ical_utils import build_ics_from_session, session_last_modified, ICS_FORMAT_VERSION
 from utils.jwt_utils import get_current_user
 
 calendar_router = APIRouter()
@@ -61,18 +64,78 @@ def get_subscription_url(session_id: int,
         }
     )
 
+async def _serve_feed(request: Request, service: CalendarFeedService, feed: CalendarFeed, filename: str):
+    etag = await service.feed_etag(feed)
+    # No Last-Modified: a session leaving the feed would not move it forward
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+
+    return StreamingResponse(
+        service.stream_feed(feed),
+        media_type="text/calendar",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}"',
+            **cache_headers(etag, None)
+        }
+    )
+
+
+@calendar_router.get("/term/{term_id}.ics")
+async def serve_term_ics(term_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """All active sessions of a term in one calendar"""
+    service = CalendarFeedService(db)
+    return await _serve_feed(request, service, await service.term_feed(term_id), f"term-{term_id}.ics")
+
+
+@calendar_router.get("/city/{city}.ics")
+async def serve_city_ics(city: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """All active sessions in a city in one calendar"""
+    service = CalendarFeedService(db)
+    return await _serve_feed(request, service, await service.city_feed(city), "city-sessions.ics")
+
+
+@calendar_router.get("/staff/{user_id}.ics")
+async def serve_staff_ics(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """All active sessions a staff member is assigned to, in one calendar"""
+    service = CalendarFeedService(db)
+    return await _serve_feed(request, service, await service.staff_feed(user_id), f"staff-{user_id}.ics")
+
+
+def _ics_etag(session_id: int, last_modified, rrule_hash: str) -> str:
+    return make_etag(ICS_FORMAT_VERSION, session_id, last_modified.isoformat() if last_modified else "", rrule_hash)
+
+
 #can be used for download
 @calendar_router.get("/{session_id}.ics")
-def serve_dynamic_ics(session_id: int,
-                      # current_user: dict = Depends(get_current_user)
-                      db: Session = Depends(get_db)):
+async def serve_dynamic_ics(session_id: int,
+                            request: Request,
+                            # current_user: dict = Depends(get_current_user)
+                            db: AsyncSession = Depends(get_async_db)):
     """
     Serve the dynamic ICS content.
     Google Calendar polls this URL to get the latest events.
+    Polls with a matching If-None-Match / If-Modified-Since get a 304 from a
+    version lookup, without loading the session or building the calendar.
     """
-    session = db.query(Session).filter(Session.id == session_id).first()
+    version = (await db.execute(
+        select(
+            func.coalesce(Session.updated_at, Session.created_at).label("last_modified"),
+            func.md5(Session.rrule).label("rrule_hash")
+        ).where(Session.id == session_id)
+    )).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    etag = _ics_etag(session_id, version.last_modified, version.rrule_hash)
+    if is_not_modified(request, etag, version.last_modified):
+        return not_modified_response(etag, version.last_modified)
+
+    session = await db.get(Session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    # Re-derive from the loaded row in case it changed between the two reads
+    last_modified = session_last_modified(session)
+    etag = _ics_etag(session_id, last_modified, hashlib.md5(session.rrule.encode()).hexdigest())
 
     ics_content = build_ics_from_session(session)
 
@@ -81,8 +144,6 @@ def serve_dynamic_ics(session_id: int,
         media_type="text/calendar",
         headers={
             "Content-Disposition": f'inline; filename="session-{session_id}.ics"',
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
+            **cache_headers(etag, last_modified)
         }
     )
@@ -1,9 +1,8 @@
 from fastapi import APIRouter
-from config import Settings
+from config import settings
 
 router = APIRouter(prefix="/api/config", tags=["config"])
 
-settings = Settings()
 
 @router.get("/google-maps-key")
 async def get_google_maps_key():
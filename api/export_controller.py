@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from dependencies.db_dependency import get_async_db
+from models.waitlist import WaitlistStatus
+from services.export_service import MEDIA_TYPES, ExportFormat, ExportService, export_headers
+from utils.jwt_utils import get_current_user
+
+export_router = APIRouter()
+
+
+def _streaming_export(service: ExportService, stmt, export_format: ExportFormat, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        service.stream(stmt, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers=export_headers(name, export_format)
+    )
+
+
+@export_router.get("/students")
+async def export_students(
+    export_format: ExportFormat = Query("csv", alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Every student as CSV (in the import file's columns) or NDJSON, streamed"""
+    service = ExportService(db)
+    return _streaming_export(service, service.students_query(), export_format, "students")
+
+
+@export_router.get("/waitlist")
+async def export_waitlist(
+    sessionId: Optional[int] = None,
+    waitlist_status: Optional[str] = Query(None, alias="status"),
+    export_format: ExportFormat = Query("csv", alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Waitlist signups with student details, for one session or all sessions, streamed"""
+    status_enum = None
+    if waitlist_status is not None:
+        try:
+            status_enum = WaitlistStatus(waitlist_status)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status value. Must be one of: waitlist, admitted, withdrawn"
+            )
+
+    service = ExportService(db)
+    stmt = await service.waitlist_query(sessionId, status_enum)
+    name = f"session-{sessionId}-waitlist" if sessionId is not None else "waitlist"
+    return _streaming_export(service, stmt, export_format, name)
+
+
+@export_router.get("/attendance")
+async def export_attendance(
+    sessionId: Optional[int] = None,
+    export_format: ExportFormat = Query("csv", alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Recorded attendance, one row per student per class date, streamed"""
+    service = ExportService(db)
+    stmt = await service.attendance_query(sessionId)
+    name = f"session-{sessionId}-attendance" if sessionId is not None else "attendance"
+    return _streaming_export(service, stmt, export_format, name)
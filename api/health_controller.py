@@ -0,0 +1,31 @@
+import logging
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from core.db_connect import async_engine
+
+logger = logging.getLogger(__name__)
+health_router = APIRouter()
+
+
+@health_router.get("/live")
+async def liveness():
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def readiness():
+    """Ready once a pooled database connection can run a query"""
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "detail": "Database connection failed"}
+        )
+    return {"status": "ready"}
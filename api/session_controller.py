@@ -1,84 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import date, timedelta
+from typing import List, Literal, Optional
 
-from dependencies.db_dependency import get_db
+from dependencies.db_dependency import get_db, get_async_db
 from schemas.session_schema import (
     CreateSessionRequest,
     UpdateSessionRequest,
     SessionResponse,
     CreateSessionResponse,
-    StaffMember,
-    TermDetail
+    SessionOccurrenceResponse,
+    UpdateOccurrenceRequest,
+    StaffConflict,
+    StaffMember
 )
+from services.occurrence_service import OccurrenceService
+from services.schedule_conflict_service import ScheduleConflictService
+from services.session_document_service import build_session_response
 from services.session_service import SessionService
 from utils.jwt_utils import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER
 
 session_router = APIRouter()
 
 
-def _build_session_response(session) -> SessionResponse:
-    """Helper to build SessionResponse with staff members and term details"""
-    return SessionResponse(
-        id=session.id,
-        title=session.title,
-        description=session.description,
-        termIds=[term.id for term in session.terms],
-        termNames=[term.name for term in session.terms],
-        terms=[
-            TermDetail(
-                id=term.id,
-                name=term.name,
-                startDate=term.start_date,
-                endDate=term.end_date,
-                year=term.year
-            )
-            for term in session.terms
-        ],
-        dayOfWeek=session.day_of_week,
-        startDate=session.start_date,
-        endDate=session.end_date,
-        startTime=session.start_time,
-        endTime=session.end_time,
-        location=session.location,
-        city=session.city,
-        locationUrl=session.location_url,
-        capacity=session.capacity,
-        minAge=session.min_age,
-        maxAge=session.max_age,
-        rrule=session.rrule,
-        isDeleted=session.is_deleted,
-        createdBy=session.created_by,
-        createdAt=session.created_at,
-        updatedAt=session.updated_at,
-        staff=[
-            StaffMember(
-                id=staff.id,
-                userName=staff.user_name,
-                email=staff.email
-            )
-            for staff in session.staff_members
-        ]
-    )
-
-
 @session_router.get("/staff", response_model=List[StaffMember])
 def get_staff_members(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all staff members who can be assigned to sessions"""
-    session_service = SessionService(db)
-    staff = session_service.get_all_staff()
-    
-    return [
-        StaffMember(
-            id=user.id,
-            userName=user.user_name,
-            email=user.email
-        )
-        for user in staff
-    ]
+    return SessionService(db).get_all_staff()
 
 
 @session_router.post("", response_model=CreateSessionResponse, status_code=status.HTTP_201_CREATED)
@@ -96,20 +49,75 @@ def create_session(
     return CreateSessionResponse(
         status="success",
         message="Session created successfully",
-        session=_build_session_response(session)
+        session=build_session_response(session)
     )
 
 
 @session_router.get("", response_model=List[SessionResponse])
-def get_all_sessions(
-    db: Session = Depends(get_db),
+async def get_all_sessions(
+    termId: Optional[int] = None,
+    city: Optional[str] = None,
+    dayOfWeek: Optional[str] = None,
+    minAge: Optional[int] = Query(None, ge=0, le=100),
+    maxAge: Optional[int] = Query(None, ge=0, le=100),
+    staffId: Optional[int] = None,
+    session_status: Literal["all", "active", "deleted"] = Query("all", alias="status"),
+    q: Optional[str] = Query(None, max_length=200),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all sessions"""
+    """Get sessions, newest first, optionally filtered.
+
+    With `limit`, results are paged: the X-Next-Cursor response header holds
+    the `cursor` value for the next page and is absent on the last one.
+    The body is assembled from the stored session documents as-is.
+    """
     session_service = SessionService(db)
-    sessions = session_service.get_all_sessions()
-    
-    return [_build_session_response(session) for session in sessions]
+    documents, next_cursor = await session_service.list_session_documents_async(
+        term_id=termId,
+        city=city,
+        day_of_week=dayOfWeek,
+        min_age=minAge,
+        max_age=maxAge,
+        staff_id=staffId,
+        session_status=session_status,
+        search=q,
+        cursor=cursor,
+        limit=limit
+    )
+    response = Response(content="[" + ",".join(documents) + "]", media_type="application/json")
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+
+@session_router.get("/occurrences", response_model=List[SessionOccurrenceResponse])
+async def get_occurrences(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    includeCancelled: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the classes of all sessions between two dates (defaults to the current week)"""
+    if start is None:
+        today = date.today()
+        start = today - timedelta(days=today.weekday())
+    if end is None:
+        end = start + timedelta(days=6)
+    return await OccurrenceService.get_range_async(db, start, end, includeCancelled)
+
+
+@session_router.get("/conflicts/staff", response_model=List[StaffConflict])
+async def get_staff_conflicts(
+    staffId: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """List every staff member assigned to two active sessions that meet at the same time"""
+    return await ScheduleConflictService(db).find_all_conflicts_async(staffId)
 
 
 @session_router.get("/{session_id}", response_model=SessionResponse)
@@ -122,7 +130,7 @@ def get_session(
     session_service = SessionService(db)
     session = session_service.get_session_by_id(session_id)
     
-    return _build_session_response(session)
+    return build_session_response(session)
 
 
 @session_router.put("/{session_id}", response_model=SessionResponse)
@@ -138,7 +146,19 @@ def update_session(
     
     session = session_service.update_session(session_id, request, user_id)
     
-    return _build_session_response(session)
+    return build_session_response(session)
+
+
+@session_router.patch("/{session_id}/occurrences/{occurrence_date}", response_model=SessionOccurrenceResponse)
+def update_occurrence(
+    session_id: int,
+    occurrence_date: date,
+    request: UpdateOccurrenceRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Cancel or reinstate one class of a session"""
+    return OccurrenceService.set_cancelled(db, session_id, occurrence_date, request.isCancelled)
 
 
 @session_router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -3,26 +3,15 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from dependencies.db_dependency import get_db
+from schemas.session_schema import VenueClash
 from schemas.term_schema import TermCreate, TermUpdate
-from services.term_service import TermService
+from services.schedule_conflict_service import ScheduleConflictService
+from services.term_service import TermService, build_term_response
 from utils.jwt_utils import get_current_user
 
 term_router = APIRouter()
 
 
-def _build_term_response(term):
-    """Helper to build term response dict with camelCase keys"""
-    return {
-        "id": term.id,
-        "name": term.name,
-        "startDate": term.start_date.isoformat(),
-        "endDate": term.end_date.isoformat(),
-        "year": term.year,
-        "createdAt": term.created_at.isoformat() if term.created_at else None,
-        "updatedAt": term.updated_at.isoformat() if term.updated_at else None,
-    }
-
-
 @term_router.post("", status_code=201)
 def create_term(
     request: TermCreate,
@@ -32,7 +21,7 @@ def create_term(
     """Create a new term (Admin only)"""
     term_service = TermService(db)
     term = term_service.create_term(request)
-    return _build_term_response(term)
+    return build_term_response(term)
 
 
 @term_router.get("")
@@ -42,8 +31,7 @@ def get_all_terms(
 ):
     """Get all terms"""
     term_service = TermService(db)
-    terms = term_service.get_all_terms()
-    return [_build_term_response(term) for term in terms]
+    return term_service.list_terms()
 
 
 @term_router.get("/{term_id}")
@@ -55,7 +43,18 @@ def get_term(
     """Get term by ID"""
     term_service = TermService(db)
     term = term_service.get_term_by_id(term_id)
-    return _build_term_response(term)
+    return build_term_response(term)
+
+
+@term_router.get("/{term_id}/venue-clashes", response_model=List[VenueClash])
+def get_venue_clashes(
+    term_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """List sessions of a term booked at the same venue at overlapping times"""
+    TermService(db).get_term_by_id(term_id)
+    return ScheduleConflictService(db).find_term_venue_clashes(term_id)
 
 
 @term_router.put("/{term_id}")
@@ -68,7 +67,7 @@ def update_term(
     """Update term (Admin only)"""
     term_service = TermService(db)
     term = term_service.update_term(term_id, request)
-    return _build_term_response(term)
+    return build_term_response(term)
 
 
 @term_router.delete("/{term_id}")
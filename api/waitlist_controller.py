@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
 
-from dependencies.db_dependency import get_db
+from dependencies.db_dependency import get_db, get_async_db
 from schemas.waitlist_schema import (
     StudentSignupRequest,
     WaitlistResponse,
@@ -13,25 +14,22 @@ from schemas.waitlist_schema import (
     BulkStatusUpdateRequest,
     BulkStatusUpdateResponse,
     SessionStudentCount,
-    AllSessionsStudentCountResponse
+    AllSessionsStudentCountResponse,
+    StudentImportResponse
 )
+from services.import_service import StudentImportService
 from services.waitlist_service import WaitlistService
+from utils.json_response import TypedJSONResponse
 from utils.jwt_utils import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER
+from models.student import SchoolYear
 from models.waitlist import WaitlistStatus
 
 logger = logging.getLogger(__name__)
 waitlist_router = APIRouter()
 
 
-@waitlist_router.post("/signup", response_model=WaitlistResponse, status_code=status.HTTP_201_CREATED)
-def student_signup(
-        request: StudentSignupRequest,
-        db: Session = Depends(get_db)
-):
-    """Public endpoint for student signup (no authentication required)"""
-    waitlist_service = WaitlistService(db)
-    waitlist_entry = waitlist_service.create_signup(request)
-
+def _waitlist_response(waitlist_entry) -> WaitlistResponse:
     return WaitlistResponse(
         id=waitlist_entry.id,
         student_id=waitlist_entry.student_id,
@@ -46,15 +44,40 @@ def student_signup(
     )
 
 
+@waitlist_router.post("/signup", response_model=WaitlistResponse, status_code=status.HTTP_201_CREATED)
+def student_signup(
+        request: StudentSignupRequest,
+        db: Session = Depends(get_db)
+):
+    """Public endpoint for student signup (no authentication required)"""
+    waitlist_service = WaitlistService(db)
+    waitlist_entry = waitlist_service.create_signup(request)
+    return _waitlist_response(waitlist_entry)
+
+
+@waitlist_router.post("/import", response_model=StudentImportResponse)
+def import_students(
+        file: UploadFile = File(...),
+        session_id: Optional[int] = Form(None),
+        db: Session = Depends(get_db),
+        current_user: dict = Depends(get_current_user)
+):
+    """Bulk import students from a CSV file, adding them to the waitlist of `session_id`
+    or the session_id column of each row (requires authentication)"""
+    import_service = StudentImportService(db)
+    return import_service.import_csv(file.file, default_session_id=session_id)
+
+
 @waitlist_router.get("/session/{session_id}", response_model=List[WaitlistEntryWithDetails])
-def get_session_waitlist(
+async def get_session_waitlist(
         session_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_user: dict = Depends(get_current_user)
 ):
     """Get all waitlist entries for a specific session (requires authentication)"""
     waitlist_service = WaitlistService(db)
-    return waitlist_service.get_waitlist_by_session(session_id)
+    entries = await waitlist_service.get_waitlist_by_session_async(session_id)
+    return TypedJSONResponse(entries, List[WaitlistEntryWithDetails])
 
 
 @waitlist_router.patch("/{waitlist_id}/status", response_model=WaitlistResponse)
@@ -64,22 +87,13 @@ def update_waitlist_status(
         db: Session = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
-    """Update waitlist entry status (requires authentication)"""
+    """Update waitlist entry status (requires authentication).
+
+    Returns 409 if admitting the student would exceed the session's capacity.
+    """
     waitlist_service = WaitlistService(db)
     waitlist_entry = waitlist_service.update_waitlist_status(waitlist_id, new_status)
-
-    return WaitlistResponse(
-        id=waitlist_entry.id,
-        student_id=waitlist_entry.student_id,
-        session_id=waitlist_entry.session_id,
-        consent_share_details=waitlist_entry.consent_share_details,
-        consent_photos=waitlist_entry.consent_photos,
-        heard_from=waitlist_entry.heard_from,
-        heard_from_other=waitlist_entry.heard_from_other,
-        newsletter_subscribe=waitlist_entry.newsletter_subscribe,
-        status=waitlist_entry.status,
-        created_at=waitlist_entry.created_at
-    )
+    return _waitlist_response(waitlist_entry)
 
 
 @waitlist_router.get("/students", response_model=List[StudentResponse])
@@ -89,7 +103,37 @@ def get_all_students(
 ):
     """Get all students who have signed up (requires authentication)"""
     waitlist_service = WaitlistService(db)
-    return waitlist_service.get_all_students()
+    return TypedJSONResponse(waitlist_service.get_all_students(), List[StudentResponse])
+
+
+@waitlist_router.get("/students/search", response_model=List[StudentResponse])
+async def search_students(
+        q: Optional[str] = Query(None, max_length=200),
+        school_year: Optional[SchoolYear] = None,
+        needs_device: Optional[bool] = None,
+        experience: Optional[List[str]] = Query(None),
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: dict = Depends(get_current_user)
+):
+    """Search students by email, name or parent details, best matches first (requires authentication).
+
+    `experience` may be repeated; students must have all of them. The
+    X-Next-Cursor response header holds the `cursor` value for the next page
+    and is absent on the last one.
+    """
+    waitlist_service = WaitlistService(db)
+    students, next_cursor = await waitlist_service.search_students_async(
+        query=q,
+        school_year=school_year,
+        needs_device=needs_device,
+        experience=experience,
+        cursor=cursor,
+        limit=limit
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor is not None else None
+    return TypedJSONResponse(students, List[StudentResponse], headers=headers)
 
 
 @waitlist_router.get("/students/{student_id}", response_model=StudentResponse)
@@ -124,7 +168,10 @@ def bulk_update_status(
         db: Session = Depends(get_db),
         current_user: dict = Depends(get_current_user)
 ):
-    """Update status for multiple waitlist entries (requires authentication)"""
+    """Update status for multiple waitlist entries (requires authentication).
+
+    All entries are updated or none: 409 if admitting them would exceed a session's capacity.
+    """
     waitlist_service = WaitlistService(db)
     status_enum = WaitlistStatus(request.new_status)
     updated_count = waitlist_service.bulk_update_status(request.waitlist_ids, status_enum)
@@ -152,7 +199,23 @@ def get_waitlist_by_status(
         )
     
     waitlist_service = WaitlistService(db)
-    return waitlist_service.get_waitlist_by_status(session_id, status_enum)
+    entries = waitlist_service.get_waitlist_by_status(session_id, status_enum)
+    return TypedJSONResponse(entries, List[WaitlistEntryWithDetails])
+
+
+@waitlist_router.post("/session/{session_id}/admit-next", response_model=List[WaitlistResponse])
+def admit_next(
+        session_id: int,
+        count: int = Query(1, ge=1, le=200),
+        db: Session = Depends(get_db),
+        current_user: dict = Depends(get_current_user)
+):
+    """Admit the earliest `count` waitlisted students of a session (requires authentication).
+
+    Admits fewer when the session fills up or the waitlist runs out; 409 if it is already full.
+    """
+    waitlist_service = WaitlistService(db)
+    return [_waitlist_response(entry) for entry in waitlist_service.admit_next(session_id, count)]
 
 
 @waitlist_router.get("/session/{session_id}/admitted-count")
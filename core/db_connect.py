@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings  # your Pydantic settings
+from core.db_routing import RoutingSession, ReadYourWritesTracker
+from core.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
 import socket
 
 # Enable IPv6 for socket connections
@@ -15,19 +19,77 @@ DATABASE_URL = (
     f"postgresql+psycopg2://{settings.db_user}:{settings.db_password}"
     f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
 )
-
-# Create SQLAlchemy engine with connection arguments for better compatibility
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={
-        "connect_timeout": 10,
-        "options": "-c statement_timeout=30000"
-    }
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{settings.db_user}:{settings.db_password}"
+    f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Shared pool configuration. Pool sizing should match the uvicorn threadpool
+# so requests don't queue on checkout.
+POOL_OPTIONS = {
+    "echo": settings.db_echo,
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+}
+
+
+def _create_sync_engine(url):
+    """Create a psycopg2 engine with connection arguments for better compatibility"""
+    return create_engine(
+        make_url(url).set(drivername="postgresql+psycopg2"),
+        poolclass=InstrumentedQueuePool,
+        connect_args={
+            "connect_timeout": settings.db_connect_timeout,
+            "options": f"-c statement_timeout={settings.db_statement_timeout_ms}"
+        },
+        **POOL_OPTIONS
+    )
+
+
+def _create_async_engine(url):
+    """Create an asyncpg engine - concurrency is bounded by its pool, not by worker threads"""
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        connect_args={
+            "timeout": settings.db_connect_timeout,
+            "server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        },
+        **POOL_OPTIONS
+    )
+
+
+engine = _create_sync_engine(DATABASE_URL)
+async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+
+# Optional read replica for GET requests
+replica_engine = _create_sync_engine(settings.db_replica_url) if settings.db_replica_url else None
+async_replica_engine = _create_async_engine(settings.db_replica_url) if settings.db_replica_url else None
+
+# Users who just wrote read from the primary until the replica has caught up
+read_your_writes = ReadYourWritesTracker(settings.db_replica_stickiness_seconds)
+
+# Create session factories
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    primary=engine,
+    replica=replica_engine,
+    tracker=read_your_writes
+)
+# Same routing and read-your-writes hooks as SessionLocal, on the async engines' sync facades
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    primary=async_engine.sync_engine,
+    replica=async_replica_engine.sync_engine if async_replica_engine is not None else None,
+    tracker=read_your_writes
+)
 
 # Base class for declarative models
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+
+class ReadYourWritesTracker:
+    """Remembers who wrote recently so their next reads skip the replica.
+
+    Entries live in process memory, so stickiness holds per uvicorn worker;
+    the window only needs to outlast replication lag.
+    """
+
+    def __init__(self, window_seconds: float, max_entries: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sticky_until: Dict[str, float] = {}
+
+    def record_write(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sticky_until) >= self.max_entries:
+                self._sticky_until = {k: v for k, v in self._sticky_until.items() if v > now}
+            self._sticky_until[key] = now + self.window_seconds
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            until = self._sticky_until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica when marked read-only.
+
+    Set `session.info["read_only"] = True` to route SELECTs to the replica.
+    Flushes and DML statements always use the primary, and without a replica
+    everything goes to the primary.
+    """
+
+    def __init__(self, primary, replica=None, tracker: Optional[ReadYourWritesTracker] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replica = replica
+        self.tracker = tracker
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.replica is not None
+            and self.info.get("read_only")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            return self.replica
+        return self.primary
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    # query.update()/delete() and Core inserts bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_write(session):
+    if session.info.pop("wrote", False) and session.tracker is not None:
+        key = session.info.get("sticky_key")
+        if key is not None:
+            session.tracker.record_write(key)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (in milliseconds) of the checkout latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection checkouts from a pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_checkout_ms = 0.0
+        self.max_checkout_ms = 0.0
+        self.waits = 0  # checkouts that found the pool saturated
+        self.total_wait_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, elapsed_ms: float, waited: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_checkout_ms += elapsed_ms
+            self.max_checkout_ms = max(self.max_checkout_ms, elapsed_ms)
+            if waited:
+                self.waits += 1
+                self.total_wait_ms += elapsed_ms
+            self.buckets[self._bucket_index(elapsed_ms)] += 1
+
+    def observe_timeout(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.total_wait_ms += elapsed_ms
+
+    @staticmethod
+    def _bucket_index(elapsed_ms: float) -> int:
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                return index
+        return len(LATENCY_BUCKETS_MS)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["gt_10000ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "waits": self.waits,
+                "total_wait_ms": round(self.total_wait_ms, 3),
+                "avg_checkout_ms": round(self.total_checkout_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_checkout_ms": round(self.max_checkout_ms, 3),
+                "checkout_latency_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Records how long each checkout from a QueuePool takes.
+
+    The timing covers waiting for a free connection as well as opening a new
+    overflow connection, which is what a request actually experiences.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        waited = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_timeout((time.perf_counter() - start) * 1000)
+            raise
+        self.metrics.observe_checkout((time.perf_counter() - start) * 1000, waited)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def get_pool_status(engine) -> Dict:
+    """Return live statistics for the engine's connection pool"""
+    pool = engine.pool
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # QueuePool counts overflow from -pool_size, so clamp it for display
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        "recycle": pool._recycle,
+        "pre_ping": pool._pre_ping,
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -0,0 +1,274 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info key for the tables written by the session's open transaction
+PENDING_TABLES_KEY = "query_cache_tables"
+# Stands for "any table", for raw SQL writes whose target is unknown
+ALL_TABLES = "*"
+
+
+class QueryCache:
+    """LRU cache for the results of service read methods.
+
+    An entry is keyed by the method, its arguments and the current generation
+    of every table it reads. Writing a table (an ORM flush or a DML statement
+    run through a Session) bumps its generation, so later reads build a new key
+    and the old entries are never served again; they fall out of the LRU.
+    Generations are bumped again on commit, so a result read by another
+    request before the writer committed is not reused either.
+
+    Concurrent misses for the same key share one load (single-flight).
+    Generations live in process memory and there is no cross-process
+    invalidation, so each uvicorn worker only sees its own writes. The cache
+    only works for a single worker on a single instance: it is off by default,
+    and QUERY_CACHE_ENABLED=true is ignored when WEB_CONCURRENCY is above 1.
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, enabled: bool = True, replica_lag_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # Results read from a replica within this long of a write to their tables
+        # may predate the write, so they are returned but not stored
+        self.replica_lag_seconds = replica_lag_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._written_at: Dict[str, float] = {}
+        self._epoch = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    # Generations
+
+    def bump(self, tables: Iterable[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for table in tables:
+                if table == ALL_TABLES:
+                    self._epoch += 1
+                    self._written_at[ALL_TABLES] = now
+                else:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                    self._written_at[table] = now
+
+    def _key(self, name: str, tables: Tuple[str, ...], args: Hashable) -> Hashable:
+        # Called with the lock held
+        return name, args, self._epoch, tuple(self._generations.get(table, 0) for table in tables)
+
+    def _recently_written(self, tables: Tuple[str, ...]) -> bool:
+        horizon = time.monotonic() - self.replica_lag_seconds
+        with self._lock:
+            return any(self._written_at.get(table, 0.0) > horizon for table in tables + (ALL_TABLES,))
+
+    # Lookup and single-flight
+
+    def _count(self, name: str, outcome: str) -> None:
+        # Called with the lock held
+        stats = self._stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0})
+        stats[outcome] += 1
+
+    def _should_bypass(self, name: str, tables: Tuple[str, ...], db) -> bool:
+        if not self.enabled:
+            return True
+        # A session with uncommitted writes to these tables must read its own writes
+        pending = db.info.get(PENDING_TABLES_KEY) if db is not None else None
+        if pending and (ALL_TABLES in pending or not pending.isdisjoint(tables)):
+            with self._lock:
+                self._count(name, "bypassed")
+            return True
+        return False
+
+    def _begin(self, name: str, tables: Tuple[str, ...], args: Hashable):
+        """Returns (key, value, None) on a hit, else (key, future, is_leader)"""
+        with self._lock:
+            key = self._key(name, tables, args)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._count(name, "hits")
+                return key, self._entries[key], None
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count(name, "coalesced")
+                return key, future, False
+            future = Future()
+            self._inflight[key] = future
+            self._count(name, "misses")
+            return key, future, True
+
+    def _finish(self, key: Hashable, future: Future, tables: Tuple[str, ...], db, value=None, error=None) -> None:
+        store = (
+            error is None
+            and not (self.replica_lag_seconds and db is not None and db.info.get("read_only")
+                     and self._recently_written(tables))
+        )
+        with self._lock:
+            self._inflight.pop(key, None)
+            if store:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_load(self, name: str, tables: Tuple[str, ...], args: Hashable, loader: Callable[[], Any], db=None):
+        if self._should_bypass(name, tables, db):
+            return loader()
+        key, found, is_leader = self._begin(name, tables, args)
+        if is_leader is None:
+            return found
+        if not is_leader:
+            return found.result()
+        try:
+            value = loader()
+        except BaseException as e:
+            self._finish(key, found, tables, db, error=e)
+            raise
+        self._finish(key, found, tables, db, value=value)
+        return value
+
+    async def get_or_load_async(self, name: str, tables: Tuple[str, ...], args: Hashable, loader, db=None):
+        if self._should_bypass(name, tables, db):
+            return await loader()
+        key, found, is_leader = self._begin(name, tables, args)
+        if is_leader is None:
+            return found
+        if not is_leader:
+            return await asyncio.wrap_future(found)
+        try:
+            value = await loader()
+        except BaseException as e:
+            self._finish(key, found, tables, db, error=e)
+            raise
+        self._finish(key, found, tables, db, value=value)
+        return value
+
+    def cached(self, *tables: str):
+        """Cache a service method that reads `tables` through `self.db`.
+
+        Arguments must be hashable; the same method may be sync or async.
+        """
+        def decorator(method):
+            name = method.__qualname__
+            if inspect.iscoroutinefunction(method):
+                @functools.wraps(method)
+                async def async_wrapper(service, *args, **kwargs):
+                    key_args = (args, tuple(sorted(kwargs.items())))
+                    return await self.get_or_load_async(
+                        name, tables, key_args, lambda: method(service, *args, **kwargs), service.db
+                    )
+                return async_wrapper
+
+            @functools.wraps(method)
+            def wrapper(service, *args, **kwargs):
+                key_args = (args, tuple(sorted(kwargs.items())))
+                return self.get_or_load(name, tables, key_args, lambda: method(service, *args, **kwargs), service.db)
+            return wrapper
+        return decorator
+
+    # Admin
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self.evictions = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            methods = {name: dict(stats) for name, stats in self._stats.items()}
+            hits = sum(stats["hits"] for stats in methods.values())
+            lookups = hits + sum(stats["misses"] + stats["coalesced"] for stats in methods.values())
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "hits": hits,
+                "misses": sum(stats["misses"] for stats in methods.values()),
+                "coalesced": sum(stats["coalesced"] for stats in methods.values()),
+                "bypassed": sum(stats["bypassed"] for stats in methods.values()),
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "in_flight": len(self._inflight),
+                "generations": dict(self._generations, **{ALL_TABLES: self._epoch}),
+                "methods": methods,
+            }
+
+
+def _cache_enabled() -> bool:
+    if settings.query_cache_enabled and settings.web_concurrency > 1:
+        logger.warning(
+            f"QUERY_CACHE_ENABLED ignored: invalidation is per process and WEB_CONCURRENCY={settings.web_concurrency}"
+        )
+        return False
+    return settings.query_cache_enabled
+
+
+query_cache = QueryCache(
+    max_entries=settings.query_cache_max_entries,
+    enabled=_cache_enabled(),
+    replica_lag_seconds=settings.db_replica_stickiness_seconds if settings.db_replica_url else 0.0
+)
+
+
+def _note_written(session: Session, tables: Set[str]) -> None:
+    if not tables:
+        return
+    session.info.setdefault(PENDING_TABLES_KEY, set()).update(tables)
+    query_cache.bump(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session, flush_context):
+    tables = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        mapper = getattr(type(instance), "__mapper__", None)
+        if mapper is not None:
+            tables.update(table.name for table in mapper.tables)
+            # Collection changes on many-to-many relationships write the association table
+            tables.update(rel.secondary.name for rel in mapper.relationships if rel.secondary is not None)
+    _note_written(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_statement_tables(orm_execute_state):
+    statement = orm_execute_state.statement
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(statement, "table", None)
+        name = getattr(table, "name", None)
+        _note_written(orm_execute_state.session, {name} if name else {ALL_TABLES})
+    elif isinstance(statement, TextClause):
+        # Raw SQL may write anything
+        _note_written(orm_execute_state.session, {ALL_TABLES})
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tables(session):
+    tables = session.info.pop(PENDING_TABLES_KEY, None)
+    if tables:
+        query_cache.bump(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session):
+    session.info.pop(PENDING_TABLES_KEY, None)
@@ -0,0 +1,122 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Bind parameter markers for psycopg2 (%(name)s / %s) and asyncpg ($1)
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_current_stats: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+
+
+def statement_template(statement: str) -> str:
+    """Normalise a statement so executions that differ only in parameters compare equal"""
+    template = _PARAM_RE.sub("?", statement)
+    template = _IN_LIST_RE.sub("(?...)", template)
+    return _WHITESPACE_RE.sub(" ", template).strip()
+
+
+class RequestQueryStats:
+    """SQL statements issued while handling one request"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.templates = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.query_count += 1
+        self.db_time_ms += elapsed_ms
+        self.templates[statement_template(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement templates that ran more than `threshold` times"""
+        return [(template, count) for template, count in self.templates.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time_ms:.1f};desc="{self.query_count} queries"'
+
+
+def get_current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+# The start time lives on the execution context, so a statement that raises
+# leaves nothing behind on the pooled connection
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._query_start) * 1000
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL issued per request.
+
+    Adds a `Server-Timing` header with the query count and DB time, writes one
+    structured log line per request and warns when a statement template repeats
+    more than `repeat_threshold` times (a likely N+1).
+    """
+
+    def __init__(self, app, repeat_threshold: int = 10):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats, status_code, (time.perf_counter() - start) * 1000)
+
+    def _report(self, scope, stats: RequestQueryStats, status_code: Optional[int], duration_ms: float) -> None:
+        repeated = stats.repeated(self.repeat_threshold)
+        for template, count in repeated:
+            logger.warning(
+                f"Possible N+1: statement ran {count} times in {scope['method']} {scope['path']}: {template[:300]}"
+            )
+
+        logger.info(json.dumps({
+            "event": "request_sql",
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "queries": stats.query_count,
+            "db_ms": round(stats.db_time_ms, 2),
+            "request_ms": round(duration_ms, 2),
+            "distinct_statements": len(stats.templates),
+            "repeated_statements": [{"count": count, "statement": template[:300]} for template, count in repeated],
+        }))
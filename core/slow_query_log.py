@@ -0,0 +1,183 @@
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+from core.query_stats import statement_template
+
+logger = logging.getLogger(__name__)
+
+# Re-run EXPLAIN ANALYZE for the same statement at most this often
+EXPLAIN_MIN_INTERVAL_SECONDS = 300
+
+# Anything matching these is planned with plain EXPLAIN rather than executed
+# again under ANALYZE: row locks, data-modifying CTEs and functions whose side
+# effects survive a rollback (sequences, advisory locks, NOTIFY)
+_LOCKING_CLAUSE_RE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b")
+_WRITE_KEYWORD_RE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b")
+_SIDE_EFFECT_FUNCTION_RE = re.compile(
+    r"\b(?:NEXTVAL|SETVAL|PG_(?:TRY_)?ADVISORY_\w+|PG_NOTIFY|SET_CONFIG|LO_\w+|DBLINK\w*)\s*\("
+)
+
+
+def _value_shape(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        inner = sorted({type(item).__name__ for item in value})
+        return f"{type(value).__name__}[{'|'.join(inner)}]({len(value)})"
+    return type(value).__name__
+
+
+def parameter_shapes(parameters, executemany: bool):
+    """Describe bind parameters by type only, so values never reach the log"""
+    if executemany:
+        batch_size = len(parameters) if parameters else 0
+        first = parameters[0] if parameters else {}
+        return {"executemany": batch_size, "row": parameter_shapes(first, False)}
+    if isinstance(parameters, dict):
+        return {name: _value_shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def _calling_service_method() -> Optional[str]:
+    """Qualified name of the innermost services.* function on the stack, e.g.
+    WaitlistService.get_all_sessions_with_student_counts"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith("services."):
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+    return None
+
+
+def is_read_only(template: str) -> bool:
+    """True when a SELECT/WITH template can be executed a second time without
+    locking rows or changing anything outside the savepoint"""
+    upper = template.upper()
+    if not upper.startswith(("SELECT", "WITH")):
+        return False
+    return not (
+        _LOCKING_CLAUSE_RE.search(upper)
+        or _WRITE_KEYWORD_RE.search(upper)
+        or _SIDE_EFFECT_FUNCTION_RE.search(upper)
+    )
+
+
+class SlowQueryLog:
+    """Ring buffer of statements slower than a threshold.
+
+    A sample of slow SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS) inside
+    a savepoint on the same connection, so the plan reflects the data the
+    query actually saw. The savepoint is always rolled back, and statements
+    that are not provably read-only only get a plain EXPLAIN.
+    """
+
+    def __init__(self, threshold_ms: float, explain_sample_rate: float, max_entries: int):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self._entries = deque(maxlen=max_entries)
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, cursor, statement, parameters, context, executemany: bool, elapsed_ms: float) -> None:
+        if elapsed_ms < self.threshold_ms:
+            return
+
+        template = statement_template(statement)
+        caller = _calling_service_method()
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": template,
+            "parameters": parameter_shapes(parameters, executemany),
+            "caller": caller,
+            "plan": None,
+        }
+        if not executemany and self._should_explain(template, context):
+            entry["plan"] = self._explain(cursor, statement, parameters, analyze=is_read_only(template))
+
+        logger.warning(f"Slow query ({elapsed_ms:.0f} ms) in {caller or 'unknown caller'}: {template[:300]}")
+        with self._lock:
+            self._entries.append(entry)
+
+    def _should_explain(self, template: str, context) -> bool:
+        if self.explain_sample_rate <= 0 or random.random() >= self.explain_sample_rate:
+            return False
+        # Only SELECTs through psycopg2 are explained; see is_read_only for ANALYZE
+        if context is None or context.dialect.driver != "psycopg2":
+            return False
+        if context.execution_options.get("stream_results"):
+            return False
+        if not template.upper().startswith(("SELECT", "WITH")):
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(template)
+            if last is not None and now - last < EXPLAIN_MIN_INTERVAL_SECONDS:
+                return False
+            self._explained_at[template] = now
+        return True
+
+    @staticmethod
+    def _explain(cursor, statement, parameters, analyze: bool) -> Optional[str]:
+        # Runs on the raw DBAPI cursor so it is not itself instrumented
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                return "\n".join(row[0] for row in explain_cursor.fetchall())
+            except Exception as e:
+                logger.debug(f"EXPLAIN failed for slow query: {e}")
+                return None
+            finally:
+                # Discard whatever the second execution did, even on success
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            # e.g. autocommit connections, where savepoints are not available
+            logger.debug(f"Could not capture EXPLAIN for slow query: {e}")
+            return None
+        finally:
+            explain_cursor.close()
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Most recent entries first"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._explained_at.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    explain_sample_rate=settings.slow_query_explain_sample_rate,
+    max_entries=settings.slow_query_log_size
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._slow_query_start) * 1000
+    slow_query_log.observe(cursor, statement, parameters, context, executemany, elapsed_ms)
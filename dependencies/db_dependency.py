@@ -1,13 +1,59 @@
+from typing import Optional
+
+from fastapi import Request
+from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from core.db_connect import SessionLocal
+from core.db_connect import SessionLocal, AsyncSessionLocal, read_your_writes
+
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+def _stickiness_key(request: Request) -> Optional[str]:
+    """Identify the caller for read-your-writes routing.
+
+    Uses the token subject when present (the token is verified separately by
+    get_current_user - this only picks a database), otherwise the client host.
+    """
+    auth_header = request.headers.get("authorization", "")
+    if auth_header.lower().startswith("bearer "):
+        try:
+            subject = jwt.get_unverified_claims(auth_header[7:]).get("sub")
+            if subject is not None:
+                return f"user:{subject}"
+        except JWTError:
+            pass
+    return f"client:{request.client.host}" if request.client else None
 
-def get_db():
+
+def get_db(request: Request):
     """
     Dependency to get a database session.
     Use with FastAPI's Depends in your route functions.
+    Reads from GET requests go to the replica (when configured) unless
+    the caller wrote recently.
     """
     db = SessionLocal()
+    sticky_key = _stickiness_key(request)
+    db.info["sticky_key"] = sticky_key
+    db.info["read_only"] = (
+        request.method in READ_ONLY_METHODS and not read_your_writes.is_sticky(sticky_key)
+    )
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: Request):
+    """
+    Dependency to get an async database session.
+    Use with `async def` routes so waiting on Postgres doesn't hold a worker thread.
+    Routed like get_db, and commits made here make the caller sticky too.
+    """
+    async with AsyncSessionLocal() as db:
+        sticky_key = _stickiness_key(request)
+        db.info["sticky_key"] = sticky_key
+        db.info["read_only"] = (
+            request.method in READ_ONLY_METHODS and not read_your_writes.is_sticky(sticky_key)
+        )
+        yield db
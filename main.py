@@ -1,10 +1,8 @@
+from contextlib import asynccontextmanager
+import logging
+
 from fastapi import FastAPI
-from sqlalchemy import event
-from sqlalchemy.sql.ddl import CreateSchema
 from starlette.middleware.cors import CORSMiddleware
-import psycopg2
-from dotenv import load_dotenv
-import os
 
 from api.auth_controller import auth_router
 from api.calendar_controller import calendar_router
@@ -13,86 +11,72 @@ from api.waitlist_controller import waitlist_router
 from api.attendance_controller import router as attendance_router
 from api.term_controller import term_router
 from api.config_controller import router as config_router
+from api.admin_controller import admin_router
+from api.export_controller import export_router
+from api.health_controller import health_router
 from config import settings
-from core.db_connect import Base, engine
-import logging
+from core.db_connect import engine, async_engine, replica_engine, async_replica_engine
+from core.query_stats import QueryStatsMiddleware
+from utils.pagination import NEXT_CURSOR_HEADER
+import models  # noqa: F401 - every mapper must be registered before the first query
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close pooled connections so rolling deploys don't leave them hanging
+    await async_engine.dispose()
+    engine.dispose()
+    if replica_engine is not None:
+        await async_replica_engine.dispose()
+        replica_engine.dispose()
 
-from models.user import User,Role,UserRole
-from models.session import Session
-from models.session_term import SessionTerm
-from models.term import Term
-from models.session_staff import SessionStaff
-from models.student import Student
-from models.waitlist import Waitlist
-from models.attendance import Attendance
-from services.mail_service import MailService
 
-# Control logging with this one line:
-logging.basicConfig(level=logging.DEBUG if settings.debug else logging.INFO)
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+def create_app() -> FastAPI:
+    """Build the application without touching the database.
 
-# Test database connection on startup
-@app.on_event("startup")
-async def startup_event():
-    """Test Supabase database connection on startup"""
-    try:
-        connection = psycopg2.connect(
-            user=settings.db_user,
-            password=settings.db_password,
-            host=settings.db_host,
-            port=settings.db_port,
-            dbname=settings.db_name
-        )
-        cursor = connection.cursor()
-        cursor.execute("SELECT NOW();")
-        result = cursor.fetchone()
-        logging.info(f"✓ Supabase database connection successful! Server time: {result[0]}")
-        cursor.close()
-        connection.close()
-    except Exception as e:
-        logging.error(f"✗ Failed to connect to Supabase database: {e}")
+    The schema is managed by migrations (`python manage.py migrate`) and
+    database connectivity is reported by GET /health/ready.
+    """
+    # Control logging with this one line:
+    logging.basicConfig(level=logging.DEBUG if settings.debug else logging.INFO)
+    app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
-# Automatically create schemas if they don't exist
-event.listen(Base.metadata, "before_create", lambda target, connection, **kw: connection.execute(CreateSchema("user", if_not_exists=True)))
-# event.listen(Base.metadata, "before_create", lambda target, connection, **kw: connection.execute(CreateSchema("session", if_not_exists=True)))
-# event.listen(Base.metadata, "before_create", lambda target, connection, **kw: connection.execute(CreateSchema("student", if_not_exists=True)))
-# event.listen(Base.metadata, "before_create", lambda target, connection, **kw: connection.execute(CreateSchema("student", if_not_exists=True)))
-#
+    #FastAPI CORS Setup
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",
+            "http://localhost:3001",
+            "http://127.0.0.1:3000",
+            "http://127.0.0.1:3001",
+            "http://localhost:5173",
+            "http://127.0.0.1:5173"
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Let browser clients read the pagination cursor
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
 
-# Create tables - wrap in try/except to handle permission issues if tables already exist
-try:
-    Base.metadata.create_all(bind=engine, checkfirst=True)
-    logging.info("✓ Database tables verified/created successfully")
-except Exception as e:
-    # Tables likely already exist but user lacks CREATE permission - this is okay
-    logging.warning(f"Could not create tables (likely already exist): {e}")
-    logging.info("Continuing - tables should already exist in database")
+    # Per-request query count / DB time (Server-Timing header + log line)
+    if settings.sql_instrumentation_enabled:
+        app.add_middleware(QueryStatsMiddleware, repeat_threshold=settings.sql_repeat_warning_threshold)
 
+    # Include auth router with prefix
+    app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
+    app.include_router(session_router, prefix="/api/sessions", tags=["sessions"])
+    app.include_router(calendar_router, prefix="/api/calendar", tags=["calendar"])
+    app.include_router(waitlist_router, prefix="/api/waitlist", tags=["waitlist"])
+    app.include_router(term_router, prefix="/api/terms", tags=["terms"])
+    app.include_router(attendance_router)
+    app.include_router(config_router)
+    app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
+    app.include_router(export_router, prefix="/api/exports", tags=["exports"])
+    app.include_router(health_router, prefix="/health", tags=["health"])
 
-#FastAPI CORS Setup
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://localhost:3001", 
-        "http://127.0.0.1:3000",
-        "http://127.0.0.1:3001",
-        "http://localhost:5173", 
-        "http://127.0.0.1:5173"
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-#Test Mailgun
-# MailService.send_email("Test from FastAPI", "Mailgun test message")
+    return app
 
 
-# Include auth router with prefix
-app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
-app.include_router(session_router, prefix="/api/sessions", tags=["sessions"])
-app.include_router(calendar_router, prefix="/api/calendar", tags=["calendar"])
-app.include_router(waitlist_router, prefix="/api/waitlist", tags=["waitlist"])
-app.include_router(term_router, prefix="/api/terms", tags=["terms"])
-app.include_router(attendance_router)
-app.include_router(config_router)
\ No newline at end of file
+app = create_app()
@@ -0,0 +1,223 @@
+"""
+Operational commands that must not run on application import.
+
+    python manage.py migrate              # upgrade the schema to the latest revision
+    python manage.py migrate --sql        # print the SQL instead of running it
+    python manage.py downgrade <revision>
+    python manage.py init-roles
+    python manage.py import-students students.csv [--session-id 12]
+    python manage.py recompute-attendance-stats [--session-id 12]
+    python manage.py check-attendance-stats [--session-id 12]
+    python manage.py convert-attendance-storage bitmap|rows [--session-id 12]
+    python manage.py sync-occurrences [--session-id 12]
+    python manage.py rebuild-session-documents
+"""
+import argparse
+import os
+
+from alembic import command
+from alembic.config import Config
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_REVISION = "0001"
+
+
+def _alembic_config() -> Config:
+    return Config(os.path.join(BASE_DIR, "alembic.ini"))
+
+
+def _stamp_existing_schema(config: Config) -> None:
+    """Databases built by the old Base.metadata.create_all have the tables but
+    no migration history - record them as the baseline instead of recreating."""
+    from sqlalchemy import inspect
+    from core.db_connect import engine
+
+    inspector = inspect(engine)
+    if not inspector.has_table("alembic_version") and inspector.has_table("sessions"):
+        print(f"Existing schema without migration history - stamping baseline revision {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    engine.dispose()
+
+
+def migrate(args) -> None:
+    config = _alembic_config()
+    if not args.sql:
+        _stamp_existing_schema(config)
+    command.upgrade(config, args.revision, sql=args.sql)
+
+
+def downgrade(args) -> None:
+    command.downgrade(_alembic_config(), args.revision, sql=args.sql)
+
+
+def init_roles(args) -> None:
+    from init_roles import init_roles as create_default_roles
+    create_default_roles()
+
+
+def import_students(args) -> None:
+    from fastapi import HTTPException
+    from core.db_connect import SessionLocal
+    from services.import_service import StudentImportService
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            report = StudentImportService(db).import_csv(f, default_session_id=args.session_id)
+    except HTTPException as e:
+        raise SystemExit(f"Import failed: {e.detail}")
+    finally:
+        db.close()
+
+    print(f"{report.valid_rows}/{report.total_rows} rows imported: "
+          f"{report.students_created} students created, {report.students_updated} updated, "
+          f"{report.waitlist_created} waitlist signups, {report.already_registered} already registered")
+    for row_error in report.errors:
+        print(f"  row {row_error.row} ({row_error.email or 'no email'}): {'; '.join(row_error.errors)}")
+    if report.error_count > len(report.errors):
+        print(f"  ... and {report.error_count - len(report.errors)} more rows with errors")
+
+
+def recompute_attendance_stats(args) -> None:
+    from core.db_connect import SessionLocal
+    from services.attendance_stats_service import AttendanceStatsService
+
+    db = SessionLocal()
+    try:
+        row_counts = AttendanceStatsService.recompute(db, args.session_id)
+    finally:
+        db.close()
+    for table, count in row_counts.items():
+        print(f"{table}: {count} rows")
+
+
+def check_attendance_stats(args) -> None:
+    from core.db_connect import SessionLocal
+    from services.attendance_stats_service import AttendanceStatsService
+
+    db = SessionLocal()
+    try:
+        mismatches = AttendanceStatsService.check(db, args.session_id)
+    finally:
+        db.close()
+    if not mismatches:
+        print("Attendance stats are consistent")
+        return
+    for mismatch in mismatches:
+        print(mismatch)
+    raise SystemExit(f"{len(mismatches)} attendance stats rows differ - run recompute-attendance-stats")
+
+
+def convert_attendance_storage(args) -> None:
+    from sqlalchemy import select
+    from core.db_connect import SessionLocal
+    from models.attendance import Attendance
+    from models.attendance_bitmap import AttendanceBitmap
+    from services.attendance_bitmap_service import AttendanceBitmapService
+
+    if args.layout == "bitmap":
+        source, convert = Attendance, AttendanceBitmapService.convert_session_to_bitmaps
+    else:
+        source, convert = AttendanceBitmap, AttendanceBitmapService.convert_session_to_rows
+
+    db = SessionLocal()
+    try:
+        if args.session_id is not None:
+            session_ids = [args.session_id]
+        else:
+            session_ids = db.execute(select(source.session_id).distinct().order_by(source.session_id)).scalars().all()
+
+        failed = 0
+        for session_id in session_ids:
+            # One transaction per session so a bad session doesn't block the rest
+            try:
+                moved = convert(db, session_id)
+                db.commit()
+                print(f"session {session_id}: {moved} records moved to {args.layout}")
+            except ValueError as e:
+                db.rollback()
+                failed += 1
+                print(f"session {session_id}: not converted - {e}")
+    finally:
+        db.close()
+    if failed:
+        raise SystemExit(f"{failed} sessions could not be converted")
+
+
+def sync_occurrences(args) -> None:
+    from core.db_connect import SessionLocal
+    from services.occurrence_service import OccurrenceService
+
+    db = SessionLocal()
+    try:
+        synced = OccurrenceService.rebuild(db, args.session_id)
+    finally:
+        db.close()
+    print(f"Occurrences regenerated for {synced} sessions")
+
+
+def rebuild_session_documents(args) -> None:
+    from core.db_connect import SessionLocal
+    from services.session_document_service import SessionDocumentService
+
+    db = SessionLocal()
+    try:
+        rebuilt = SessionDocumentService.rebuild(db)
+    finally:
+        db.close()
+    print(f"Session documents rebuilt for {rebuilt} sessions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Session Management API management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade the database schema")
+    migrate_parser.add_argument("revision", nargs="?", default="head")
+    migrate_parser.add_argument("--sql", action="store_true", help="Print SQL instead of executing it")
+    migrate_parser.set_defaults(func=migrate)
+
+    downgrade_parser = subparsers.add_parser("downgrade", help="Revert the database schema to a revision")
+    downgrade_parser.add_argument("revision")
+    downgrade_parser.add_argument("--sql", action="store_true", help="Print SQL instead of executing it")
+    downgrade_parser.set_defaults(func=downgrade)
+
+    roles_parser = subparsers.add_parser("init-roles", help="Create the default user roles")
+    roles_parser.set_defaults(func=init_roles)
+
+    import_parser = subparsers.add_parser("import-students", help="Bulk import students and waitlist signups from CSV")
+    import_parser.add_argument("path", help="UTF-8 CSV file with a header row")
+    import_parser.add_argument("--session-id", type=int, help="Session for rows without a session_id column")
+    import_parser.set_defaults(func=import_students)
+
+    recompute_parser = subparsers.add_parser("recompute-attendance-stats",
+                                             help="Rebuild the attendance rollups from attendance rows")
+    recompute_parser.add_argument("--session-id", type=int, help="Only this session")
+    recompute_parser.set_defaults(func=recompute_attendance_stats)
+
+    check_parser = subparsers.add_parser("check-attendance-stats",
+                                         help="Compare the attendance rollups with attendance rows")
+    check_parser.add_argument("--session-id", type=int, help="Only this session")
+    check_parser.set_defaults(func=check_attendance_stats)
+
+    convert_parser = subparsers.add_parser("convert-attendance-storage",
+                                           help="Move attendance between the row and bitmap layouts")
+    convert_parser.add_argument("layout", choices=["bitmap", "rows"], help="Layout to move attendance into")
+    convert_parser.add_argument("--session-id", type=int, help="Only this session")
+    convert_parser.set_defaults(func=convert_attendance_storage)
+
+    occurrences_parser = subparsers.add_parser("sync-occurrences",
+                                               help="Regenerate session_occurrences from the session rrules")
+    occurrences_parser.add_argument("--session-id", type=int, help="Only this session")
+    occurrences_parser.set_defaults(func=sync_occurrences)
+
+    documents_parser = subparsers.add_parser("rebuild-session-documents",
+                                             help="Re-render the stored session list documents")
+    documents_parser.set_defaults(func=rebuild_session_documents)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
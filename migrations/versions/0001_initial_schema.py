@@ -0,0 +1,187 @@
+"""initial schema
+
+Baseline of every model under models/ as previously built by
+Base.metadata.create_all. Databases created that way are stamped with this
+revision by `python manage.py migrate` instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE SCHEMA IF NOT EXISTS "user"')
+
+    op.create_table('students',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('family_name', sa.String(), nullable=False),
+        sa.Column('school_year', sa.Enum('YEAR_5', 'YEAR_6', 'YEAR_7', 'YEAR_8', 'YEAR_9', 'YEAR_10', 'YEAR_11', 'YEAR_12', 'YEAR_13', 'OTHER', name='schoolyear'), nullable=False),
+        sa.Column('school_year_other', sa.String(), nullable=True),
+        sa.Column('experience', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('needs_device', sa.Boolean(), nullable=False),
+        sa.Column('medical_info', sa.Text(), nullable=True),
+        sa.Column('parent_name', sa.String(), nullable=False),
+        sa.Column('parent_phone', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_students_email'), 'students', ['email'], unique=True)
+    op.create_index(op.f('ix_students_id'), 'students', ['id'], unique=False)
+    op.create_table('terms',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_terms_id'), 'terms', ['id'], unique=False)
+    op.create_table('roles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        schema='user'
+    )
+    op.create_index(op.f('ix_user_roles_id'), 'roles', ['id'], unique=False, schema='user')
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('user_name', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_name'),
+        schema='user'
+    )
+    op.create_index(op.f('ix_user_users_email'), 'users', ['email'], unique=True, schema='user')
+    op.create_index(op.f('ix_user_users_id'), 'users', ['id'], unique=False, schema='user')
+    op.create_table('sessions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('term', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('term_id', sa.Integer(), nullable=True),
+        sa.Column('day_of_week', sa.String(length=20), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('location', sa.String(length=500), nullable=False),
+        sa.Column('city', sa.String(length=200), nullable=False),
+        sa.Column('location_url', sa.String(length=1000), nullable=True),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('min_age', sa.Integer(), nullable=False),
+        sa.Column('max_age', sa.Integer(), nullable=False),
+        sa.Column('rrule', sa.Text(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['user.users.id']),
+        sa.ForeignKeyConstraint(['term_id'], ['terms.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sessions_id'), 'sessions', ['id'], unique=False)
+    op.create_table('user_roles',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['role_id'], ['user.roles.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'role_id'),
+        schema='user'
+    )
+    op.create_table('session_staff',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('staff_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['staff_id'], ['user.users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_session_staff_id'), 'session_staff', ['id'], unique=False)
+    op.create_table('session_terms',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('term_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['term_id'], ['terms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'term_id')
+    )
+    op.create_table('waitlist',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('consent_share_details', sa.Boolean(), nullable=False),
+        sa.Column('consent_photos', sa.Boolean(), nullable=False),
+        sa.Column('heard_from', sa.Enum('Newsletter', 'School', 'Poster', 'Instagram', 'Facebook', 'Word of mouth', 'Internet Search', 'Returning', 'Other', name='heardfrom'), nullable=False),
+        sa.Column('heard_from_other', sa.String(), nullable=True),
+        sa.Column('newsletter_subscribe', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.Enum('waitlist', 'admitted', 'withdrawn', name='waitliststatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_waitlist_id'), 'waitlist', ['id'], unique=False)
+    op.create_table('attendance',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('waitlist_id', sa.Integer(), nullable=False),
+        sa.Column('attendance_date', sa.Date(), nullable=False),
+        sa.Column('is_present', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['waitlist_id'], ['waitlist.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id', 'waitlist_id', 'attendance_date', name='uix_attendance')
+    )
+    op.create_index(op.f('ix_attendance_id'), 'attendance', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_attendance_id'), table_name='attendance')
+    op.drop_table('attendance')
+    op.drop_index(op.f('ix_waitlist_id'), table_name='waitlist')
+    op.drop_table('waitlist')
+    op.drop_table('session_terms')
+    op.drop_index(op.f('ix_session_staff_id'), table_name='session_staff')
+    op.drop_table('session_staff')
+    op.drop_table('user_roles', schema='user')
+    op.drop_index(op.f('ix_sessions_id'), table_name='sessions')
+    op.drop_table('sessions')
+    op.drop_index(op.f('ix_user_users_id'), table_name='users', schema='user')
+    op.drop_index(op.f('ix_user_users_email'), table_name='users', schema='user')
+    op.drop_table('users', schema='user')
+    op.drop_index(op.f('ix_user_roles_id'), table_name='roles', schema='user')
+    op.drop_table('roles', schema='user')
+    op.drop_index(op.f('ix_terms_id'), table_name='terms')
+    op.drop_table('terms')
+    op.drop_index(op.f('ix_students_id'), table_name='students')
+    op.drop_index(op.f('ix_students_email'), table_name='students')
+    op.drop_table('students')
+    sa.Enum(name='waitliststatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='heardfrom').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='schoolyear').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,89 @@
+"""indexes and constraints for the hot query patterns
+
+Built with CREATE INDEX CONCURRENTLY so the tables stay writable while the
+indexes build. Concurrent builds cannot run inside a transaction, so each
+one runs in an autocommit block; if one fails it leaves an INVALID index
+behind that must be dropped before re-running.
+
+The unique (student_id, session_id) constraint on waitlist is attached to
+a concurrently built unique index. Existing duplicate signups have to be
+resolved first - the migration stops and lists them.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _check_duplicate_signups() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT student_id, session_id, count(*) FROM waitlist "
+        "GROUP BY student_id, session_id HAVING count(*) > 1 LIMIT 20"
+    )).all()
+    if duplicates:
+        listing = ", ".join(f"student {r[0]} / session {r[1]} ({r[2]} rows)" for r in duplicates)
+        raise RuntimeError(f"Duplicate waitlist signups must be removed before adding uq_waitlist_student_session: {listing}")
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql:
+        _check_duplicate_signups()
+
+    with op.get_context().autocommit_block():
+        # waitlist: filtered by (session_id, status), ordered by created_at
+        op.create_index('ix_waitlist_session_status_created', 'waitlist',
+                        ['session_id', 'status', 'created_at'], postgresql_concurrently=True)
+        op.create_index('ix_waitlist_session_admitted', 'waitlist', ['session_id', 'created_at'],
+                        postgresql_where=sa.text("status = 'admitted'"), postgresql_concurrently=True)
+        op.create_index('uq_waitlist_student_session', 'waitlist', ['student_id', 'session_id'],
+                        unique=True, postgresql_concurrently=True)
+
+        # attendance: filtered by (session_id, attendance_date)
+        op.create_index('ix_attendance_session_date', 'attendance',
+                        ['session_id', 'attendance_date'], postgresql_concurrently=True)
+
+        # session_staff / session_terms: joined from both sides
+        op.create_index(op.f('ix_session_staff_session_id'), 'session_staff', ['session_id'],
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_session_staff_staff_id'), 'session_staff', ['staff_id'],
+                        postgresql_concurrently=True)
+        op.create_index(op.f('ix_session_terms_term_id'), 'session_terms', ['term_id'],
+                        postgresql_concurrently=True)
+
+        # sessions: filtered by is_deleted and sorted by start_date
+        op.create_index('ix_sessions_start_date_id', 'sessions', ['start_date', 'id'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_sessions_active_start_date', 'sessions', ['start_date'],
+                        postgresql_where=sa.text('is_deleted = false'), postgresql_concurrently=True)
+
+    # Promote the unique index to a constraint (only takes a brief lock)
+    op.execute(
+        "ALTER TABLE waitlist ADD CONSTRAINT uq_waitlist_student_session "
+        "UNIQUE USING INDEX uq_waitlist_student_session"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_waitlist_student_session', 'waitlist', type_='unique')
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_active_start_date', table_name='sessions', postgresql_concurrently=True)
+        op.drop_index('ix_sessions_start_date_id', table_name='sessions', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_session_terms_term_id'), table_name='session_terms', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_session_staff_staff_id'), table_name='session_staff', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_session_staff_session_id'), table_name='session_staff', postgresql_concurrently=True)
+        op.drop_index('ix_attendance_session_date', table_name='attendance', postgresql_concurrently=True)
+        op.drop_index('ix_waitlist_session_admitted', table_name='waitlist', postgresql_concurrently=True)
+        op.drop_index('ix_waitlist_session_status_created', table_name='waitlist', postgresql_concurrently=True)
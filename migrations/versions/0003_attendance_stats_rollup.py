@@ -0,0 +1,59 @@
+"""attendance stats rollup
+
+Per-student and per-date present/absent counts, kept up to date by
+AttendanceService and backfilled here from the existing attendance rows.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 20:48:58.919900
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('attendance_date_stats',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('attendance_date', sa.Date(), nullable=False),
+        sa.Column('present_count', sa.Integer(), nullable=False),
+        sa.Column('absent_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'attendance_date')
+    )
+    op.create_table('attendance_student_stats',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('waitlist_id', sa.Integer(), nullable=False),
+        sa.Column('present_count', sa.Integer(), nullable=False),
+        sa.Column('absent_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['waitlist_id'], ['waitlist.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'waitlist_id')
+    )
+
+    op.execute(
+        "INSERT INTO attendance_student_stats (session_id, waitlist_id, present_count, absent_count) "
+        "SELECT session_id, waitlist_id, count(*) FILTER (WHERE is_present), count(*) FILTER (WHERE NOT is_present) "
+        "FROM attendance GROUP BY session_id, waitlist_id"
+    )
+    op.execute(
+        "INSERT INTO attendance_date_stats (session_id, attendance_date, present_count, absent_count) "
+        "SELECT session_id, attendance_date, count(*) FILTER (WHERE is_present), count(*) FILTER (WHERE NOT is_present) "
+        "FROM attendance GROUP BY session_id, attendance_date"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('attendance_student_stats')
+    op.drop_table('attendance_date_stats')
@@ -0,0 +1,41 @@
+"""attendance bitmaps
+
+Table for the optional bitmap attendance layout (ATTENDANCE_STORAGE_MODE=bitmap).
+Existing rows are moved with `python manage.py convert-attendance-storage bitmap`;
+downgrading drops the table, so convert back to rows first.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 20:51:59.723877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('attendance_bitmaps',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('waitlist_id', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('interval_days', sa.SmallInteger(), server_default=sa.text('7'), nullable=False),
+        sa.Column('present_bits', sa.LargeBinary(), nullable=False),
+        sa.Column('known_bits', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['waitlist_id'], ['waitlist.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'waitlist_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('attendance_bitmaps')
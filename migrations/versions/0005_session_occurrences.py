@@ -0,0 +1,50 @@
+"""session occurrences
+
+Concrete class dates of every session, kept in sync by OccurrenceService.
+Existing sessions are backfilled here from their day/date/time columns (the
+values their rrule is generated from); `python manage.py sync-occurrences`
+regenerates the table from the stored rrules.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 21:00:13.038087
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('session_occurrences',
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('occurrence_date', sa.Date(), nullable=False),
+        sa.Column('starts_at', sa.DateTime(), nullable=False),
+        sa.Column('ends_at', sa.DateTime(), nullable=False),
+        sa.Column('is_cancelled', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'occurrence_date')
+    )
+    op.create_index('ix_session_occurrences_date', 'session_occurrences', ['occurrence_date', 'session_id'], unique=False)
+
+    # Every day_of_week between start_date and end_date, as the generated rrule expands
+    op.execute(
+        "INSERT INTO session_occurrences (session_id, occurrence_date, starts_at, ends_at) "
+        "SELECT s.id, d::date, d::date + s.start_time, d::date + s.end_time "
+        "FROM sessions s, generate_series(s.start_date, s.end_date, interval '1 day') AS d "
+        "WHERE to_char(d, 'FMDay') = s.day_of_week"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_session_occurrences_date', table_name='session_occurrences')
+    op.drop_table('session_occurrences')
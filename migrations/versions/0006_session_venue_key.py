@@ -0,0 +1,81 @@
+"""session venue key
+
+Canonical venue key for venue clash checks, backfilled for existing sessions
+here with a frozen copy of utils.venue.venue_key as it stood at this revision,
+so later changes to the normalization do not rewrite history. The index is
+built concurrently, like 0002.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 21:03:20.872488
+
+"""
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of utils.venue at this revision; do not update it to follow that module
+_ABBREVIATIONS = {
+    "st": "street",
+    "rd": "road",
+    "ave": "avenue",
+    "av": "avenue",
+    "dr": "drive",
+    "pl": "place",
+    "tce": "terrace",
+    "cres": "crescent",
+    "hwy": "highway",
+    "ln": "lane",
+    "blvd": "boulevard",
+    "sq": "square",
+    "ct": "court",
+    "mt": "mount",
+    "rm": "room",
+    "lvl": "level",
+    "bldg": "building",
+}
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize(value: str) -> str:
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char)).casefold()
+    words = _NON_ALPHANUMERIC.sub(" ", value).split()
+    return " ".join(_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def venue_key(location: str, city: str) -> str:
+    return f"{_normalize(location)}|{_normalize(city)}"
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('venue_key', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    sessions = bind.execute(sa.text("SELECT id, location, city FROM sessions")).all()
+    if sessions:
+        bind.execute(
+            sa.text("UPDATE sessions SET venue_key = :venue_key WHERE id = :id"),
+            [{"id": s.id, "venue_key": venue_key(s.location, s.city)} for s in sessions]
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_sessions_active_venue_day', 'sessions', ['venue_key', 'day_of_week'], unique=False,
+                        postgresql_where=sa.text('is_deleted = false'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_sessions_active_venue_day', table_name='sessions', postgresql_concurrently=True)
+    op.drop_column('sessions', 'venue_key')
@@ -0,0 +1,57 @@
+"""student search indexes
+
+Prefix indexes for student autocomplete, a GIN index for experience filters
+and a trigram index over the searchable text for substring and typo-tolerant
+matches. The trigram index needs the pg_trgm extension, which the migration
+installs; it fails before touching students if the server cannot provide it.
+
+Built with CREATE INDEX CONCURRENTLY in an autocommit block, like 0002, so
+students stays writable while the indexes build.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 21:17:28.287948
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match services.waitlist_service.student_search_text() for the planner to use the index
+SEARCH_TEXT_SQL = "lower(email || ' ' || first_name || ' ' || family_name || ' ' || parent_name || ' ' || parent_phone)"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if available is None:
+        raise RuntimeError(
+            "Student search needs the pg_trgm extension, which this server does not provide. "
+            "Install the PostgreSQL contrib package (postgresql-contrib) and re-run the migration."
+        )
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_students_email_prefix', 'students', [sa.literal_column('lower(email)').label('email_lower')], unique=False, postgresql_ops={'email_lower': 'text_pattern_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_students_experience', 'students', ['experience'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_students_family_name_prefix', 'students', [sa.literal_column('lower(family_name)').label('family_name_lower')], unique=False, postgresql_ops={'family_name_lower': 'text_pattern_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_students_first_name_prefix', 'students', [sa.literal_column('lower(first_name)').label('first_name_lower')], unique=False, postgresql_ops={'first_name_lower': 'text_pattern_ops'}, postgresql_concurrently=True)
+        op.execute(f"CREATE INDEX CONCURRENTLY ix_students_search_trgm ON students USING gin ({SEARCH_TEXT_SQL} gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    # The extension is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_students_search_trgm")
+        op.drop_index('ix_students_first_name_prefix', table_name='students', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_students_family_name_prefix', table_name='students', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_students_experience', table_name='students', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_students_email_prefix', table_name='students', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,21 @@
+# models/__init__.py
+from models.user.user import User
+from models.user.role import Role
+from models.user.user_role import UserRole
+from models.term import Term
+from models.session import Session
+from models.session_term import SessionTerm
+from models.session_staff import SessionStaff
+from models.student import Student
+from models.waitlist import Waitlist
+from models.attendance import Attendance
+from models.attendance_stats import AttendanceStudentStats, AttendanceDateStats
+from models.attendance_bitmap import AttendanceBitmap
+from models.session_occurrence import SessionOccurrence
+from models.session_document import SessionDocument
+
+__all__ = [
+    "User", "Role", "UserRole", "Term", "Session", "SessionTerm",
+    "SessionStaff", "Student", "Waitlist", "Attendance", "AttendanceStudentStats", "AttendanceDateStats",
+    "AttendanceBitmap", "SessionOccurrence", "SessionDocument"
+]
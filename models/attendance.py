@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.db_connect import Base
@@ -23,4 +23,5 @@ class Attendance(Base):
     # Ensure one attendance record per student per date
     __table_args__ = (
         UniqueConstraint('session_id', 'waitlist_id', 'attendance_date', name='uix_attendance'),
+        Index('ix_attendance_session_date', 'session_id', 'attendance_date'),
     )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, LargeBinary, SmallInteger, text
+from sqlalchemy.sql import func
+from core.db_connect import Base
+
+
+class AttendanceBitmap(Base):
+    """Compact attendance storage - one row per student per session.
+    Bit i of each bitmap is the date `interval_days * i` days after first_date (least
+    significant bit of the first byte is bit 0); interval_days is 7 until the session
+    moves to another weekday. known_bits marks recorded dates, present_bits
+    the ones marked present. Both are always the same length."""
+    __tablename__ = "attendance_bitmaps"
+
+    session_id = Column(Integer, ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True)
+    waitlist_id = Column(Integer, ForeignKey('waitlist.id', ondelete='CASCADE'), primary_key=True)
+    first_date = Column(Date, nullable=False)
+    interval_days = Column(SmallInteger, nullable=False, default=7, server_default=text('7'))
+    present_bits = Column(LargeBinary, nullable=False)
+    known_bits = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
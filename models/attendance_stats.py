@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime
+from sqlalchemy.sql import func
+from core.db_connect import Base
+
+
+class AttendanceStudentStats(Base):
+    """Rollup of recorded attendance per student in a session.
+    Maintained by AttendanceService when attendance is saved; rebuild with
+    `python manage.py recompute-attendance-stats`."""
+    __tablename__ = "attendance_student_stats"
+
+    session_id = Column(Integer, ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True)
+    waitlist_id = Column(Integer, ForeignKey('waitlist.id', ondelete='CASCADE'), primary_key=True)
+    present_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AttendanceDateStats(Base):
+    """Rollup of recorded attendance per session date"""
+    __tablename__ = "attendance_date_stats"
+
+    session_id = Column(Integer, ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True)
+    attendance_date = Column(Date, primary_key=True)
+    present_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Time, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, Time, DateTime, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.db_connect import Base
@@ -19,6 +19,7 @@ class Session(Base):
     end_time = Column(Time, nullable=False)
     location = Column(String(500), nullable=False)
     city = Column(String(200), nullable=False)
+    venue_key = Column(Text, nullable=True)  # utils.venue.venue_key(location, city)
     location_url = Column(String(1000), nullable=True)
     capacity = Column(Integer, nullable=False)
     min_age = Column(Integer, nullable=False)
@@ -48,3 +49,11 @@ class Session(Base):
 
     # Relationship to attendance records
     attendance_records = relationship("Attendance", back_populates="session", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Session lists are ordered by start_date; id breaks ties
+        Index('ix_sessions_start_date_id', 'start_date', 'id'),
+        Index('ix_sessions_active_start_date', 'start_date', postgresql_where=text('is_deleted = false')),
+        # Sessions held at a venue on a weekday, for clash checks
+        Index('ix_sessions_active_venue_day', 'venue_key', 'day_of_week', postgresql_where=text('is_deleted = false')),
+    )
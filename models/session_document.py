@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from core.db_connect import Base
+
+
+class SessionDocument(Base):
+    """A session's rendered SessionResponse, served as-is by the session list.
+    Refreshed by SessionDocumentService whenever the session, its terms or its
+    staff change; rebuild with `python manage.py rebuild-session-documents`."""
+    __tablename__ = "session_documents"
+
+    session_id = Column(Integer, ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True)
+    document = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
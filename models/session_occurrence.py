@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, DateTime, Boolean, Index, text
+from sqlalchemy.sql import func
+from core.db_connect import Base
+
+
+class SessionOccurrence(Base):
+    """One scheduled class of a session, expanded from its rrule.
+    Regenerated by OccurrenceService whenever a session is created or updated;
+    is_cancelled survives regeneration for dates that stay on the schedule."""
+    __tablename__ = "session_occurrences"
+
+    session_id = Column(Integer, ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True)
+    occurrence_date = Column(Date, primary_key=True)
+    starts_at = Column(DateTime, nullable=False)  # Local time, like Session.start_time
+    ends_at = Column(DateTime, nullable=False)
+    is_cancelled = Column(Boolean, nullable=False, default=False, server_default=text('false'))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # "What's on between these dates" across all sessions
+        Index('ix_session_occurrences_date', 'occurrence_date', 'session_id'),
+    )
@@ -8,5 +8,5 @@ class SessionTerm(Base):
     __tablename__ = "session_terms"
 
     session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True)
-    term_id = Column(Integer, ForeignKey("terms.id", ondelete="CASCADE"), primary_key=True)
+    term_id = Column(Integer, ForeignKey("terms.id", ondelete="CASCADE"), primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
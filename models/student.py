@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ARRAY, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, Text, ARRAY, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from core.db_connect import Base
 import enum
@@ -40,3 +40,15 @@ class Student(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Prefix (autocomplete) search on lower-cased names and email
+        Index('ix_students_family_name_prefix', func.lower(family_name).label('family_name_lower'),
+              postgresql_ops={'family_name_lower': 'text_pattern_ops'}),
+        Index('ix_students_first_name_prefix', func.lower(first_name).label('first_name_lower'),
+              postgresql_ops={'first_name_lower': 'text_pattern_ops'}),
+        Index('ix_students_email_prefix', func.lower(email).label('email_lower'),
+              postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        # experience @> ARRAY[...] filters
+        Index('ix_students_experience', 'experience', postgresql_using='gin'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.db_connect import Base
@@ -49,4 +49,12 @@ class Waitlist(Base):
 
     # Relationships
     student = relationship("Student", backref="waitlist_entries")
-    session = relationship("Session", backref="waitlist_entries")
\ No newline at end of file
+    session = relationship("Session", backref="waitlist_entries")
+
+    __table_args__ = (
+        # A student can sign up for a session only once
+        UniqueConstraint('student_id', 'session_id', name='uq_waitlist_student_session'),
+        # Waitlist screens filter by session and status, ordered by signup time
+        Index('ix_waitlist_session_status_created', 'session_id', 'status', 'created_at'),
+        Index('ix_waitlist_session_admitted', 'session_id', 'created_at', postgresql_where=text("status = 'admitted'")),
+    )
@@ -15,7 +15,7 @@ class AttendanceUpdate(BaseModel):
     is_present: Optional[bool] = None
 
 class AttendanceResponse(AttendanceBase):
-    id: int
+    id: Optional[int] = None  # None when attendance is stored as bitmaps
 
     class Config:
         from_attributes = True
@@ -46,3 +46,42 @@ class StudentAttendanceStatus(BaseModel):
     student_name: str
     student_email: str
     is_present: bool
+
+class MatrixStudent(BaseModel):
+    waitlist_id: int
+    student_name: str
+    student_email: str
+
+class AttendanceMatrix(BaseModel):
+    """Attendance for a whole session in columnar form.
+    grid[i][j] is the status of students[i] on dates[j]:
+    P = present, A = absent, U = unknown (no record and no default applies)"""
+    session_id: int
+    dates: List[date]
+    students: List[MatrixStudent]
+    grid: List[str]
+
+class StudentAttendanceStats(BaseModel):
+    """Recorded attendance of one student; attendance_rate is None until a record exists"""
+    waitlist_id: int
+    student_name: str
+    student_email: str
+    present_count: int
+    absent_count: int
+    recorded_count: int
+    attendance_rate: Optional[float]
+
+class DateAttendanceStats(BaseModel):
+    attendance_date: date
+    present_count: int
+    absent_count: int
+    recorded_count: int
+    attendance_rate: Optional[float]
+
+class SessionAttendanceStats(BaseModel):
+    session_id: int
+    present_count: int
+    absent_count: int
+    recorded_count: int
+    attendance_rate: Optional[float]
+    dates: List[DateAttendanceStats]
@@ -39,6 +39,7 @@ class CreateSessionRequest(BaseModel):
     minAge: int = Field(..., ge=0, le=100, alias="minAge")
     maxAge: int = Field(..., ge=0, le=100, alias="maxAge")
     staffIds: List[int] = Field(default=[], alias="staffIds")
+    allowConflicts: bool = Field(default=False, alias="allowConflicts")
 
     class Config:
         populate_by_name = True
@@ -58,6 +59,7 @@ class UpdateSessionRequest(BaseModel):
     minAge: Optional[int] = Field(None, ge=0, le=100, alias="minAge")
     maxAge: Optional[int] = Field(None, ge=0, le=100, alias="maxAge")
     staffIds: Optional[List[int]] = Field(None, alias="staffIds")
+    allowConflicts: bool = Field(default=False, alias="allowConflicts")
 
     class Config:
         populate_by_name = True
@@ -103,4 +105,64 @@ class SessionResponse(BaseModel):
 class CreateSessionResponse(BaseModel):
     status: str
     message: str
-    session: SessionResponse
\ No newline at end of file
+    session: SessionResponse
+
+class SessionOccurrenceResponse(BaseModel):
+    """One scheduled class of a session"""
+    sessionId: int
+    title: str
+    location: str
+    city: str
+    occurrenceDate: date
+    startsAt: datetime
+    endsAt: datetime
+    isCancelled: bool
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+
+class UpdateOccurrenceRequest(BaseModel):
+    isCancelled: bool = Field(..., alias="isCancelled")
+
+    class Config:
+        populate_by_name = True
+
+
+class StaffConflict(BaseModel):
+    """A staff member assigned to two sessions that meet at the same time"""
+    staffId: int
+    staffName: str
+    dayOfWeek: str
+    sessionId: int
+    sessionTitle: str
+    conflictingSessionId: int
+    conflictingSessionTitle: str
+    # The dates and times both sessions share
+    overlapStartDate: date
+    overlapEndDate: date
+    overlapStartTime: time
+    overlapEndTime: time
+
+    class Config:
+        populate_by_name = True
+
+
+class VenueClash(BaseModel):
+    """Two active sessions booked at the same venue at the same time"""
+    location: str
+    city: str
+    dayOfWeek: str
+    sessionId: int
+    sessionTitle: str
+    clashingSessionId: int
+    clashingSessionTitle: str
+    # The dates and times both sessions share
+    overlapStartDate: date
+    overlapEndDate: date
+    overlapStartTime: time
+    overlapEndTime: time
+
+    class Config:
+        populate_by_name = True
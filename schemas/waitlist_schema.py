@@ -162,3 +162,21 @@ class AllSessionsStudentCountResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ImportRowError(BaseModel):
+    """Validation problems for one data row of an import file (row 1 is the first row after the header)"""
+    row: int
+    email: Optional[str]
+    errors: List[str]
+
+
+class StudentImportResponse(BaseModel):
+    total_rows: int
+    valid_rows: int
+    students_created: int
+    students_updated: int
+    waitlist_created: int
+    already_registered: int
+    error_count: int
+    errors: List[ImportRowError]
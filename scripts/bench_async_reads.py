@@ -0,0 +1,100 @@
+"""
+Sync vs async throughput of one read path at high client concurrency.
+
+Serves GET /sync/{session_id} (def route, get_db, WaitlistService.get_waitlist_by_session)
+and GET /async/{session_id} (async def route, get_async_db, get_waitlist_by_session_async)
+from one in-process app, then fires the same number of requests at each with
+`--clients` of them in flight at once. Sync routes run on anyio's worker threads,
+so the difference shows how much the threadpool limits concurrency.
+
+Point the DB_* settings at a database with data in it and run, e.g.:
+
+    pip install httpx
+    python scripts/bench_async_reads.py --session-id 12 --clients 200 --requests 4000
+
+Keep QUERY_CACHE_ENABLED off, otherwise both sides measure the cache.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from dependencies.db_dependency import get_async_db, get_db
+    from services.waitlist_service import WaitlistService
+    import models  # noqa: F401 - every mapper must be registered before the first query
+
+    app = FastAPI()
+
+    @app.get("/sync/{session_id}")
+    def sync_read(session_id: int, db: Session = Depends(get_db)):
+        return len(WaitlistService(db).get_waitlist_by_session(session_id))
+
+    @app.get("/async/{session_id}")
+    async def async_read(session_id: int, db: AsyncSession = Depends(get_async_db)):
+        return len(await WaitlistService(db).get_waitlist_by_session_async(session_id))
+
+    return app
+
+
+async def run(client, path: str, clients: int, requests: int) -> dict:
+    semaphore = asyncio.Semaphore(clients)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "req/s": round(requests / elapsed, 1),
+        "p50 ms": round(statistics.median(latencies), 1),
+        "p95 ms": round(latencies[int(len(latencies) * 0.95) - 1], 1),
+        "p99 ms": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+        "errors": errors,
+    }
+
+
+async def main(args) -> None:
+    import httpx
+
+    from core.db_connect import async_engine, engine
+
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for kind in ("sync", "async"):
+            path = f"/{kind}/{args.session_id}"
+            # Warm up the pool and the compiled statement cache
+            await run(client, path, min(args.clients, 20), 50)
+            print(f"{kind:>5}: {await run(client, path, args.clients, args.requests)}")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session-id", type=int, required=True, help="Session whose waitlist is read")
+    parser.add_argument("--clients", type=int, default=200, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=4000, help="Requests per variant")
+    asyncio.run(main(parser.parse_args()))
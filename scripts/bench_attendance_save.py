@@ -0,0 +1,109 @@
+"""
+Latency and WAL of re-saving a session's attendance: delete-and-reinsert vs diff upsert.
+
+Takes the stored attendance of a few seeded sessions as the payload and saves it
+again unchanged, the common case of a teacher pressing save twice, with:
+
+- delete_reinsert: the previous bulk_save_all_attendance (DELETE every row on
+  the payload's dates, then INSERT them all again)
+- upsert: AttendanceService.bulk_save_all_attendance as it is now
+
+WAL is measured with pg_current_wal_lsn() around each save, so keep other
+writers off the database while it runs. Needs ATTENDANCE_STORAGE_MODE=rows.
+
+    python scripts/bench_seed.py
+    python scripts/bench_attendance_save.py --sessions 10 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, insert, text
+
+from bench_seed import seeded_session_ids
+
+
+def delete_reinsert(db, session_id: int, payload) -> None:
+    from models.attendance import Attendance
+
+    dates = {record['attendance_date'] for record in payload}
+    db.query(Attendance).filter(
+        and_(Attendance.session_id == session_id, Attendance.attendance_date.in_(dates))
+    ).delete(synchronize_session=False)
+    db.execute(insert(Attendance).values([
+        {'session_id': session_id, 'waitlist_id': record['waitlist_id'],
+         'attendance_date': record['attendance_date'], 'is_present': record['is_present']}
+        for record in payload
+    ]))
+    db.commit()
+
+
+def upsert(db, session_id: int, payload) -> None:
+    from services.attendance_service import AttendanceService
+
+    AttendanceService.bulk_save_all_attendance(db, session_id, [
+        dict(record, attendance_date=record['attendance_date'].isoformat()) for record in payload
+    ])
+
+
+def load_payload(db, session_id: int):
+    return [
+        {'waitlist_id': row.waitlist_id, 'attendance_date': row.attendance_date, 'is_present': row.is_present}
+        for row in db.execute(text(
+            "SELECT waitlist_id, attendance_date, is_present FROM attendance WHERE session_id = :session_id"
+        ), {"session_id": session_id})
+    ]
+
+
+def measure(db, save, payloads, repeat: int) -> dict:
+    latencies, wal = [], []
+    for _ in range(repeat):
+        for session_id, payload in payloads.items():
+            lsn = db.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+            db.commit()
+            start = time.perf_counter()
+            save(db, session_id, payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            wal.append(db.execute(
+                text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :lsn)"), {"lsn": lsn}
+            ).scalar())
+            db.commit()
+    return {
+        "median ms": round(statistics.median(latencies), 1),
+        "median WAL bytes": int(statistics.median(wal)),
+    }
+
+
+def main(args) -> None:
+    from config import settings
+    from core.db_connect import SessionLocal, engine
+    import models  # noqa: F401 - every mapper must be registered before the first query
+
+    if settings.attendance_storage_mode != "rows":
+        raise SystemExit("Run with ATTENDANCE_STORAGE_MODE=rows")
+
+    with SessionLocal() as db:
+        session_ids = seeded_session_ids(db.connection(), args.sessions)
+        payloads = {session_id: load_payload(db, session_id) for session_id in session_ids}
+        payloads = {session_id: payload for session_id, payload in payloads.items() if payload}
+        db.commit()
+        if not payloads:
+            raise SystemExit("No seeded attendance - run scripts/bench_seed.py first")
+        records = sum(len(payload) for payload in payloads.values())
+        print(f"{len(payloads)} sessions, {records // len(payloads)} records each on average")
+
+        for name, save in (("delete_reinsert", delete_reinsert), ("upsert", upsert)):
+            save(db, *next(iter(payloads.items())))  # warm up
+            print(f"{name:>15}: {measure(db, save, payloads, args.repeat)}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+"""
+Table size and read latency of the two attendance layouts (rows vs bitmap).
+
+Measures the seeded sessions in the row layout, converts them to bitmaps with
+AttendanceBitmapService, measures again and converts them back, checking that
+the round trip returns the same records. Tables are VACUUM FULLed before each
+size reading so dead tuples from the conversion do not count. Run it on a
+disposable database with ATTENDANCE_STORAGE_MODE=rows; the layout is switched
+in-process for the bitmap pass.
+
+    python scripts/bench_seed.py
+    python scripts/bench_attendance_storage.py --sessions 40 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from bench_seed import seeded_session_ids
+
+
+def table_sizes(engine) -> dict:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM FULL attendance"))
+        connection.execute(text("VACUUM FULL attendance_bitmaps"))
+        return {
+            table: connection.execute(text(
+                f"SELECT pg_total_relation_size('{table}'), (SELECT count(*) FROM {table})"
+            )).one()
+            for table in ("attendance", "attendance_bitmaps")
+        }
+
+
+def time_reads(db, session_ids, repeat: int) -> dict:
+    from services.attendance_service import AttendanceService
+
+    per_date, whole_session = [], []
+    for _ in range(repeat):
+        for session_id in session_ids:
+            first_date = db.execute(
+                text("SELECT start_date FROM sessions WHERE id = :id"), {"id": session_id}
+            ).scalar()
+            start = time.perf_counter()
+            AttendanceService.get_attendance_for_date(db, session_id, first_date)
+            per_date.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            AttendanceService.get_session_attendance(db, session_id)
+            whole_session.append((time.perf_counter() - start) * 1000)
+            db.rollback()
+    return {
+        "per-date median ms": round(statistics.median(per_date), 2),
+        "whole-session median ms": round(statistics.median(whole_session), 2),
+    }
+
+
+def snapshot(db, session_ids) -> set:
+    return set(db.execute(text(
+        "SELECT session_id, waitlist_id, attendance_date, is_present FROM attendance WHERE session_id = ANY(:ids)"
+    ), {"ids": list(session_ids)}).all())
+
+
+def report(name: str, sizes: dict, reads: dict, records: int) -> None:
+    total = sum(size for size, _ in sizes.values())
+    rows = ", ".join(f"{table} {count} rows" for table, (_, count) in sizes.items())
+    print(f"{name}: {total / 1024:.0f} kB ({rows}), {total / records:.1f} bytes per record; {reads}")
+
+
+def main(args) -> None:
+    from config import settings
+    from core.db_connect import SessionLocal, engine
+    from services.attendance_bitmap_service import AttendanceBitmapService
+    import models  # noqa: F401 - every mapper must be registered before the first query
+
+    if settings.attendance_storage_mode != "rows":
+        raise SystemExit("Start with ATTENDANCE_STORAGE_MODE=rows")
+
+    with SessionLocal() as db:
+        session_ids = seeded_session_ids(db.connection(), args.sessions)
+        before = snapshot(db, session_ids)
+        db.rollback()
+        if not before:
+            raise SystemExit("No seeded attendance - run scripts/bench_seed.py first")
+        print(f"{len(session_ids)} sessions, {len(before)} records")
+        print("Sizes cover the whole tables, so run on a database holding only seeded data")
+
+        report("rows  ", table_sizes(engine), time_reads(db, session_ids, args.repeat), len(before))
+
+        for session_id in session_ids:
+            AttendanceBitmapService.convert_session_to_bitmaps(db, session_id)
+        db.commit()
+        settings.attendance_storage_mode = "bitmap"
+        try:
+            report("bitmap", table_sizes(engine), time_reads(db, session_ids, args.repeat), len(before))
+        finally:
+            settings.attendance_storage_mode = "rows"
+            for session_id in session_ids:
+                AttendanceBitmapService.convert_session_to_rows(db, session_id)
+            db.commit()
+
+        after = snapshot(db, session_ids)
+        print("round trip:", "identical" if after == before else f"{len(before ^ after)} records differ")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+"""
+Before/after EXPLAIN for the hot query patterns indexed by migration 0002.
+
+Runs each query under EXPLAIN (ANALYZE, BUFFERS) twice on the current data:
+once inside a transaction that drops 0002's indexes first (then rolls back, so
+nothing is lost), and once with the indexes in place. Prints the plan's top node,
+execution time and shared buffers touched for both. Seed data first with
+scripts/bench_seed.py; dropping the indexes takes an exclusive lock on the
+tables, so use a disposable database.
+
+    python scripts/bench_seed.py
+    python scripts/bench_hot_path_indexes.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from bench_seed import seeded_session_ids
+
+# Indexes and constraints added by migrations/versions/0002_hot_path_indexes.py
+DROP_0002 = [
+    "ALTER TABLE waitlist DROP CONSTRAINT IF EXISTS uq_waitlist_student_session",
+    "DROP INDEX IF EXISTS ix_waitlist_session_status_created",
+    "DROP INDEX IF EXISTS ix_waitlist_session_admitted",
+    "DROP INDEX IF EXISTS ix_attendance_session_date",
+    "DROP INDEX IF EXISTS ix_session_staff_session_id",
+    "DROP INDEX IF EXISTS ix_session_staff_staff_id",
+    "DROP INDEX IF EXISTS ix_session_terms_term_id",
+    "DROP INDEX IF EXISTS ix_sessions_start_date_id",
+    "DROP INDEX IF EXISTS ix_sessions_active_start_date",
+]
+
+QUERIES = {
+    "waitlist by session and status": (
+        "SELECT * FROM waitlist WHERE session_id = :session_id AND status = 'waitlist' ORDER BY created_at"
+    ),
+    "admitted students of a session": (
+        "SELECT * FROM waitlist WHERE session_id = :session_id AND status = 'admitted' ORDER BY created_at"
+    ),
+    "attendance on one date": (
+        "SELECT waitlist_id, is_present FROM attendance "
+        "WHERE session_id = :session_id AND attendance_date = "
+        "(SELECT start_date FROM sessions WHERE id = :session_id)"
+    ),
+    "sessions of a staff member": (
+        "SELECT session_id FROM session_staff WHERE staff_id = "
+        "(SELECT staff_id FROM session_staff WHERE session_id = :session_id LIMIT 1)"
+    ),
+    "first page of active sessions": (
+        "SELECT * FROM sessions WHERE is_deleted = false ORDER BY start_date, id LIMIT 50"
+    ),
+}
+
+
+def explain(connection, query: str, session_id: int) -> dict:
+    plan = connection.execute(
+        text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query), {"session_id": session_id}
+    ).scalar()
+    plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+    top = plan["Plan"]
+    return {
+        "node": top["Node Type"] + (f" on {top['Index Name']}" if "Index Name" in top else ""),
+        "ms": plan["Execution Time"],
+        "buffers": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+    }
+
+
+def measure(connection, session_ids, repeat: int) -> dict:
+    results = {}
+    for name, query in QUERIES.items():
+        samples = [explain(connection, query, session_id) for _ in range(repeat) for session_id in session_ids]
+        results[name] = {
+            "node": samples[-1]["node"],
+            "median ms": round(statistics.median(s["ms"] for s in samples), 3),
+            "buffers": round(statistics.median(s["buffers"] for s in samples)),
+        }
+    return results
+
+
+def main(args) -> None:
+    from core.db_connect import engine
+
+    with engine.connect() as connection:
+        session_ids = seeded_session_ids(connection, args.sessions)
+        if not session_ids:
+            raise SystemExit("No seeded sessions - run scripts/bench_seed.py first")
+
+        connection.rollback()
+
+        # The drops stay inside this transaction and are undone by the rollback
+        for statement in DROP_0002:
+            connection.execute(text(statement))
+        before = measure(connection, session_ids, args.repeat)
+        connection.rollback()
+
+        after = measure(connection, session_ids, args.repeat)
+        connection.rollback()
+
+    for name in QUERIES:
+        print(name)
+        print(f"  before: {before[name]}")
+        print(f"  after:  {after[name]}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Seeded sessions to run each query for")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,134 @@
+"""
+Synthetic data for the benchmark scripts.
+
+Seeds sessions, students, signups, staff assignments and attendance straight
+into the tables with generate_series, so even large datasets load in seconds.
+Every row is tagged with a prefix and can be removed again with --drop. Class
+dates are then regenerated in session_occurrences, so attendance saves accept
+them. Only point it at a disposable, migrated database.
+
+    python scripts/bench_seed.py --sessions 2000 --students 200000 --signups-per-session 60 --weeks 20
+    python scripts/bench_seed.py --drop
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+TAG = "bench-seed"
+
+SEED_SQL = [
+    # One staff user owns every session and teaches a handful of them each
+    """
+    INSERT INTO "user".users (email, user_name, hashed_password, created_at)
+    SELECT :tag || '-staff-' || i || '@bench.invalid', :tag || '-staff-' || i, 'x', now()
+    FROM generate_series(1, :staff) AS i
+    """,
+    # Weekly Monday classes with rrules in generate_rrule's format, so occurrences line up
+    """
+    INSERT INTO sessions (title, term, day_of_week, start_date, end_date, start_time, end_time,
+                          location, city, capacity, min_age, max_age, rrule, is_deleted, created_by)
+    SELECT :tag || ' session ' || i, 'Term ' || (i % 4 + 1), 'Monday',
+           first_class, first_class + (:weeks - 1) * 7, starts, starts + interval '1 hour',
+           'Room ' || (i % 50), 'City ' || (i % 8), 30, 8, 14,
+           'DTSTART:' || to_char(first_class + starts, 'YYYYMMDD"T"HH24MISS') || chr(10)
+               || 'RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL='
+               || to_char(first_class + (:weeks - 1) * 7 + starts + interval '1 hour', 'YYYYMMDD"T"HH24MISS'),
+           i % 10 = 0,
+           (SELECT min(id) FROM "user".users WHERE user_name LIKE :tag || '-staff-%')
+    FROM generate_series(1, :sessions) AS i,
+         LATERAL (SELECT date '2026-01-05' + (i % 40) * 7 AS first_class,
+                         time '15:00' + (i % 6) * interval '30 minutes' AS starts) AS slot
+    """,
+    """
+    INSERT INTO session_staff (session_id, staff_id)
+    SELECT s.id, u.id
+    FROM sessions s
+    JOIN "user".users u ON u.user_name = :tag || '-staff-' || (s.id % :staff + 1)
+    WHERE s.title LIKE :tag || ' session %'
+    """,
+    """
+    INSERT INTO students (email, first_name, family_name, school_year, needs_device, experience,
+                          parent_name, parent_phone)
+    SELECT :tag || '-student-' || i || '@bench.invalid', 'First' || i, 'Family' || (i % 5000),
+           ('YEAR_' || (5 + i % 4))::schoolyear, i % 3 = 0, ARRAY['Scratch', 'Python'][1:(i % 3)],
+           'Parent' || i, '021' || lpad(i::text, 7, '0')
+    FROM generate_series(1, :students) AS i
+    """,
+    # Each session gets a run of consecutive students; the first 30 are admitted
+    """
+    INSERT INTO waitlist (student_id, session_id, consent_share_details, consent_photos, heard_from,
+                          newsletter_subscribe, status, created_at)
+    SELECT st.id, s.id, true, true, 'School', false,
+           CASE WHEN n <= 30 THEN 'admitted' WHEN n % 7 = 0 THEN 'withdrawn' ELSE 'waitlist' END::waitliststatus,
+           now() - (n || ' minutes')::interval
+    FROM (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM sessions WHERE title LIKE :tag || ' session %') s
+    CROSS JOIN generate_series(1, :signups) AS n
+    JOIN (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM students WHERE email LIKE :tag || '-student-%') st
+      ON st.rn = ((s.rn * :signups + n) % :students) + 1
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO attendance (session_id, waitlist_id, attendance_date, is_present)
+    SELECT w.session_id, w.id, s.start_date + week * 7, (w.id + week) % 9 <> 0
+    FROM waitlist w
+    JOIN sessions s ON s.id = w.session_id
+    CROSS JOIN generate_series(0, :weeks - 1) AS week
+    WHERE s.title LIKE :tag || ' session %' AND w.status = 'admitted'
+    """,
+]
+
+DROP_SQL = [
+    "DELETE FROM sessions WHERE title LIKE :tag || ' session %'",
+    "DELETE FROM students WHERE email LIKE :tag || '-student-%'",
+    "DELETE FROM \"user\".users WHERE user_name LIKE :tag || '-staff-%'",
+]
+
+
+def seed(connection, sessions: int, students: int, signups: int, weeks: int, staff: int = 200) -> None:
+    params = {"tag": TAG, "sessions": sessions, "students": students, "signups": signups,
+              "weeks": weeks, "staff": staff}
+    for statement in SEED_SQL:
+        connection.execute(text(statement), params)
+    for table in ("sessions", "students", "waitlist", "attendance", "session_staff"):
+        connection.execute(text(f"ANALYZE {table}"))
+
+
+def drop(connection) -> None:
+    # Signups, attendance and staff assignments go with their session (ON DELETE CASCADE)
+    for statement in DROP_SQL:
+        connection.execute(text(statement), {"tag": TAG})
+
+
+def seeded_session_ids(connection, limit: int):
+    return connection.execute(
+        text("SELECT id FROM sessions WHERE title LIKE :tag || ' session %' AND NOT is_deleted ORDER BY id LIMIT :limit"),
+        {"tag": TAG, "limit": limit}
+    ).scalars().all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--signups-per-session", type=int, default=60)
+    parser.add_argument("--weeks", type=int, default=20)
+    parser.add_argument("--drop", action="store_true", help="Remove previously seeded rows instead")
+    args = parser.parse_args()
+
+    from core.db_connect import SessionLocal, engine
+    from services.occurrence_service import OccurrenceService
+    import models  # noqa: F401 - every mapper must be registered before the first query
+
+    with engine.begin() as connection:
+        if args.drop:
+            drop(connection)
+        else:
+            seed(connection, args.sessions, args.students, args.signups_per_session, args.weeks)
+    if not args.drop:
+        with SessionLocal() as db:
+            OccurrenceService.rebuild(db)
+    engine.dispose()
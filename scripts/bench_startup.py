@@ -0,0 +1,68 @@
+"""
+Import and startup time of the application.
+
+Each run starts a fresh interpreter that imports `main` and enters the app's
+lifespan, timing both. DB_HOST is pointed at an unroutable address, so any
+database I/O during startup shows up as a connect timeout instead of passing
+unnoticed. Exits non-zero when the median import exceeds --max-import-ms, so it
+can guard CI against startup regressions.
+
+    python scripts/bench_startup.py --runs 10 --max-import-ms 1500
+
+To compare with another revision, run it from a checkout of that revision.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+started = asyncio.run(startup())
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (started - imported) * 1000}))
+"""
+
+
+def run_once(env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Startup failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(args) -> None:
+    env = dict(os.environ)
+    env["DB_HOST"] = "203.0.113.1"  # TEST-NET-3: nothing answers there
+    env["DB_CONNECT_TIMEOUT"] = "5"
+    env.pop("DB_REPLICA_URL", None)
+
+    samples = [run_once(env) for _ in range(args.runs)]
+    imports = [sample["import_ms"] for sample in samples]
+    startups = [sample["startup_ms"] for sample in samples]
+    print(f"import:  median {statistics.median(imports):.0f} ms, max {max(imports):.0f} ms")
+    print(f"startup: median {statistics.median(startups):.0f} ms, max {max(startups):.0f} ms")
+
+    if statistics.median(imports) > args.max_import_ms:
+        raise SystemExit(f"Median import time is above {args.max_import_ms} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=1500)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Latency of the student search (WaitlistService.search_students_async) with the
+0008 indexes in place.
+
+Runs first-page searches of each kind against the seeded students and prints
+p50/p95 per kind, plus the plan the substring tier gets, so you can check that
+it uses ix_students_search_trgm rather than a sequential scan. Exits non-zero
+when any kind's p95 exceeds --max-p95-ms.
+
+    python scripts/bench_seed.py
+    python scripts/bench_student_search.py --searches 200 --max-p95-ms 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from bench_seed import TAG
+
+# Search terms per kind, built from the seeded students' names (see bench_seed.py)
+KINDS = {
+    "prefix": lambda i: f"family{i % 5000}",
+    "substring": lambda i: f"arent{i}",
+    "misspelling": lambda i: f"famliy{i % 5000}",
+    "no match": lambda i: f"qzx{i}",
+}
+
+
+async def explain_substring(db, term: str) -> str:
+    from sqlalchemy.dialects import postgresql
+
+    from services.waitlist_service import student_search_text
+
+    search_text = student_search_text().compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(
+        text(f"EXPLAIN SELECT id FROM students WHERE {search_text} LIKE :pattern ORDER BY id LIMIT 21"),
+        {"pattern": f"%{term}%"}
+    )).scalars().all()
+    return "\n    ".join(plan)
+
+
+async def main(args) -> None:
+    from core.db_connect import AsyncSessionLocal, async_engine
+    from services.waitlist_service import WaitlistService
+    import models  # noqa: F401 - every mapper must be registered before the first query
+
+    async with AsyncSessionLocal() as db:
+        students = (await db.execute(
+            text("SELECT count(*) FROM students WHERE email LIKE :tag || '-student-%'"), {"tag": TAG}
+        )).scalar()
+        indexed = (await db.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_students_search_trgm'")
+        )).first()
+        if not students:
+            raise SystemExit("No seeded students - run scripts/bench_seed.py first")
+        if indexed is None:
+            raise SystemExit("ix_students_search_trgm is missing - run the migrations first")
+        print(f"{students} seeded students")
+        print(f"substring plan:\n    {await explain_substring(db, 'arent1234')}")
+
+        service = WaitlistService(db)
+        failed = []
+        for kind, make_term in KINDS.items():
+            await service.search_students_async(query=make_term(1))  # warm up
+            latencies = []
+            for _ in range(args.searches):
+                term = make_term(random.randint(1, students))
+                start = time.perf_counter()
+                await service.search_students_async(query=term, limit=args.limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{kind:>12}: p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms")
+            if p95 > args.max_p95_ms:
+                failed.append(kind)
+    await async_engine.dispose()
+
+    if failed:
+        raise SystemExit(f"p95 above {args.max_p95_ms} ms for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=200, help="Searches per kind")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-p95-ms", type=float, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from typing import Dict, Iterable, List
+import logging
+
+from config import settings
+from models.session import Session as SessionModel
+from models.waitlist import Waitlist, WaitlistStatus
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionService:
+    """Moves waitlist entries between statuses without admitting past a session's capacity.
+
+    Every change locks the affected session rows first (FOR NO KEY UPDATE, which
+    signups inserting waitlist rows do not wait on), so concurrent admissions to
+    the same session are counted one after the other. Sessions are locked in id
+    order to avoid deadlocks between bulk updates. Nothing is committed here:
+    the locks are held until the caller's transaction ends, so keep it short.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _lock_sessions(self, session_ids: Iterable[int]) -> Dict[int, int]:
+        """Lock the sessions and return their capacities"""
+        rows = self.db.execute(
+            select(SessionModel.id, SessionModel.capacity)
+            .where(SessionModel.id.in_(sorted(set(session_ids))))
+            .order_by(SessionModel.id)
+            .with_for_update(key_share=True)  # FOR NO KEY UPDATE
+        ).all()
+        return {row.id: row.capacity for row in rows}
+
+    def _admitted_counts(self, session_ids: Iterable[int]) -> Dict[int, int]:
+        rows = self.db.execute(
+            select(Waitlist.session_id, func.count())
+            .where(Waitlist.session_id.in_(list(session_ids)), Waitlist.status == WaitlistStatus.ADMITTED)
+            .group_by(Waitlist.session_id)
+        ).all()
+        return {session_id: count for session_id, count in rows}
+
+    def _next_waitlisted(self, session_id: int, count: int, exclude_ids: Iterable[int] = ()) -> List[Waitlist]:
+        """The `count` earliest signups still on the waitlist, locked. Rows another
+        transaction is changing are skipped rather than waited for."""
+        stmt = (
+            select(Waitlist)
+            .where(Waitlist.session_id == session_id, Waitlist.status == WaitlistStatus.WAITLIST)
+            .order_by(Waitlist.created_at, Waitlist.id)
+            .limit(count)
+            .with_for_update(skip_locked=True)
+        )
+        exclude_ids = list(exclude_ids)
+        if exclude_ids:
+            stmt = stmt.where(Waitlist.id.not_in(exclude_ids))
+        return list(self.db.execute(stmt).scalars().all())
+
+    def change_status(self, waitlist_ids: List[int], new_status: WaitlistStatus) -> List[Waitlist]:
+        """Set the status of the given entries (call before committing).
+
+        Raises 404 if any entry does not exist and 409 if admitting them would put a
+        session over capacity, changing nothing. When admitted students leave and
+        `auto_promote_waitlist` is on, their seats go to the earliest waitlisted
+        signups. Returns the entries, in id order.
+        """
+        waitlist_ids = sorted(set(waitlist_ids))
+        # An entry never changes session, so this can be read before locking
+        session_ids = self.db.execute(
+            select(Waitlist.session_id).where(Waitlist.id.in_(waitlist_ids)).distinct()
+        ).scalars().all()
+        capacities = self._lock_sessions(session_ids)
+
+        entries = list(self.db.execute(
+            select(Waitlist)
+            .where(Waitlist.id.in_(waitlist_ids))
+            .order_by(Waitlist.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars().all())
+        if len(entries) != len(waitlist_ids):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=(
+                    f"Waitlist entry with ID {waitlist_ids[0]} not found" if len(waitlist_ids) == 1
+                    else "One or more waitlist entries not found"
+                )
+            )
+
+        admitted = self._admitted_counts(capacities)
+        vacated = {}
+        for session_id, capacity in capacities.items():
+            in_session = [entry for entry in entries if entry.session_id == session_id]
+            joining = sum(1 for entry in in_session if entry.status != WaitlistStatus.ADMITTED)
+            leaving = sum(1 for entry in in_session if entry.status == WaitlistStatus.ADMITTED)
+            if new_status == WaitlistStatus.ADMITTED:
+                free = capacity - admitted.get(session_id, 0)
+                if joining > free:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Session {session_id} has {max(free, 0)} of {capacity} places free; cannot admit {joining} more"
+                    )
+            else:
+                admitted[session_id] = admitted.get(session_id, 0) - leaving
+                vacated[session_id] = leaving
+
+        for entry in entries:
+            entry.status = new_status
+
+        if new_status == WaitlistStatus.WITHDRAWN and settings.auto_promote_waitlist:
+            for session_id, capacity in capacities.items():
+                free = capacity - admitted.get(session_id, 0)
+                self._promote(session_id, min(vacated[session_id], free), waitlist_ids)
+
+        self.db.flush()
+        return entries
+
+    def _promote(self, session_id: int, count: int, exclude_ids: Iterable[int] = ()) -> List[Waitlist]:
+        if count <= 0:
+            return []
+        promoted = self._next_waitlisted(session_id, count, exclude_ids)
+        for entry in promoted:
+            entry.status = WaitlistStatus.ADMITTED
+        if promoted:
+            logger.info(f"Admitted waitlist entries {[entry.id for entry in promoted]} to session {session_id}")
+        return promoted
+
+    def check_capacity(self, session_id: int, capacity: int) -> None:
+        """Raise 409 if `capacity` is below the session's admitted students (call before
+        committing the new capacity). The session row stays locked, so no admission can
+        slip in between the count and the update."""
+        self._lock_sessions([session_id])
+        admitted = self._admitted_counts([session_id]).get(session_id, 0)
+        if capacity < admitted:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Session {session_id} has {admitted} admitted students; capacity cannot be lowered to {capacity}"
+            )
+
+    def admit_next(self, session_id: int, count: int = 1) -> List[Waitlist]:
+        """Admit up to `count` of the earliest waitlisted signups (call before committing).
+
+        Raises 404 for an unknown session and 409 when it is already full. Returns the
+        admitted entries, which may be fewer than `count` if the waitlist runs out.
+        """
+        capacities = self._lock_sessions([session_id])
+        if session_id not in capacities:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Session with ID {session_id} not found"
+            )
+        free = capacities[session_id] - self._admitted_counts([session_id]).get(session_id, 0)
+        if free <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Session {session_id} is full ({capacities[session_id]} places)"
+            )
+        promoted = self._promote(session_id, min(count, free))
+        self.db.flush()
+        return promoted
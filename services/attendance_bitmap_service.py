@@ -0,0 +1,260 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from models.attendance import Attendance
+from models.attendance_bitmap import AttendanceBitmap
+from models.session import Session as SessionModel
+from utils.recurrence import parse_recurrence
+from datetime import date, timedelta
+from math import gcd
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sessions meet weekly, so bitmaps start out with one bit per week
+OCCURRENCE_INTERVAL_DAYS = 7
+
+# Every recorded attendance in either layout as (session_id, waitlist_id, attendance_date, is_present)
+ATTENDANCE_RECORDS_SQL = """
+    SELECT session_id, waitlist_id, attendance_date, is_present FROM attendance
+    UNION ALL
+    SELECT b.session_id, b.waitlist_id, b.first_date + b.interval_days * i, get_bit(b.present_bits, i) = 1
+    FROM attendance_bitmaps b, generate_series(0, length(b.known_bits) * 8 - 1) AS i
+    WHERE get_bit(b.known_bits, i) = 1
+"""
+
+
+class StoredAttendance(NamedTuple):
+    waitlist_id: int
+    attendance_date: date
+    is_present: bool
+
+
+def _spread(bits: int, factor: int) -> int:
+    """Move bit i to bit i * factor"""
+    spread = 0
+    while bits:
+        lowest = bits & -bits
+        spread |= 1 << ((lowest.bit_length() - 1) * factor)
+        bits ^= lowest
+    return spread
+
+
+class OccurrenceBitmap:
+    """Present/known bits of one student, held as Python ints while being edited.
+
+    Bit i is the date `interval_days * i` days after first_date. A date off that
+    grid (the session moved to another weekday) narrows the interval to one
+    that holds both, so earlier records keep their dates."""
+
+    def __init__(self, first_date: date, present_bits: bytes = b"", known_bits: bytes = b"",
+                 interval_days: int = OCCURRENCE_INTERVAL_DAYS):
+        self.first_date = first_date
+        self.interval_days = interval_days
+        self.present = int.from_bytes(present_bits, "little")
+        self.known = int.from_bytes(known_bits, "little")
+
+    def _index(self, attendance_date: date) -> int:
+        offset = (attendance_date - self.first_date).days
+        if offset % self.interval_days:
+            interval_days = gcd(self.interval_days, offset)
+            factor = self.interval_days // interval_days
+            self.present = _spread(self.present, factor)
+            self.known = _spread(self.known, factor)
+            self.interval_days = interval_days
+        index = offset // self.interval_days
+        if index < 0:
+            # Earlier than any stored date: move bit 0 back to this date
+            self.present <<= -index
+            self.known <<= -index
+            self.first_date = attendance_date
+            index = 0
+        return index
+
+    def get(self, attendance_date: date) -> Optional[bool]:
+        index, remainder = divmod((attendance_date - self.first_date).days, self.interval_days)
+        if remainder or index < 0 or not (self.known >> index) & 1:
+            return None
+        return bool((self.present >> index) & 1)
+
+    def set(self, attendance_date: date, is_present: bool) -> None:
+        bit = 1 << self._index(attendance_date)
+        self.known |= bit
+        if is_present:
+            self.present |= bit
+        else:
+            self.present &= ~bit
+
+    def clear(self, attendance_date: date) -> None:
+        bit = 1 << self._index(attendance_date)
+        self.known &= ~bit
+        self.present &= ~bit
+
+    def records(self) -> Iterator[Tuple[date, bool]]:
+        known = self.known
+        while known:
+            lowest = known & -known
+            index = lowest.bit_length() - 1
+            yield self.first_date + timedelta(days=self.interval_days * index), bool(self.present & lowest)
+            known ^= lowest
+
+    def to_bytes(self) -> Tuple[bytes, bytes]:
+        length = (self.known.bit_length() + 7) // 8
+        return self.present.to_bytes(length, "little"), self.known.to_bytes(length, "little")
+
+
+def _decode(rows, waitlist_id: Optional[int] = None, dates: Optional[Set[date]] = None) -> List[StoredAttendance]:
+    records = []
+    for row in rows:
+        if waitlist_id is not None and row.waitlist_id != waitlist_id:
+            continue
+        bitmap = OccurrenceBitmap(row.first_date, row.present_bits, row.known_bits, row.interval_days)
+        records.extend(
+            StoredAttendance(row.waitlist_id, attendance_date, is_present)
+            for attendance_date, is_present in bitmap.records()
+            if dates is None or attendance_date in dates
+        )
+    return records
+
+
+class AttendanceBitmapService:
+    """Reads and writes attendance in the attendance_bitmaps layout.
+
+    Records come back as StoredAttendance tuples, the same shape the row layout
+    queries return, so AttendanceService can use either store.
+    """
+
+    @staticmethod
+    def _bitmaps_query(session_id: int):
+        return select(
+            AttendanceBitmap.waitlist_id,
+            AttendanceBitmap.first_date,
+            AttendanceBitmap.interval_days,
+            AttendanceBitmap.present_bits,
+            AttendanceBitmap.known_bits
+        ).where(AttendanceBitmap.session_id == session_id)
+
+    @staticmethod
+    def load_records(db: Session, session_id: int, waitlist_id: Optional[int] = None,
+                     dates: Optional[Set[date]] = None) -> List[StoredAttendance]:
+        rows = db.execute(AttendanceBitmapService._bitmaps_query(session_id)).all()
+        return _decode(rows, waitlist_id, dates)
+
+    @staticmethod
+    async def load_records_async(db: AsyncSession, session_id: int, waitlist_id: Optional[int] = None,
+                                 dates: Optional[Set[date]] = None) -> List[StoredAttendance]:
+        rows = (await db.execute(AttendanceBitmapService._bitmaps_query(session_id))).all()
+        return _decode(rows, waitlist_id, dates)
+
+    @staticmethod
+    def save(db: Session, session_id: int, dates: Set[date],
+             records: Dict[Tuple[int, date], bool]) -> Tuple[List[StoredAttendance], List[StoredAttendance], List[StoredAttendance]]:
+        """Apply `records` and clear any other record on `dates` (does not commit).
+        Returns the (inserted, updated, deleted) records, matching what the row
+        layout reports from its upsert and delete."""
+        # Saves for one session are serialised on the session row, so two first
+        # saves cannot both create the same student's bitmap
+        rrule = db.execute(
+            select(SessionModel.rrule).where(SessionModel.id == session_id).with_for_update(key_share=True)
+        ).scalar()
+        if rrule is None:
+            raise ValueError(f"Session {session_id} not found")
+
+        stored = {
+            bitmap.waitlist_id: bitmap
+            for bitmap in db.execute(
+                select(AttendanceBitmap).where(AttendanceBitmap.session_id == session_id)
+            ).scalars()
+        }
+        bitmaps = {
+            waitlist_id: OccurrenceBitmap(row.first_date, row.present_bits, row.known_bits, row.interval_days)
+            for waitlist_id, row in stored.items()
+        }
+
+        inserted, updated, deleted = [], [], []
+        first_occurrence = None
+        for (waitlist_id, attendance_date), is_present in records.items():
+            bitmap = bitmaps.get(waitlist_id)
+            if bitmap is None:
+                if first_occurrence is None:
+                    first = parse_recurrence(rrule).first_occurrence
+                    first_occurrence = first.date() if first else attendance_date
+                bitmap = bitmaps[waitlist_id] = OccurrenceBitmap(first_occurrence)
+
+            previous = bitmap.get(attendance_date)
+            record = StoredAttendance(waitlist_id, attendance_date, is_present)
+            if previous is None:
+                inserted.append(record)
+            elif previous != is_present:
+                updated.append(record)
+            else:
+                continue
+            bitmap.set(attendance_date, is_present)
+
+        for waitlist_id, bitmap in bitmaps.items():
+            for attendance_date in dates:
+                if (waitlist_id, attendance_date) in records:
+                    continue
+                previous = bitmap.get(attendance_date)
+                if previous is not None:
+                    deleted.append(StoredAttendance(waitlist_id, attendance_date, previous))
+                    bitmap.clear(attendance_date)
+
+        touched = {record.waitlist_id for record in inserted + updated + deleted}
+        for waitlist_id in sorted(touched):
+            bitmap = bitmaps[waitlist_id]
+            present_bits, known_bits = bitmap.to_bytes()
+            row = stored.get(waitlist_id)
+            if row is None:
+                db.add(AttendanceBitmap(
+                    session_id=session_id,
+                    waitlist_id=waitlist_id,
+                    first_date=bitmap.first_date,
+                    interval_days=bitmap.interval_days,
+                    present_bits=present_bits,
+                    known_bits=known_bits
+                ))
+            else:
+                row.first_date = bitmap.first_date
+                row.interval_days = bitmap.interval_days
+                row.present_bits = present_bits
+                row.known_bits = known_bits
+        db.flush()
+        return inserted, updated, deleted
+
+    @staticmethod
+    def convert_session_to_bitmaps(db: Session, session_id: int) -> int:
+        """Move a session's attendance rows into bitmaps (does not commit).
+        Returns the number of records moved."""
+        rows = db.execute(
+            select(Attendance.waitlist_id, Attendance.attendance_date, Attendance.is_present)
+            .where(Attendance.session_id == session_id)
+            .with_for_update()
+        ).all()
+        if not rows:
+            return 0
+        records = {(r.waitlist_id, r.attendance_date): r.is_present for r in rows}
+        AttendanceBitmapService.save(db, session_id, set(), records)
+        db.query(Attendance).filter(Attendance.session_id == session_id).delete(synchronize_session=False)
+        return len(records)
+
+    @staticmethod
+    def convert_session_to_rows(db: Session, session_id: int) -> int:
+        """Move a session's bitmaps back into attendance rows (does not commit)"""
+        bitmap_rows = db.execute(
+            AttendanceBitmapService._bitmaps_query(session_id).with_for_update()
+        ).all()
+        records = _decode(bitmap_rows)
+        if records:
+            db.bulk_insert_mappings(Attendance, [
+                {
+                    'session_id': session_id,
+                    'waitlist_id': record.waitlist_id,
+                    'attendance_date': record.attendance_date,
+                    'is_present': record.is_present
+                }
+                for record in records
+            ])
+        db.query(AttendanceBitmap).filter(AttendanceBitmap.session_id == session_id).delete(synchronize_session=False)
+        return len(records)
@@ -1,47 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import ARRAY, Boolean, Date, Integer, and_, bindparam, delete, exists, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from models.attendance import Attendance
-from models.waitlist import Waitlist
-from schemas.attendance_schema import AttendanceCreate, AttendanceUpdate, StudentAttendanceStatus
+from models.student import Student
+from models.waitlist import Waitlist, WaitlistStatus
+from models.session import Session as SessionModel
+from schemas.attendance_schema import AttendanceCreate, AttendanceUpdate, StudentAttendanceStatus, AttendanceMatrix, \
+    MatrixStudent
+from config import settings
+from services.attendance_bitmap_service import AttendanceBitmapService
+from services.attendance_stats_service import AttendanceStatsService, changes_from_upsert, changes_from_delete, \
+    changes_from_records
+from services.occurrence_service import OccurrenceService
+from utils.recurrence import occurrence_dates
 from datetime import date
-from typing import List, Dict
+from typing import List, Dict, Optional, Set, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def _uses_bitmaps() -> bool:
+    """Whether attendance lives in attendance_bitmaps instead of one row per date"""
+    return settings.attendance_storage_mode == "bitmap"
+
+
 class AttendanceService:
     @staticmethod
     def get_session_attendance(db: Session, session_id: int) -> List[Attendance]:
         """Get all attendance records for a session"""
+        if _uses_bitmaps():
+            # Unsaved Attendance objects without an id - bitmap records have no row of their own
+            return [
+                Attendance(session_id=session_id, **record._asdict())
+                for record in AttendanceBitmapService.load_records(db, session_id)
+            ]
         return db.query(Attendance).filter(Attendance.session_id == session_id).all()
 
     @staticmethod
-    def get_attendance_for_date(db: Session, session_id: int, attendance_date: date) -> List[StudentAttendanceStatus]:
-        """Get attendance status for all admitted students on a specific date.
-        Returns all students with is_present flag from database records."""
-        
-        from datetime import date as date_type
-        today = date_type.today()
-        
-        # Get all admitted students for this session
-        admitted_students = db.query(Waitlist).filter(
-            and_(
+    def _admitted_students_query(session_id: int):
+        """Admitted waitlist entries of a session with the student's name and email"""
+        return (
+            select(
+                Waitlist.id,
+                Waitlist.created_at,
+                Student.first_name,
+                Student.family_name,
+                Student.email
+            )
+            .join(Student, Waitlist.student_id == Student.id)
+            .where(
                 Waitlist.session_id == session_id,
-                Waitlist.status == 'admitted'
+                Waitlist.status == WaitlistStatus.ADMITTED
             )
-        ).all()
-        
-        # Get attendance records for this date
-        attendance_records = db.query(Attendance).filter(
+            .order_by(Waitlist.created_at.asc())
+        )
+
+    @staticmethod
+    def _attendance_on_date_query(session_id: int, attendance_date: date):
+        return select(Attendance.waitlist_id, Attendance.is_present).where(
             and_(
                 Attendance.session_id == session_id,
                 Attendance.attendance_date == attendance_date
             )
-        ).all()
-        
+        )
+
+    @staticmethod
+    def _build_attendance_statuses(admitted_students, attendance_records, attendance_date: date) -> List[StudentAttendanceStatus]:
+        """Apply the "default present" rule to students without a stored record"""
+        today = date.today()
+
         # Create a map of waitlist_id to is_present status
         attendance_map = {record.waitlist_id: record.is_present for record in attendance_records}
-        
+
         # Build response with derived attendance status
         result = []
         for student in admitted_students:
@@ -54,83 +86,246 @@ class AttendanceService:
                 was_admitted = admission_date <= attendance_date
                 has_occurred = attendance_date <= today
                 is_present = was_admitted and has_occurred
-            
+
             result.append(StudentAttendanceStatus(
                 waitlist_id=student.id,
-                student_name=student.student_name,
-                student_email=student.student_email,
+                student_name=f"{student.first_name} {student.family_name}",
+                student_email=student.email,
                 is_present=is_present
             ))
-        
+
         return result
 
+    @staticmethod
+    def get_attendance_for_date(db: Session, session_id: int, attendance_date: date) -> List[StudentAttendanceStatus]:
+        """Get attendance status for all admitted students on a specific date.
+        Returns all students with is_present flag from database records."""
+        admitted_students = db.execute(AttendanceService._admitted_students_query(session_id)).all()
+        if _uses_bitmaps():
+            attendance_records = AttendanceBitmapService.load_records(db, session_id, dates={attendance_date})
+        else:
+            attendance_records = db.execute(
+                AttendanceService._attendance_on_date_query(session_id, attendance_date)
+            ).all()
+        return AttendanceService._build_attendance_statuses(admitted_students, attendance_records, attendance_date)
+
+    @staticmethod
+    async def get_attendance_for_date_async(db: AsyncSession, session_id: int, attendance_date: date) -> List[StudentAttendanceStatus]:
+        """Async version of get_attendance_for_date for use with get_async_db"""
+        admitted_students = (await db.execute(AttendanceService._admitted_students_query(session_id))).all()
+        if _uses_bitmaps():
+            attendance_records = await AttendanceBitmapService.load_records_async(db, session_id, dates={attendance_date})
+        else:
+            attendance_records = (await db.execute(
+                AttendanceService._attendance_on_date_query(session_id, attendance_date)
+            )).all()
+        return AttendanceService._build_attendance_statuses(admitted_students, attendance_records, attendance_date)
+
+    @staticmethod
+    def _build_attendance_matrix(session: SessionModel, admitted_students, attendance_records,
+                                 default_present: bool) -> AttendanceMatrix:
+        """Lay out attendance as one status string per student over the session's dates.
+        With default_present, cells without a record follow the same rule as
+        get_attendance_for_date (present once admitted and the date has passed)."""
+        today = date.today()
+        recorded = {(r.waitlist_id, r.attendance_date): r.is_present for r in attendance_records}
+
+        # Occurrences from the schedule, plus any date that has records but is no longer on it
+        dates = sorted(set(occurrence_dates(session.rrule)) | {d for _, d in recorded})
+
+        students = []
+        grid = []
+        for student in admitted_students:
+            admission_date = student.created_at.date() if student.created_at else None
+            row = []
+            for attendance_date in dates:
+                is_present = recorded.get((student.id, attendance_date))
+                if is_present is None:
+                    applies = default_present and attendance_date <= today and (
+                        admission_date is None or admission_date <= attendance_date
+                    )
+                    row.append("P" if applies else "U")
+                else:
+                    row.append("P" if is_present else "A")
+
+            students.append(MatrixStudent(
+                waitlist_id=student.id,
+                student_name=f"{student.first_name} {student.family_name}",
+                student_email=student.email
+            ))
+            grid.append("".join(row))
+
+        return AttendanceMatrix(session_id=session.id, dates=dates, students=students, grid=grid)
+
+    @staticmethod
+    async def get_attendance_matrix_async(db: AsyncSession, session_id: int,
+                                          default_present: bool = True) -> Optional[AttendanceMatrix]:
+        """Attendance of every admitted student on every session date, in one query each
+        for the session, the students and the attendance records"""
+        session = await db.get(SessionModel, session_id)
+        if session is None:
+            return None
+        admitted_students = (await db.execute(AttendanceService._admitted_students_query(session_id))).all()
+        if _uses_bitmaps():
+            attendance_records = await AttendanceBitmapService.load_records_async(db, session_id)
+        else:
+            attendance_records = (await db.execute(
+                select(Attendance.waitlist_id, Attendance.attendance_date, Attendance.is_present)
+                .where(Attendance.session_id == session_id)
+            )).all()
+        return AttendanceService._build_attendance_matrix(session, admitted_students, attendance_records, default_present)
+
     @staticmethod
     def get_student_attendance(db: Session, session_id: int, waitlist_id: int) -> List[Attendance]:
         """Get absence records for a specific student in a session"""
+        if _uses_bitmaps():
+            return [
+                Attendance(session_id=session_id, **record._asdict())
+                for record in AttendanceBitmapService.load_records(db, session_id, waitlist_id=waitlist_id)
+            ]
         return db.query(Attendance).filter(
             Attendance.session_id == session_id,
             Attendance.waitlist_id == waitlist_id
         ).all()
 
+    @staticmethod
+    def _records_table(records: Dict[Tuple[int, date], bool]):
+        """Submitted records as a table of unnested arrays, so the statement text does not
+        grow with the number of records and stays in the compiled statement cache"""
+        return func.unnest(
+            bindparam('waitlist_ids', [waitlist_id for waitlist_id, _ in records], type_=ARRAY(Integer)),
+            bindparam('attendance_dates', [attendance_date for _, attendance_date in records], type_=ARRAY(Date)),
+            bindparam('is_present_values', list(records.values()), type_=ARRAY(Boolean))
+        ).table_valued('waitlist_id', 'attendance_date', 'is_present').render_derived(name='submitted')
+
+    @staticmethod
+    def _upsert_attendance(db: Session, session_id: int, records: Dict[Tuple[int, date], bool]) -> List:
+        """Insert or update attendance keyed on uix_attendance in one statement.
+        Rows whose is_present already matches are left untouched (no new row version),
+        so only inserted or changed rows come back as (waitlist_id, attendance_date,
+        is_present, inserted)."""
+        if not records:
+            return []
+        submitted = AttendanceService._records_table(records)
+        stmt = insert(Attendance).from_select(
+            ['session_id', 'waitlist_id', 'attendance_date', 'is_present'],
+            select(
+                literal(session_id, Integer),
+                submitted.c.waitlist_id,
+                submitted.c.attendance_date,
+                submitted.c.is_present
+            )
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint='uix_attendance',
+            set_={'is_present': stmt.excluded.is_present, 'updated_at': func.now()},
+            where=Attendance.is_present.is_distinct_from(stmt.excluded.is_present)
+        ).returning(
+            Attendance.waitlist_id,
+            Attendance.attendance_date,
+            Attendance.is_present,
+            literal_column('(xmax = 0)').label('inserted')
+        )
+        return db.execute(stmt).all()
+
+    @staticmethod
+    def _delete_missing_attendance(db: Session, session_id: int, dates: Set[date],
+                                   records: Dict[Tuple[int, date], bool]) -> List:
+        """Remove stored records on `dates` that are not in `records` - a save replaces the whole day.
+        Returns the removed (waitlist_id, attendance_date, is_present) rows."""
+        if not dates:
+            return []
+        stmt = delete(Attendance).where(
+            Attendance.session_id == session_id,
+            Attendance.attendance_date.in_(dates)
+        )
+        if records:
+            submitted = AttendanceService._records_table(records)
+            stmt = stmt.where(~exists().where(
+                submitted.c.waitlist_id == Attendance.waitlist_id,
+                submitted.c.attendance_date == Attendance.attendance_date
+            ))
+        stmt = stmt.returning(Attendance.waitlist_id, Attendance.attendance_date, Attendance.is_present)
+        return db.execute(stmt).all()
+
+    @staticmethod
+    def _save_attendance(db: Session, session_id: int, dates: Set[date], records: Dict[Tuple[int, date], bool]) -> Dict:
+        # Records may only be written for scheduled classes; clearing a date is always allowed
+        OccurrenceService.validate_dates(db, session_id, {attendance_date for _, attendance_date in records})
+        if _uses_bitmaps():
+            inserted, updated, deleted = AttendanceBitmapService.save(db, session_id, dates, records)
+            AttendanceStatsService.apply_changes(db, session_id, changes_from_records(inserted, updated, deleted))
+            return {
+                "inserted": len(inserted),
+                "updated": len(updated),
+                "unchanged": len(records) - len(inserted) - len(updated),
+                "deleted": len(deleted)
+            }
+
+        changed = AttendanceService._upsert_attendance(db, session_id, records)
+        deleted = AttendanceService._delete_missing_attendance(db, session_id, dates, records)
+        AttendanceStatsService.apply_changes(
+            db, session_id, changes_from_upsert(changed) + changes_from_delete(deleted)
+        )
+
+        inserted = sum(1 for row in changed if row.inserted)
+        return {
+            "inserted": inserted,
+            "updated": len(changed) - inserted,
+            "unchanged": len(records) - len(changed),
+            "deleted": len(deleted)
+        }
+
     @staticmethod
     def mark_attendance(db: Session, attendance_data: AttendanceCreate) -> Attendance:
-        """Mark a student as absent on a specific date"""
-        # Check if absence record already exists
-        existing = db.query(Attendance).filter(
+        """Mark a student present or absent on a specific date, updating any existing record"""
+        key = (attendance_data.waitlist_id, attendance_data.attendance_date)
+        if _uses_bitmaps():
+            AttendanceService._save_attendance(db, attendance_data.session_id, set(), {key: attendance_data.is_present})
+            db.commit()
+            return Attendance(**attendance_data.model_dump())
+
+        OccurrenceService.validate_dates(db, attendance_data.session_id, {attendance_data.attendance_date})
+
+        changed = AttendanceService._upsert_attendance(db, attendance_data.session_id, {key: attendance_data.is_present})
+        AttendanceStatsService.apply_changes(db, attendance_data.session_id, changes_from_upsert(changed))
+        db.commit()
+        return db.query(Attendance).filter(
             Attendance.session_id == attendance_data.session_id,
             Attendance.waitlist_id == attendance_data.waitlist_id,
             Attendance.attendance_date == attendance_data.attendance_date
-        ).first()
-
-        if existing:
-            # Already marked as absent
-            return existing
-        else:
-            new_attendance = Attendance(**attendance_data.model_dump())
-            db.add(new_attendance)
-            db.commit()
-            db.refresh(new_attendance)
-            return new_attendance
+        ).one()
 
     @staticmethod
     def bulk_update_attendance(db: Session, session_id: int, attendance_date_str: str, attendance_records: List[dict]) -> Dict:
-        """Bulk update attendance - saves all student records (present and absent) efficiently.
-        Uses upsert pattern: delete existing records for the date, then bulk insert new ones."""
+        """Bulk update attendance - saves all student records (present and absent) for one date.
+        Upserts the submitted records and removes records for students no longer in the list."""
         try:
             # Parse date
             attendance_date = date.fromisoformat(attendance_date_str)
             
             logger.info(f"Bulk update - Session: {session_id}, Date: {attendance_date}, Records: {len(attendance_records)}")
-            
-            # Delete existing attendance records for this date
-            db.query(Attendance).filter(
-                and_(
-                    Attendance.session_id == session_id,
-                    Attendance.attendance_date == attendance_date
-                )
-            ).delete(synchronize_session=False)
-            
-            # Bulk insert all new attendance records
-            if attendance_records:
-                attendance_objects = [
-                    Attendance(
-                        session_id=session_id,
-                        waitlist_id=record['waitlist_id'],
-                        attendance_date=attendance_date,
-                        is_present=record['is_present']
-                    )
-                    for record in attendance_records
-                ]
-                db.bulk_save_objects(attendance_objects)
-            
+
+            # Last record wins if a student is sent twice
+            records = {
+                (record['waitlist_id'], attendance_date): record['is_present']
+                for record in attendance_records
+            }
+            counts = AttendanceService._save_attendance(db, session_id, {attendance_date}, records)
+
             db.commit()
-            logger.info(f"Successfully saved {len(attendance_records)} attendance records")
+            logger.info(f"Successfully saved {len(records)} attendance records: {counts}")
             
             return {
                 "success": True,
-                "record_count": len(attendance_records),
-                "date": attendance_date_str
+                "record_count": len(records),
+                "date": attendance_date_str,
+                **counts
             }
+        except ValueError:
+            # Invalid input (e.g. a date that is not a class) - the caller reports it as a 400
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             logger.error(f"Error in bulk update: {str(e)}", exc_info=True)
@@ -139,54 +334,36 @@ class AttendanceService:
     @staticmethod
     def bulk_save_all_attendance(db: Session, session_id: int, all_records: List[dict]) -> Dict:
         """OPTIMIZED: Bulk save ALL attendance records for all dates in ONE transaction.
-        Much faster than saving date-by-date. Uses efficient delete + bulk insert."""
+        Only records whose value changed are written; unchanged rows are not touched."""
         try:
             logger.info(f"Bulk save all - Session: {session_id}, Total records: {len(all_records)}")
-            
-            # Group records by date for deletion
-            dates_to_clear = set()
-            records_by_date = {}
-            
+
+            # Last record wins if a student/date pair is sent twice
+            records = {}
             for record in all_records:
                 attendance_date = date.fromisoformat(record['attendance_date'])
-                dates_to_clear.add(attendance_date)
-                
-                if attendance_date not in records_by_date:
-                    records_by_date[attendance_date] = []
-                records_by_date[attendance_date].append(record)
-            
-            # Delete all existing records for these dates in one query
-            if dates_to_clear:
-                db.query(Attendance).filter(
-                    and_(
-                        Attendance.session_id == session_id,
-                        Attendance.attendance_date.in_(dates_to_clear)
-                    )
-                ).delete(synchronize_session=False)
-            
-            # Bulk insert all records at once using executemany (fastest method)
-            if all_records:
-                from sqlalchemy import insert
-                stmt = insert(Attendance).values([
-                    {
-                        'session_id': session_id,
-                        'waitlist_id': record['waitlist_id'],
-                        'attendance_date': date.fromisoformat(record['attendance_date']),
-                        'is_present': record['is_present']
-                    }
-                    for record in all_records
-                ])
-                db.execute(stmt)
-            
+                records[(record['waitlist_id'], attendance_date)] = record['is_present']
+            dates = {attendance_date for _, attendance_date in records}
+
+            counts = AttendanceService._save_attendance(db, session_id, dates, records)
+
             db.commit()
-            logger.info(f"Successfully saved {len(all_records)} attendance records across {len(dates_to_clear)} dates")
+            logger.info(f"Successfully saved {len(records)} attendance records across {len(dates)} dates: {counts}")
             
             return {
                 "success": True,
-                "total_records": len(all_records),
-                "dates_updated": len(dates_to_clear),
-                "message": f"Saved {len(all_records)} records across {len(dates_to_clear)} dates"
+                "total_records": len(records),
+                "dates_updated": len(dates),
+                "message": (
+                    f"Saved {len(records)} records across {len(dates)} dates "
+                    f"({counts['inserted']} new, {counts['updated']} changed, {counts['unchanged']} unchanged)"
+                ),
+                **counts
             }
+        except ValueError:
+            # Invalid input (e.g. a date that is not a class) - the caller reports it as a 400
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             logger.error(f"Error in bulk save all: {str(e)}", exc_info=True)
@@ -195,9 +372,13 @@ class AttendanceService:
     @staticmethod
     def delete_attendance(db: Session, attendance_id: int) -> bool:
         """Delete an attendance record"""
+        if _uses_bitmaps():
+            # Bitmap records have no id; clear them by saving the day without the student
+            return False
         attendance = db.query(Attendance).filter(Attendance.id == attendance_id).first()
         if attendance:
             db.delete(attendance)
+            AttendanceStatsService.apply_changes(db, attendance.session_id, changes_from_delete([attendance]))
             db.commit()
             return True
         return False
@@ -0,0 +1,236 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import ARRAY, Date, Integer, bindparam, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from models.attendance_stats import AttendanceStudentStats, AttendanceDateStats
+from models.student import Student
+from models.waitlist import Waitlist
+from services.attendance_bitmap_service import ATTENDANCE_RECORDS_SQL
+from schemas.attendance_schema import StudentAttendanceStats, DateAttendanceStats, SessionAttendanceStats
+from datetime import date
+from typing import Iterable, List, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (waitlist_id, attendance_date, present_delta, absent_delta)
+AttendanceChange = Tuple[int, date, int, int]
+
+# Rollup model -> the attendance column it groups by (besides session_id)
+_ROLLUP_KEYS = {
+    AttendanceStudentStats: "waitlist_id",
+    AttendanceDateStats: "attendance_date",
+}
+
+
+def _rate(present_count: int, absent_count: int) -> Optional[float]:
+    recorded = present_count + absent_count
+    return round(present_count / recorded, 4) if recorded else None
+
+
+def changes_from_upsert(rows) -> List[AttendanceChange]:
+    """Deltas for rows returned by AttendanceService._upsert_attendance.
+    An updated row flipped is_present, so one count goes up and the other down."""
+    changes = []
+    for row in rows:
+        if row.inserted:
+            changes.append((row.waitlist_id, row.attendance_date, int(row.is_present), int(not row.is_present)))
+        else:
+            step = 1 if row.is_present else -1
+            changes.append((row.waitlist_id, row.attendance_date, step, -step))
+    return changes
+
+
+def changes_from_delete(rows) -> List[AttendanceChange]:
+    """Deltas for deleted (waitlist_id, attendance_date, is_present) rows"""
+    return [
+        (row.waitlist_id, row.attendance_date, -int(row.is_present), -int(not row.is_present))
+        for row in rows
+    ]
+
+
+def changes_from_records(inserted, updated, deleted) -> List[AttendanceChange]:
+    """Deltas for records saved in the bitmap layout, which reports each kind separately"""
+    changes = [
+        (record.waitlist_id, record.attendance_date, int(record.is_present), int(not record.is_present))
+        for record in inserted
+    ]
+    for record in updated:
+        step = 1 if record.is_present else -1
+        changes.append((record.waitlist_id, record.attendance_date, step, -step))
+    return changes + changes_from_delete(deleted)
+
+
+class AttendanceStatsService:
+    """Present/absent counts per student and per date of a session.
+
+    The rollup tables are updated in the same transaction as the attendance
+    rows they summarise, so reads never have to scan attendance. Only
+    recorded attendance is counted - the "default present" rule is not applied.
+    Rows removed by cascades (e.g. a deleted student) are not tracked; the
+    consistency check reports them and recompute repairs them.
+    """
+
+    @staticmethod
+    def apply_changes(db: Session, session_id: int, changes: Iterable[AttendanceChange]) -> None:
+        """Add attendance deltas to both rollups (does not commit)"""
+        by_student: Dict[int, List[int]] = {}
+        by_date: Dict[date, List[int]] = {}
+        for waitlist_id, attendance_date, present_delta, absent_delta in changes:
+            for totals, key in ((by_student, waitlist_id), (by_date, attendance_date)):
+                counts = totals.setdefault(key, [0, 0])
+                counts[0] += present_delta
+                counts[1] += absent_delta
+
+        AttendanceStatsService._add_counts(db, AttendanceStudentStats, session_id, by_student, Integer)
+        AttendanceStatsService._add_counts(db, AttendanceDateStats, session_id, by_date, Date)
+
+    @staticmethod
+    def _add_counts(db: Session, model, session_id: int, totals: Dict, key_type) -> None:
+        # Sorted so concurrent saves lock rollup rows in the same order
+        totals = {key: counts for key, counts in sorted(totals.items()) if counts != [0, 0]}
+        if not totals:
+            return
+        key_column = _ROLLUP_KEYS[model]
+        deltas = func.unnest(
+            bindparam('keys', list(totals), type_=ARRAY(key_type)),
+            bindparam('present_deltas', [counts[0] for counts in totals.values()], type_=ARRAY(Integer)),
+            bindparam('absent_deltas', [counts[1] for counts in totals.values()], type_=ARRAY(Integer))
+        ).table_valued('key', 'present_delta', 'absent_delta').render_derived(name='deltas')
+
+        stmt = insert(model).from_select(
+            ['session_id', key_column, 'present_count', 'absent_count'],
+            select(literal(session_id, Integer), deltas.c.key, deltas.c.present_delta, deltas.c.absent_delta)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id', key_column],
+            set_={
+                'present_count': model.present_count + stmt.excluded.present_count,
+                'absent_count': model.absent_count + stmt.excluded.absent_count,
+                'updated_at': func.now()
+            }
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def recompute(db: Session, session_id: Optional[int] = None) -> Dict[str, int]:
+        """Rebuild both rollups from the stored attendance (all sessions by default)"""
+        params = {"session_id": session_id}
+        row_counts = {}
+        for model, key_column in _ROLLUP_KEYS.items():
+            table = model.__tablename__
+            db.execute(text(
+                f"DELETE FROM {table} WHERE CAST(:session_id AS integer) IS NULL OR session_id = :session_id"
+            ), params)
+            row_counts[table] = db.execute(text(
+                f"INSERT INTO {table} (session_id, {key_column}, present_count, absent_count) "
+                f"SELECT session_id, {key_column}, count(*) FILTER (WHERE is_present), count(*) FILTER (WHERE NOT is_present) "
+                f"FROM ({ATTENDANCE_RECORDS_SQL}) AS attendance "
+                f"WHERE CAST(:session_id AS integer) IS NULL OR session_id = :session_id "
+                f"GROUP BY session_id, {key_column}"
+            ), params).rowcount
+        db.commit()
+        logger.info(f"Recomputed attendance stats for {'session ' + str(session_id) if session_id else 'all sessions'}: {row_counts}")
+        return row_counts
+
+    @staticmethod
+    def check(db: Session, session_id: Optional[int] = None) -> List[Dict]:
+        """Compare the rollups with counts from the stored attendance and return every difference"""
+        mismatches = []
+        for model, key_column in _ROLLUP_KEYS.items():
+            rows = db.execute(text(f"""
+                WITH expected AS (
+                    SELECT session_id, {key_column} AS key,
+                           count(*) FILTER (WHERE is_present) AS present_count,
+                           count(*) FILTER (WHERE NOT is_present) AS absent_count
+                    FROM ({ATTENDANCE_RECORDS_SQL}) AS attendance
+                    WHERE CAST(:session_id AS integer) IS NULL OR session_id = :session_id
+                    GROUP BY session_id, {key_column}
+                ), stored AS (
+                    SELECT session_id, {key_column} AS key, present_count, absent_count
+                    FROM {model.__tablename__}
+                    WHERE (CAST(:session_id AS integer) IS NULL OR session_id = :session_id)
+                      AND (present_count <> 0 OR absent_count <> 0)
+                )
+                SELECT coalesce(e.session_id, s.session_id) AS session_id, coalesce(e.key, s.key) AS key,
+                       coalesce(e.present_count, 0) AS expected_present, coalesce(e.absent_count, 0) AS expected_absent,
+                       coalesce(s.present_count, 0) AS stored_present, coalesce(s.absent_count, 0) AS stored_absent
+                FROM expected e
+                FULL JOIN stored s ON s.session_id = e.session_id AND s.key = e.key
+                WHERE coalesce(e.present_count, 0) <> coalesce(s.present_count, 0)
+                   OR coalesce(e.absent_count, 0) <> coalesce(s.absent_count, 0)
+                ORDER BY 1, 2
+            """), {"session_id": session_id}).all()
+            mismatches.extend(
+                {
+                    "table": model.__tablename__,
+                    "session_id": r.session_id,
+                    key_column: r.key,
+                    "expected": {"present": r.expected_present, "absent": r.expected_absent},
+                    "stored": {"present": r.stored_present, "absent": r.stored_absent},
+                }
+                for r in rows
+            )
+        return mismatches
+
+    @staticmethod
+    async def get_session_stats_async(db: AsyncSession, session_id: int) -> SessionAttendanceStats:
+        """Session totals and per-date counts, read from the date rollup only"""
+        rows = (await db.execute(
+            select(AttendanceDateStats.attendance_date, AttendanceDateStats.present_count, AttendanceDateStats.absent_count)
+            .where(AttendanceDateStats.session_id == session_id)
+            .order_by(AttendanceDateStats.attendance_date)
+        )).all()
+
+        dates = [
+            DateAttendanceStats(
+                attendance_date=r.attendance_date,
+                present_count=r.present_count,
+                absent_count=r.absent_count,
+                recorded_count=r.present_count + r.absent_count,
+                attendance_rate=_rate(r.present_count, r.absent_count)
+            )
+            for r in rows
+        ]
+        present_count = sum(d.present_count for d in dates)
+        absent_count = sum(d.absent_count for d in dates)
+        return SessionAttendanceStats(
+            session_id=session_id,
+            present_count=present_count,
+            absent_count=absent_count,
+            recorded_count=present_count + absent_count,
+            attendance_rate=_rate(present_count, absent_count),
+            dates=dates
+        )
+
+    @staticmethod
+    async def get_student_stats_async(db: AsyncSession, session_id: int) -> List[StudentAttendanceStats]:
+        """Per-student counts for a session, lowest attendance rate first"""
+        rows = (await db.execute(
+            select(
+                AttendanceStudentStats.waitlist_id,
+                AttendanceStudentStats.present_count,
+                AttendanceStudentStats.absent_count,
+                Student.first_name,
+                Student.family_name,
+                Student.email
+            )
+            .join(Waitlist, Waitlist.id == AttendanceStudentStats.waitlist_id)
+            .join(Student, Student.id == Waitlist.student_id)
+            .where(AttendanceStudentStats.session_id == session_id)
+        )).all()
+
+        stats = [
+            StudentAttendanceStats(
+                waitlist_id=r.waitlist_id,
+                student_name=f"{r.first_name} {r.family_name}",
+                student_email=r.email,
+                present_count=r.present_count,
+                absent_count=r.absent_count,
+                recorded_count=r.present_count + r.absent_count,
+                attendance_rate=_rate(r.present_count, r.absent_count)
+            )
+            for r in rows
+        ]
+        stats.sort(key=lambda s: (s.attendance_rate is None, s.attendance_rate or 0, s.student_name))
+        return stats
@@ -0,0 +1,102 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, cast, String, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from fastapi import HTTPException, status
+from typing import AsyncIterator
+import logging
+
+from models.session import Session as SessionModel
+from models.session_staff import SessionStaff
+from models.session_term import SessionTerm
+from models.term import Term
+from models.user import User
+from utils.http_cache import make_etag
+from utils.ical_utils import ICS_FORMAT_VERSION, CALENDAR_FOOTER, calendar_header, build_vevent
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while streaming a feed
+FEED_BATCH_SIZE = 200
+
+
+class CalendarFeed:
+    """A set of sessions published as one calendar"""
+
+    def __init__(self, key: str, name: str, condition):
+        self.key = key
+        self.name = name
+        self.condition = condition
+
+
+class CalendarFeedService:
+    """Aggregate ICS feeds (per term, city or staff member).
+
+    Feeds are streamed one VEVENT at a time from a server-side cursor, so
+    memory stays flat however many sessions a feed has. The ETag comes from
+    the feed's name (which carries the term or staff name) and an aggregate
+    over its session ids and modification times, so it changes when the term
+    or staff member is renamed or a session is added, removed or edited.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def term_feed(self, term_id: int) -> CalendarFeed:
+        term_name = await self.db.scalar(select(Term.name).where(Term.id == term_id))
+        if term_name is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Term not found")
+        in_term = select(SessionTerm.session_id).where(SessionTerm.term_id == term_id)
+        return CalendarFeed(f"term:{term_id}", f"{term_name} sessions", SessionModel.id.in_(in_term))
+
+    async def city_feed(self, city: str) -> CalendarFeed:
+        city = city.strip()
+        return CalendarFeed(f"city:{city.lower()}", f"{city} sessions", func.lower(SessionModel.city) == city.lower())
+
+    async def staff_feed(self, user_id: int) -> CalendarFeed:
+        username = await self.db.scalar(select(User.user_name).where(User.id == user_id))
+        if username is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff member not found")
+        assigned = select(SessionStaff.session_id).where(SessionStaff.staff_id == user_id)
+        return CalendarFeed(f"staff:{user_id}", f"{username} sessions", SessionModel.id.in_(assigned))
+
+    async def feed_etag(self, feed: CalendarFeed) -> str:
+        """ETag from one aggregate query - no session rows leave the database"""
+        version_key = (
+            cast(SessionModel.id, String) + literal(":")
+            + cast(func.coalesce(SessionModel.updated_at, SessionModel.created_at), String)
+        )
+        count, digest = (await self.db.execute(
+            select(
+                func.count(),
+                func.md5(func.string_agg(version_key, aggregate_order_by(literal(","), SessionModel.id)))
+            ).where(SessionModel.is_deleted == False, feed.condition)
+        )).one()
+        return make_etag(ICS_FORMAT_VERSION, feed.key, feed.name, count, digest or "")
+
+    async def stream_feed(self, feed: CalendarFeed) -> AsyncIterator[str]:
+        """Yield the calendar in pieces: the header, one VEVENT per session, the footer"""
+        stmt = (
+            select(
+                SessionModel.id,
+                SessionModel.title,
+                SessionModel.term,
+                SessionModel.location,
+                SessionModel.city,
+                SessionModel.rrule,
+                SessionModel.created_at,
+                SessionModel.updated_at
+            )
+            .where(SessionModel.is_deleted == False, feed.condition)
+            .order_by(SessionModel.start_date, SessionModel.id)
+            .execution_options(yield_per=FEED_BATCH_SIZE)
+        )
+
+        yield calendar_header(feed.name)
+        result = await self.db.stream(stmt)
+        async for session in result:
+            try:
+                yield build_vevent(session)
+            except ValueError as e:
+                # One bad rrule shouldn't take the whole feed down
+                logger.warning(f"Skipping session {session.id} in feed {feed.key}: {e}")
+        yield CALENDAR_FOOTER
@@ -0,0 +1,175 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Boolean, Date, Integer, select, text
+from fastapi import HTTPException, status
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Literal, Optional
+import csv
+import io
+import json
+import logging
+
+from models.session import Session as SessionModel
+from models.student import Student
+from models.waitlist import Waitlist, WaitlistStatus
+from services.attendance_bitmap_service import ATTENDANCE_RECORDS_SQL
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor, and written per chunk
+EXPORT_BATCH_SIZE = 1000
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Student columns, named as in the CSV import
+STUDENT_COLUMNS = (
+    Student.id.label("student_id"),
+    Student.email,
+    Student.first_name,
+    Student.family_name,
+    Student.school_year,
+    Student.school_year_other,
+    Student.experience,
+    Student.needs_device,
+    Student.medical_info,
+    Student.parent_name,
+    Student.parent_phone,
+)
+
+
+def _json_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value):
+    value = _json_value(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        # Same separator the CSV import splits experience on
+        return ";".join(value)
+    return value
+
+
+class ExportService:
+    """Streams students, waitlists and attendance as CSV or NDJSON.
+
+    Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time and
+    written out batch by batch, so memory use does not grow with the export.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _ensure_session_exists(self, session_id: int) -> None:
+        found = (await self.db.execute(select(SessionModel.id).where(SessionModel.id == session_id))).scalar()
+        if found is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Session with ID {session_id} not found"
+            )
+
+    @staticmethod
+    def students_query():
+        return select(
+            *STUDENT_COLUMNS,
+            Student.created_at
+        ).order_by(Student.id)
+
+    async def waitlist_query(self, session_id: Optional[int] = None, waitlist_status: Optional[WaitlistStatus] = None):
+        """Signups with their student, for one session or all of them"""
+        stmt = (
+            select(
+                Waitlist.id.label("waitlist_id"),
+                Waitlist.session_id,
+                SessionModel.title.label("session_title"),
+                Waitlist.status,
+                Waitlist.created_at.label("signed_up_at"),
+                *STUDENT_COLUMNS,
+                Waitlist.consent_share_details,
+                Waitlist.consent_photos,
+                Waitlist.heard_from,
+                Waitlist.heard_from_other,
+                Waitlist.newsletter_subscribe
+            )
+            .join(Student, Student.id == Waitlist.student_id)
+            .join(SessionModel, SessionModel.id == Waitlist.session_id)
+            .order_by(Waitlist.session_id, Waitlist.created_at, Waitlist.id)
+        )
+        if session_id is not None:
+            await self._ensure_session_exists(session_id)
+            stmt = stmt.where(Waitlist.session_id == session_id)
+        if waitlist_status is not None:
+            stmt = stmt.where(Waitlist.status == waitlist_status)
+        return stmt
+
+    async def attendance_query(self, session_id: Optional[int] = None):
+        """Recorded attendance from both storage layouts, one row per student per class date"""
+        records = text(ATTENDANCE_RECORDS_SQL).columns(
+            session_id=Integer, waitlist_id=Integer, attendance_date=Date, is_present=Boolean
+        ).subquery("records")
+        stmt = (
+            select(
+                records.c.session_id,
+                SessionModel.title.label("session_title"),
+                records.c.attendance_date,
+                records.c.waitlist_id,
+                Student.id.label("student_id"),
+                Student.email,
+                Student.first_name,
+                Student.family_name,
+                records.c.is_present
+            )
+            .join(Waitlist, Waitlist.id == records.c.waitlist_id)
+            .join(Student, Student.id == Waitlist.student_id)
+            .join(SessionModel, SessionModel.id == records.c.session_id)
+            .order_by(records.c.session_id, records.c.attendance_date, records.c.waitlist_id)
+        )
+        if session_id is not None:
+            await self._ensure_session_exists(session_id)
+            stmt = stmt.where(records.c.session_id == session_id)
+        return stmt
+
+    async def stream(self, stmt, export_format: ExportFormat) -> AsyncIterator[str]:
+        """Yield the rows of `stmt` in `export_format`, one chunk per batch"""
+        columns = [column.name for column in stmt.selected_columns]
+        try:
+            result = await self.db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="\n")
+                writer.writerow(columns)
+                async for rows in result.partitions():
+                    writer.writerows([_csv_value(value) for value in row] for row in rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                # Header only, for an empty export
+                if buffer.tell():
+                    yield buffer.getvalue()
+            else:
+                async for rows in result.partitions():
+                    yield "".join(
+                        json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False) + "\n"
+                        for row in rows
+                    )
+        except Exception as e:
+            # The status line has already been sent, so the client only sees a truncated file
+            logger.error(f"Export failed part way through: {e}", exc_info=True)
+            raise
+
+def export_headers(name: str, export_format: ExportFormat) -> dict:
+    """Download headers for an export named `name`, e.g. students-2026-10-16.csv"""
+    filename = f"{name}-{date.today().isoformat()}.{export_format}"
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
@@ -0,0 +1,300 @@
+import csv
+import io
+import logging
+from typing import BinaryIO, List, Optional
+
+import psycopg2
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models.session import Session as SessionModel
+from models.student import SchoolYear
+from models.waitlist import HeardFrom
+from schemas.waitlist_schema import StudentImportResponse, ImportRowError
+
+logger = logging.getLogger(__name__)
+
+# Columns accepted in an import file, in staging table order
+IMPORT_COLUMNS = (
+    "email", "first_name", "family_name", "school_year", "school_year_other", "experience",
+    "needs_device", "medical_info", "parent_name", "parent_phone", "session_id",
+    "consent_share_details", "consent_photos", "heard_from", "heard_from_other", "newsletter_subscribe",
+)
+REQUIRED_COLUMNS = ("email", "first_name", "family_name", "school_year", "needs_device", "parent_name", "parent_phone")
+
+# Cap on the per-row errors returned; error_count always has the full total
+MAX_REPORTED_ERRORS = 1000
+
+_TRUE_WORDS = "('true', 't', 'yes', 'y', '1')"
+_BOOLEAN_WORDS = "('true', 't', 'yes', 'y', '1', 'false', 'f', 'no', 'n', '0')"
+
+
+def _blank(column: str) -> str:
+    return f"nullif(btrim({column}), '') IS NULL"
+
+
+def _required_check(column: str, max_length: int) -> str:
+    return (
+        f"CASE WHEN {_blank(column)} THEN '{column} is required' "
+        f"WHEN length(btrim({column})) > {max_length} THEN '{column} must be at most {max_length} characters' END"
+    )
+
+
+def _bool_check(column: str, required: bool) -> str:
+    missing = f"WHEN {_blank(column)} THEN '{column} is required' " if required else f"WHEN {_blank(column)} THEN NULL "
+    return (
+        f"CASE {missing}"
+        f"WHEN lower(btrim({column})) NOT IN {_BOOLEAN_WORDS} "
+        f"THEN '{column} must be yes/no or true/false' END"
+    )
+
+
+def _bool_value(column: str) -> str:
+    """Parsed boolean for a validated column; blank means false"""
+    return f"coalesce(lower(btrim(s.{column})) IN {_TRUE_WORDS}, false)"
+
+
+def _optional_text(column: str) -> str:
+    return f"nullif(btrim(s.{column}), '')"
+
+
+_VALIDATE_SQL = f"""
+    UPDATE student_import SET errors = array_remove(ARRAY[
+        CASE WHEN {_blank('email')} THEN 'email is required'
+             WHEN btrim(email) !~ '^[^@\\s]+@[^@\\s]+\\.[^@\\s]+$' THEN 'email is not a valid address' END,
+        {_required_check('first_name', 100)},
+        {_required_check('family_name', 100)},
+        {_required_check('parent_name', 100)},
+        {_required_check('parent_phone', 20)},
+        CASE WHEN {_blank('school_year')} THEN 'school_year is required'
+             WHEN lower(btrim(school_year)) <> ALL(CAST(:school_year_labels AS text[]))
+             THEN 'school_year must be one of: ' || :school_year_choices END,
+        CASE WHEN lower(btrim(school_year)) = 'other' AND {_blank('school_year_other')}
+             THEN 'school_year_other is required when school_year is Other' END,
+        {_bool_check('needs_device', required=True)},
+        {_bool_check('consent_share_details', required=False)},
+        {_bool_check('consent_photos', required=False)},
+        {_bool_check('newsletter_subscribe', required=False)},
+        CASE WHEN {_blank('heard_from')} THEN NULL
+             WHEN lower(btrim(heard_from)) <> ALL(CAST(:heard_from_labels AS text[]))
+             THEN 'heard_from must be one of: ' || :heard_from_choices END,
+        CASE WHEN lower(btrim(heard_from)) = 'other' AND {_blank('heard_from_other')}
+             THEN 'heard_from_other is required when heard_from is Other' END,
+        CASE WHEN {_blank('session_id')} THEN NULL
+             WHEN btrim(session_id) !~ '^[0-9]{{1,9}}$' THEN 'session_id must be a number'
+             WHEN NOT EXISTS (SELECT 1 FROM sessions WHERE id = btrim(session_id)::int AND NOT is_deleted)
+             THEN 'session ' || btrim(session_id) || ' not found' END
+    ]::text[], NULL)
+"""
+
+# Latest row per email wins, matching create_signup which overwrites the student details
+_MERGE_STUDENTS_SQL = f"""
+    WITH merged AS (
+        INSERT INTO students (email, first_name, family_name, school_year, school_year_other, experience,
+                              needs_device, medical_info, parent_name, parent_phone)
+        SELECT DISTINCT ON (btrim(s.email))
+            btrim(s.email), btrim(s.first_name), btrim(s.family_name),
+            CAST(sy.name AS schoolyear), {_optional_text('school_year_other')},
+            ARRAY(SELECT btrim(e) FROM unnest(string_to_array(s.experience, ';')) AS e WHERE btrim(e) <> ''),
+            {_bool_value('needs_device')}, {_optional_text('medical_info')},
+            btrim(s.parent_name), btrim(s.parent_phone)
+        FROM student_import s
+        JOIN unnest(CAST(:school_year_labels AS text[]), CAST(:school_year_names AS text[])) AS sy(label, name)
+            ON sy.label = lower(btrim(s.school_year))
+        WHERE cardinality(s.errors) = 0
+        ORDER BY btrim(s.email), s.row_no DESC
+        ON CONFLICT (email) DO UPDATE SET
+            first_name = EXCLUDED.first_name,
+            family_name = EXCLUDED.family_name,
+            school_year = EXCLUDED.school_year,
+            school_year_other = EXCLUDED.school_year_other,
+            experience = EXCLUDED.experience,
+            needs_device = EXCLUDED.needs_device,
+            medical_info = EXCLUDED.medical_info,
+            parent_name = EXCLUDED.parent_name,
+            parent_phone = EXCLUDED.parent_phone,
+            updated_at = now()
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+"""
+
+# One signup per (student, session); rows keep file order so FIFO admission follows it
+_MERGE_WAITLIST_SQL = f"""
+    WITH targeted AS (
+        SELECT s.*, coalesce(CAST(nullif(btrim(s.session_id), '') AS integer),
+                             CAST(:default_session_id AS integer)) AS target_session_id
+        FROM student_import s
+        WHERE cardinality(s.errors) = 0
+    ), latest AS (
+        SELECT DISTINCT ON (btrim(email), target_session_id) *
+        FROM targeted
+        WHERE target_session_id IS NOT NULL
+        ORDER BY btrim(email), target_session_id, row_no DESC
+    ), inserted AS (
+        INSERT INTO waitlist (student_id, session_id, consent_share_details, consent_photos,
+                              heard_from, heard_from_other, newsletter_subscribe, status)
+        SELECT st.id, s.target_session_id,
+               {_bool_value('consent_share_details')}, {_bool_value('consent_photos')},
+               CAST(coalesce(hf.value, :default_heard_from) AS heardfrom), {_optional_text('heard_from_other')},
+               {_bool_value('newsletter_subscribe')}, 'waitlist'
+        FROM latest s
+        JOIN students st ON st.email = btrim(s.email)
+        LEFT JOIN unnest(CAST(:heard_from_labels AS text[]), CAST(:heard_from_values AS text[])) AS hf(label, value)
+            ON hf.label = lower(btrim(s.heard_from))
+        ORDER BY s.row_no
+        ON CONFLICT ON CONSTRAINT uq_waitlist_student_session DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM latest), (SELECT count(*) FROM inserted)
+"""
+
+
+def _enum_params() -> dict:
+    """Case-insensitive lookups from spreadsheet labels to the stored enum values.
+    SchoolYear is stored by name, HeardFrom by value; both accept either spelling."""
+    school_years = {}
+    for member in SchoolYear:
+        school_years[member.value.lower()] = member.name
+        school_years[member.name.lower()] = member.name
+    heard_from = {}
+    for member in HeardFrom:
+        heard_from[member.value.lower()] = member.value
+        heard_from[member.name.lower()] = member.value
+    return {
+        "school_year_labels": list(school_years),
+        "school_year_names": list(school_years.values()),
+        "school_year_choices": ", ".join(member.value for member in SchoolYear),
+        "heard_from_labels": list(heard_from),
+        "heard_from_values": list(heard_from.values()),
+        "heard_from_choices": ", ".join(member.value for member in HeardFrom),
+    }
+
+
+def _parse_header(line: str) -> List[str]:
+    rows = list(csv.reader([line]))
+    if not rows or not any(name.strip() for name in rows[0]):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import file is empty")
+
+    columns = [name.strip().lower().replace(" ", "_") for name in rows[0]]
+    unknown = [name for name in columns if name not in IMPORT_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown columns: {', '.join(unknown)}. Allowed columns: {', '.join(IMPORT_COLUMNS)}"
+        )
+    duplicated = sorted({name for name in columns if columns.count(name) > 1})
+    if duplicated:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Duplicate columns: {', '.join(duplicated)}")
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing required columns: {', '.join(missing)}")
+    return columns
+
+
+class StudentImportService:
+    """Bulk import of students and waitlist signups from CSV.
+
+    The file is streamed with COPY into a temporary staging table, validated
+    in SQL, then merged into students (by email) and waitlist (by student and
+    session) with one statement each. Rows that fail validation are reported
+    back and skipped; everything else is imported in a single transaction.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_csv(self, file: BinaryIO, default_session_id: Optional[int] = None) -> StudentImportResponse:
+        """Import a UTF-8 CSV with a header row.
+
+        Rows without a session_id use `default_session_id`; when neither is
+        given only the student record is created or updated. Blank consent and
+        newsletter columns mean no, a blank heard_from means School, and
+        experience is a semicolon separated list.
+        """
+        if default_session_id is not None:
+            session = self.db.query(SessionModel.id).filter(
+                SessionModel.id == default_session_id,
+                SessionModel.is_deleted == False
+            ).first()
+            if not session:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Session with ID {default_session_id} not found"
+                )
+
+        stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            columns = _parse_header(stream.readline())
+            self._copy_to_staging(stream, columns)
+
+            params = _enum_params()
+            self.db.execute(text(_VALIDATE_SQL), params)
+            students_created, students_updated = self.db.execute(text(_MERGE_STUDENTS_SQL), params).one()
+            signups, waitlist_created = self.db.execute(
+                text(_MERGE_WAITLIST_SQL),
+                {**params, "default_session_id": default_session_id, "default_heard_from": HeardFrom.SCHOOL.value}
+            ).one()
+            report = self._build_report(students_created, students_updated, signups, waitlist_created)
+
+            self.db.info["wrote"] = True
+            self.db.commit()
+        except HTTPException:
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error importing students: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to import students: {str(e)}"
+            )
+        finally:
+            # Leave the caller's file open
+            stream.detach()
+
+        logger.info(
+            f"Imported {report.valid_rows}/{report.total_rows} rows: {students_created} students created, "
+            f"{students_updated} updated, {waitlist_created} waitlist signups"
+        )
+        return report
+
+    def _copy_to_staging(self, stream: io.TextIOBase, columns: List[str]) -> None:
+        staging_columns = ", ".join(f"{name} text" for name in IMPORT_COLUMNS)
+        self.db.execute(text(
+            f"CREATE TEMP TABLE student_import (row_no bigserial, {staging_columns}, errors text[]) ON COMMIT DROP"
+        ))
+
+        # COPY is not available through SQLAlchemy, so it goes through the session's psycopg2 connection
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY student_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream)
+        except (psycopg2.DataError, UnicodeDecodeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not read import file: {str(e).strip()}"
+            )
+        finally:
+            cursor.close()
+
+    def _build_report(self, students_created: int, students_updated: int, signups: int,
+                      waitlist_created: int) -> StudentImportResponse:
+        total_rows, error_count = self.db.execute(text(
+            "SELECT count(*), count(*) FILTER (WHERE cardinality(errors) > 0) FROM student_import"
+        )).one()
+        error_rows = self.db.execute(text(
+            "SELECT row_no, nullif(btrim(email), '') AS email, errors FROM student_import "
+            "WHERE cardinality(errors) > 0 ORDER BY row_no LIMIT :limit"
+        ), {"limit": MAX_REPORTED_ERRORS}).all()
+
+        return StudentImportResponse(
+            total_rows=total_rows,
+            valid_rows=total_rows - error_count,
+            students_created=students_created,
+            students_updated=students_updated,
+            waitlist_created=waitlist_created,
+            already_registered=signups - waitlist_created,
+            error_count=error_count,
+            errors=[ImportRowError(row=r.row_no, email=r.email, errors=r.errors) for r in error_rows]
+        )
@@ -0,0 +1,205 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import ARRAY, Date, DateTime, Integer, bindparam, delete, exists, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from fastapi import HTTPException, status
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Sequence, Set
+import logging
+
+import numpy as np
+
+from models.session import Session as SessionModel
+from models.session_occurrence import SessionOccurrence
+from schemas.session_schema import SessionOccurrenceResponse
+from utils.recurrence import expand_many
+
+logger = logging.getLogger(__name__)
+
+# Longest window the range endpoint will expand in one request
+MAX_RANGE_DAYS = 366
+
+
+def _seconds(value) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+class OccurrenceService:
+    """Keeps session_occurrences in step with each session's rrule and answers
+    date-range questions from it. Methods that write do not commit - they run
+    inside the caller's transaction, next to the session change they follow."""
+
+    @staticmethod
+    def _occurrences_table(sessions: Sequence[SessionModel]):
+        """Every occurrence of `sessions`, expanded in one batch, as a table of unnested arrays"""
+        positions, dates = expand_many([session.rrule for session in sessions])
+        session_ids = np.array([session.id for session in sessions], dtype=np.int64)
+        start_offsets = np.array([_seconds(session.start_time) for session in sessions], dtype="timedelta64[s]")
+        end_offsets = np.array([_seconds(session.end_time) for session in sessions], dtype="timedelta64[s]")
+        midnights = dates.astype("datetime64[s]")
+        return func.unnest(
+            bindparam('occurrence_session_ids', session_ids[positions].tolist(), type_=ARRAY(Integer)),
+            bindparam('occurrence_dates', dates.tolist(), type_=ARRAY(Date)),
+            bindparam('occurrence_starts', (midnights + start_offsets[positions]).tolist(), type_=ARRAY(DateTime)),
+            bindparam('occurrence_ends', (midnights + end_offsets[positions]).tolist(), type_=ARRAY(DateTime))
+        ).table_valued('session_id', 'occurrence_date', 'starts_at', 'ends_at').render_derived(name='scheduled')
+
+    @staticmethod
+    def sync_sessions(db: Session, sessions: Sequence[SessionModel]) -> dict:
+        """Make session_occurrences match the rrules of `sessions`: add new dates,
+        move changed times and remove dates that left the schedule. Dates that
+        stay keep their cancelled flag; unchanged rows are not rewritten."""
+        if not sessions:
+            return {"upserted": 0, "deleted": 0}
+        scheduled = OccurrenceService._occurrences_table(sessions)
+
+        stmt = insert(SessionOccurrence).from_select(
+            ['session_id', 'occurrence_date', 'starts_at', 'ends_at'],
+            select(scheduled.c.session_id, scheduled.c.occurrence_date, scheduled.c.starts_at, scheduled.c.ends_at)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id', 'occurrence_date'],
+            set_={'starts_at': stmt.excluded.starts_at, 'ends_at': stmt.excluded.ends_at, 'updated_at': func.now()},
+            where=tuple_(SessionOccurrence.starts_at, SessionOccurrence.ends_at).is_distinct_from(
+                tuple_(stmt.excluded.starts_at, stmt.excluded.ends_at)
+            )
+        ).returning(SessionOccurrence.session_id)
+        upserted = len(db.execute(stmt).all())
+
+        deleted = db.execute(
+            delete(SessionOccurrence).where(
+                SessionOccurrence.session_id.in_([session.id for session in sessions]),
+                ~exists().where(
+                    scheduled.c.session_id == SessionOccurrence.session_id,
+                    scheduled.c.occurrence_date == SessionOccurrence.occurrence_date
+                )
+            )
+        ).rowcount
+        return {"upserted": upserted, "deleted": deleted}
+
+    @staticmethod
+    def sync_session(db: Session, session: SessionModel) -> dict:
+        counts = OccurrenceService.sync_sessions(db, [session])
+        logger.info(f"Synced occurrences of session {session.id}: {counts}")
+        return counts
+
+    @staticmethod
+    def unscheduled_dates(db: Session, session_id: int, dates: Iterable[date]) -> List[date]:
+        """Those of `dates` that are not a (non-cancelled) class of the session"""
+        dates = sorted(set(dates))
+        if not dates:
+            return []
+        requested = func.unnest(
+            bindparam('requested_dates', dates, type_=ARRAY(Date))
+        ).table_valued('occurrence_date').render_derived(name='requested')
+        return db.execute(
+            select(requested.c.occurrence_date).where(~exists().where(
+                SessionOccurrence.session_id == session_id,
+                SessionOccurrence.occurrence_date == requested.c.occurrence_date,
+                SessionOccurrence.is_cancelled == False
+            )).order_by(requested.c.occurrence_date)
+        ).scalars().all()
+
+    @staticmethod
+    def validate_dates(db: Session, session_id: int, dates: Set[date]) -> None:
+        """Raise ValueError unless every date is a scheduled, non-cancelled class of the session"""
+        invalid = OccurrenceService.unscheduled_dates(db, session_id, dates)
+        if invalid:
+            raise ValueError(
+                f"Not a scheduled class of session {session_id}: {', '.join(d.isoformat() for d in invalid)}"
+            )
+
+    @staticmethod
+    def _occurrences_query():
+        return select(
+            SessionOccurrence.session_id,
+            SessionOccurrence.occurrence_date,
+            SessionOccurrence.starts_at,
+            SessionOccurrence.ends_at,
+            SessionOccurrence.is_cancelled,
+            SessionModel.title,
+            SessionModel.location,
+            SessionModel.city
+        ).join(SessionModel, SessionModel.id == SessionOccurrence.session_id)
+
+    @staticmethod
+    def _build_response(row) -> SessionOccurrenceResponse:
+        return SessionOccurrenceResponse(
+            sessionId=row.session_id,
+            title=row.title,
+            location=row.location,
+            city=row.city,
+            occurrenceDate=row.occurrence_date,
+            startsAt=row.starts_at,
+            endsAt=row.ends_at,
+            isCancelled=row.is_cancelled
+        )
+
+    @staticmethod
+    async def get_range_async(db: AsyncSession, start: date, end: date,
+                              include_cancelled: bool = False) -> List[SessionOccurrenceResponse]:
+        """Classes of all active sessions between `start` and `end` (inclusive), in time order"""
+        if end < start:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must not be before start")
+        if end - start > timedelta(days=MAX_RANGE_DAYS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range cannot be longer than {MAX_RANGE_DAYS} days"
+            )
+
+        stmt = (
+            OccurrenceService._occurrences_query()
+            .where(
+                SessionOccurrence.occurrence_date.between(start, end),
+                SessionModel.is_deleted == False
+            )
+            .order_by(SessionOccurrence.starts_at, SessionOccurrence.session_id)
+        )
+        if not include_cancelled:
+            stmt = stmt.where(SessionOccurrence.is_cancelled == False)
+
+        rows = (await db.execute(stmt)).all()
+        return [OccurrenceService._build_response(r) for r in rows]
+
+    @staticmethod
+    def set_cancelled(db: Session, session_id: int, occurrence_date: date,
+                      cancelled: bool) -> SessionOccurrenceResponse:
+        """Cancel or reinstate one class of a session"""
+        updated = db.execute(
+            update(SessionOccurrence)
+            .where(
+                SessionOccurrence.session_id == session_id,
+                SessionOccurrence.occurrence_date == occurrence_date
+            )
+            .values(is_cancelled=cancelled, updated_at=func.now())
+            .returning(SessionOccurrence.session_id)
+        ).first()
+        if updated is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Session {session_id} has no class on {occurrence_date.isoformat()}"
+            )
+        row = db.execute(
+            OccurrenceService._occurrences_query().where(
+                SessionOccurrence.session_id == session_id,
+                SessionOccurrence.occurrence_date == occurrence_date
+            )
+        ).one()
+        db.commit()
+        logger.info(f"Session {session_id} class on {occurrence_date} {'cancelled' if cancelled else 'reinstated'}")
+        return OccurrenceService._build_response(row)
+
+    @staticmethod
+    def rebuild(db: Session, session_id: Optional[int] = None, batch_size: int = 500) -> int:
+        """Regenerate occurrences for every session (or one), committing per batch.
+        Returns the number of sessions processed."""
+        stmt = select(SessionModel).order_by(SessionModel.id)
+        if session_id is not None:
+            stmt = stmt.where(SessionModel.id == session_id)
+        sessions = db.execute(stmt).scalars().all()
+        for offset in range(0, len(sessions), batch_size):
+            batch = sessions[offset:offset + batch_size]
+            counts = OccurrenceService.sync_sessions(db, batch)
+            db.commit()
+            logger.info(f"Synced occurrences of sessions {batch[0].id}-{batch[-1].id}: {counts}")
+        return len(sessions)
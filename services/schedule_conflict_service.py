@@ -0,0 +1,240 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import date, time
+from typing import Iterable, List, Optional, Union
+import logging
+
+from models.session import Session as SessionModel
+from models.session_staff import SessionStaff
+from models.session_term import SessionTerm
+from models.user.user import User
+from schemas.session_schema import StaffConflict, VenueClash
+from utils.interval_index import IntervalIndex, Slot
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleConflictService:
+    """Finds staff members who would be teaching two sessions at once, and
+    venues booked by two sessions at once.
+
+    Sessions are loaded as weekly slots keyed by (staff_id, day_of_week) or
+    (venue_key, day_of_week) into an IntervalIndex, which decides overlap the
+    same way for the check run on each session save and for the reports.
+    """
+
+    def __init__(self, db: Union[Session, AsyncSession]):
+        # `*_async` methods expect an AsyncSession, everything else a Session
+        self.db = db
+
+    @staticmethod
+    def _assignments_query():
+        """Staff assignments of active sessions"""
+        return (
+            select(
+                SessionStaff.staff_id,
+                User.user_name,
+                SessionModel.id.label('session_id'),
+                SessionModel.title,
+                SessionModel.day_of_week,
+                SessionModel.start_time,
+                SessionModel.end_time,
+                SessionModel.start_date,
+                SessionModel.end_date
+            )
+            .join(SessionModel, SessionModel.id == SessionStaff.session_id)
+            .join(User, User.id == SessionStaff.staff_id)
+            .where(SessionModel.is_deleted == False)
+        )
+
+    @staticmethod
+    def _venue_bookings_query():
+        """Time slots of active sessions with their venue"""
+        return select(
+            SessionModel.id.label('session_id'),
+            SessionModel.title,
+            SessionModel.location,
+            SessionModel.city,
+            SessionModel.venue_key,
+            SessionModel.day_of_week,
+            SessionModel.start_time,
+            SessionModel.end_time,
+            SessionModel.start_date,
+            SessionModel.end_date
+        ).where(SessionModel.is_deleted == False)
+
+    @staticmethod
+    def _slot(row, key) -> Slot:
+        return Slot(
+            key=key,
+            start_time=row.start_time,
+            end_time=row.end_time,
+            start_date=row.start_date,
+            end_date=row.end_date,
+            item=row
+        )
+
+    @staticmethod
+    def _staff_slot(row) -> Slot:
+        return ScheduleConflictService._slot(row, key=(row.staff_id, row.day_of_week))
+
+    @staticmethod
+    def _build_conflict(session: Slot, other: Slot) -> StaffConflict:
+        return StaffConflict(
+            staffId=other.item.staff_id,
+            staffName=other.item.user_name,
+            dayOfWeek=other.item.day_of_week,
+            sessionId=session.item.session_id,
+            sessionTitle=session.item.title,
+            conflictingSessionId=other.item.session_id,
+            conflictingSessionTitle=other.item.title,
+            overlapStartDate=max(session.start_date, other.start_date),
+            overlapEndDate=min(session.end_date, other.end_date),
+            overlapStartTime=max(session.start_time, other.start_time),
+            overlapEndTime=min(session.end_time, other.end_time)
+        )
+
+    @staticmethod
+    def _venue_slot(row) -> Slot:
+        return ScheduleConflictService._slot(row, key=(row.venue_key, row.day_of_week))
+
+    @staticmethod
+    def _build_clash(session: Slot, other: Slot) -> VenueClash:
+        # Both are at the same venue; show it as the already-booked session spells it
+        return VenueClash(
+            location=other.item.location,
+            city=other.item.city,
+            dayOfWeek=other.item.day_of_week,
+            sessionId=session.item.session_id,
+            sessionTitle=session.item.title,
+            clashingSessionId=other.item.session_id,
+            clashingSessionTitle=other.item.title,
+            overlapStartDate=max(session.start_date, other.start_date),
+            overlapEndDate=min(session.end_date, other.end_date),
+            overlapStartTime=max(session.start_time, other.start_time),
+            overlapEndTime=min(session.end_time, other.end_time)
+        )
+
+    def find_session_conflicts(self, session: SessionModel, staff_ids: Iterable[int]) -> List[StaffConflict]:
+        """Conflicts `session` would have if taught by `staff_ids` (call before committing).
+
+        The staff members' user rows are locked until the transaction ends, so two
+        concurrent saves assigning the same person are checked one after the other.
+        """
+        staff_ids = sorted(set(staff_ids))
+        if not staff_ids or session.is_deleted:
+            return []
+
+        self.db.execute(
+            select(User.id).where(User.id.in_(staff_ids)).order_by(User.id).with_for_update(key_share=True)
+        ).all()
+        stmt = self._assignments_query().where(
+            SessionStaff.staff_id.in_(staff_ids),
+            SessionModel.day_of_week == session.day_of_week
+        )
+        if session.id is not None:
+            stmt = stmt.where(SessionModel.id != session.id)
+        rows = self.db.execute(stmt).all()
+        if not rows:
+            return []
+
+        index = IntervalIndex(self._staff_slot(row) for row in rows)
+        names = {row.staff_id: row.user_name for row in rows}
+        conflicts = []
+        for staff_id in staff_ids:
+            if staff_id not in names:
+                continue
+            proposed = self._staff_slot(_ProposedAssignment(staff_id, names[staff_id], session))
+            conflicts.extend(self._build_conflict(proposed, other) for other in index.overlapping(proposed))
+        return conflicts
+
+    def find_venue_clashes(self, session: SessionModel) -> List[VenueClash]:
+        """Active sessions already booked at `session`'s venue at an overlapping time (call
+        before committing). Saves at the same venue are serialised with a transaction-level
+        advisory lock on the venue key, as there is no venue row to lock."""
+        if not session.venue_key or session.is_deleted:
+            return []
+
+        self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(session.venue_key))))
+        stmt = self._venue_bookings_query().where(
+            SessionModel.venue_key == session.venue_key,
+            SessionModel.day_of_week == session.day_of_week
+        )
+        if session.id is not None:
+            stmt = stmt.where(SessionModel.id != session.id)
+        index = IntervalIndex(self._venue_slot(row) for row in self.db.execute(stmt).all())
+
+        proposed = self._venue_slot(_ProposedBooking(session))
+        return [self._build_clash(proposed, other) for other in index.overlapping(proposed)]
+
+    def find_term_venue_clashes(self, term_id: int) -> List[VenueClash]:
+        """Every venue clash among the active sessions of a term, from one query and one sweep"""
+        in_term = select(SessionTerm.session_id).where(SessionTerm.term_id == term_id)
+        rows = self.db.execute(self._venue_bookings_query().where(SessionModel.id.in_(in_term))).all()
+
+        index = IntervalIndex(self._venue_slot(row) for row in rows)
+        clashes = [self._build_clash(a, b) for a, b in index.conflicts()]
+        clashes.sort(key=lambda c: (c.city, c.location, c.dayOfWeek, c.overlapStartTime, c.sessionId))
+        return clashes
+
+    async def find_all_conflicts_async(self, staff_id: Optional[int] = None) -> List[StaffConflict]:
+        """Every pair of overlapping assignments in the active schedule, from one query"""
+        stmt = self._assignments_query()
+        if staff_id is not None:
+            stmt = stmt.where(SessionStaff.staff_id == staff_id)
+        rows = (await self.db.execute(stmt)).all()
+
+        index = IntervalIndex(self._staff_slot(row) for row in rows)
+        conflicts = [self._build_conflict(a, b) for a, b in index.conflicts()]
+        conflicts.sort(key=lambda c: (c.staffName, c.overlapStartDate, c.sessionId, c.conflictingSessionId))
+        return conflicts
+
+
+class _ProposedAssignment:
+    """A session as it is about to be saved, shaped like an assignments query row"""
+
+    def __init__(self, staff_id: int, user_name: str, session: SessionModel):
+        self.staff_id = staff_id
+        self.user_name = user_name
+        self.session_id = session.id
+        self.title = session.title
+        self.day_of_week = session.day_of_week
+        self.start_time: time = session.start_time
+        self.end_time: time = session.end_time
+        self.start_date: date = session.start_date
+        self.end_date: date = session.end_date
+
+
+class _ProposedBooking:
+    """A session as it is about to be saved, shaped like a venue bookings query row"""
+
+    def __init__(self, session: SessionModel):
+        self.session_id = session.id
+        self.title = session.title
+        self.location = session.location
+        self.city = session.city
+        self.venue_key = session.venue_key
+        self.day_of_week = session.day_of_week
+        self.start_time: time = session.start_time
+        self.end_time: time = session.end_time
+        self.start_date: date = session.start_date
+        self.end_date: date = session.end_date
+
+
+def describe_clashes(clashes: List[VenueClash]) -> str:
+    return "; ".join(
+        f"'{c.clashingSessionTitle}' (session {c.clashingSessionId}) is already at {c.location}, {c.city} "
+        f"on {c.dayOfWeek} {c.overlapStartTime:%H:%M}-{c.overlapEndTime:%H:%M} "
+        f"between {c.overlapStartDate} and {c.overlapEndDate}"
+        for c in clashes
+    )
+
+
+def describe_conflicts(conflicts: List[StaffConflict]) -> str:
+    return "; ".join(
+        f"{c.staffName} already teaches '{c.conflictingSessionTitle}' (session {c.conflictingSessionId}) "
+        f"on {c.dayOfWeek} {c.overlapStartTime:%H:%M}-{c.overlapEndTime:%H:%M} "
+        f"between {c.overlapStartDate} and {c.overlapEndDate}"
+        for c in conflicts
+    )
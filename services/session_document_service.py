@@ -0,0 +1,131 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import func
+from typing import Dict, Iterable, List
+import logging
+
+from models.session import Session as SessionModel
+from models.session_document import SessionDocument
+from models.session_term import SessionTerm
+from schemas.session_schema import SessionResponse, StaffMember, TermDetail
+
+logger = logging.getLogger(__name__)
+
+# Sessions rendered per statement when rebuilding every document
+REBUILD_BATCH_SIZE = 500
+
+
+def build_session_response(session) -> SessionResponse:
+    """SessionResponse with staff members and term details for a session loaded with both"""
+    return SessionResponse(
+        id=session.id,
+        title=session.title,
+        description=session.description,
+        termIds=[term.id for term in session.terms],
+        termNames=[term.name for term in session.terms],
+        terms=[
+            TermDetail(
+                id=term.id,
+                name=term.name,
+                startDate=term.start_date,
+                endDate=term.end_date,
+                year=term.year
+            )
+            for term in session.terms
+        ],
+        dayOfWeek=session.day_of_week,
+        startDate=session.start_date,
+        endDate=session.end_date,
+        startTime=session.start_time,
+        endTime=session.end_time,
+        location=session.location,
+        city=session.city,
+        locationUrl=session.location_url,
+        capacity=session.capacity,
+        minAge=session.min_age,
+        maxAge=session.max_age,
+        rrule=session.rrule,
+        isDeleted=session.is_deleted,
+        createdBy=session.created_by,
+        createdAt=session.created_at,
+        updatedAt=session.updated_at,
+        staff=[
+            StaffMember(
+                id=staff.id,
+                userName=staff.user_name,
+                email=staff.email
+            )
+            for staff in session.staff_members
+        ]
+    )
+
+
+def _sessions_with_relations(session_ids: List[int]):
+    # populate_existing: association rows added in this transaction are not in
+    # the identity map's relationship collections yet
+    return (
+        select(SessionModel)
+        .options(selectinload(SessionModel.terms), selectinload(SessionModel.staff_members))
+        .where(SessionModel.id.in_(session_ids))
+        .order_by(SessionModel.id)
+        .execution_options(populate_existing=True)
+    )
+
+
+class SessionDocumentService:
+    """Stored SessionResponse documents, so session lists are read without
+    loading or validating ORM objects. Documents are written in the same
+    transaction as the change they reflect."""
+
+    @staticmethod
+    def refresh(db: Session, session_ids: Iterable[int]) -> int:
+        """Re-render the documents of `session_ids` (does not commit)"""
+        session_ids = sorted(set(session_ids))
+        if not session_ids:
+            return 0
+        db.flush()
+        sessions = db.execute(_sessions_with_relations(session_ids)).scalars().all()
+        if not sessions:
+            return 0
+        documents = [
+            {"session_id": session.id, "document": build_session_response(session).model_dump(mode="json")}
+            for session in sessions
+        ]
+        stmt = insert(SessionDocument)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['session_id'],
+                set_={'document': stmt.excluded.document, 'updated_at': func.now()}
+            ),
+            documents
+        )
+        return len(documents)
+
+    @staticmethod
+    def refresh_term(db: Session, term_id: int) -> int:
+        """Re-render the documents of every session in a term, e.g. after the term is renamed"""
+        session_ids = db.execute(
+            select(SessionTerm.session_id).where(SessionTerm.term_id == term_id)
+        ).scalars().all()
+        return SessionDocumentService.refresh(db, session_ids)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Re-render every session's document, committing per batch"""
+        session_ids = db.execute(select(SessionModel.id).order_by(SessionModel.id)).scalars().all()
+        for offset in range(0, len(session_ids), REBUILD_BATCH_SIZE):
+            SessionDocumentService.refresh(db, session_ids[offset:offset + REBUILD_BATCH_SIZE])
+            db.commit()
+            # Rendered sessions are not needed again
+            db.expunge_all()
+        logger.info(f"Rebuilt {len(session_ids)} session documents")
+        return len(session_ids)
+
+    @staticmethod
+    async def render_missing_async(db: AsyncSession, session_ids: List[int]) -> Dict[int, str]:
+        """JSON for sessions that have no stored document yet (read-only fallback)"""
+        sessions = (await db.execute(_sessions_with_relations(session_ids))).scalars().all()
+        logger.warning(f"{len(sessions)} sessions have no stored document - run manage.py rebuild-session-documents")
+        return {session.id: build_session_response(session).model_dump_json() for session in sessions}
@@ -1,22 +1,35 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, cast, exists, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException, status
+from datetime import date
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 
+from core.query_cache import query_cache
 from models.session import Session as SessionModel
+from models.session_document import SessionDocument
 from models.session_staff import SessionStaff
+from models.session_term import SessionTerm
 from models.term import Term
 from models.user.user import User
 from models.waitlist import Waitlist
 from models.attendance import Attendance
-from schemas.session_schema import CreateSessionRequest, UpdateSessionRequest, SessionResponse
+from schemas.session_schema import CreateSessionRequest, UpdateSessionRequest, SessionResponse, StaffMember
+from services.admission_service import AdmissionService
+from services.occurrence_service import OccurrenceService
+from services.session_document_service import SessionDocumentService
+from services.schedule_conflict_service import ScheduleConflictService, describe_clashes, describe_conflicts
+from utils.pagination import decode_cursor, encode_cursor
 from utils.rrule_util import generate_rrule
+from utils.venue import venue_key
 
 logger = logging.getLogger(__name__)
 
 
 class SessionService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, AsyncSession]):
+        # `*_async` methods expect an AsyncSession, everything else a Session
         self.db = db
 
     # TODO: yet to send staff id from front end - session staff table not being populated
@@ -71,6 +84,7 @@ class SessionService:
                 end_time=request.endTime,
                 location=request.location,
                 city=request.city,
+                venue_key=venue_key(request.location, request.city),
                 location_url=request.locationUrl,
                 capacity=request.capacity,
                 min_age=request.minAge,
@@ -92,10 +106,15 @@ class SessionService:
                 session_term = SessionTerm(session_id=session.id, term_id=term.id)
                 self.db.add(session_term)
 
+            self._check_schedule_conflicts(session, request.staffIds, request.allowConflicts)
+
             # Assign staff members if provided
             if request.staffIds:
                 self._assign_staff_to_session(session.id, request.staffIds)
 
+            OccurrenceService.sync_session(self.db, session)
+            SessionDocumentService.refresh(self.db, [session.id])
+
             self.db.commit()
             self.db.refresh(session)
 
@@ -117,12 +136,11 @@ class SessionService:
 
     def get_all_sessions(self) -> List[SessionModel]:
         """Get all sessions (including archived ones - frontend will filter)"""
-        from sqlalchemy.orm import joinedload
-        
         try:
+            # selectinload: one extra query per relationship instead of a terms x staff row product
             sessions = self.db.query(SessionModel).options(
-                joinedload(SessionModel.terms),
-                joinedload(SessionModel.staff_members)
+                selectinload(SessionModel.terms),
+                selectinload(SessionModel.staff_members)
             ).order_by(
                 SessionModel.start_date.desc()
             ).all()
@@ -134,13 +152,119 @@ class SessionService:
                 detail=f"Failed to fetch sessions: {str(e)}"
             )
 
+    @staticmethod
+    def _filter_sessions(
+        stmt,
+        term_id: Optional[int] = None,
+        city: Optional[str] = None,
+        day_of_week: Optional[str] = None,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        staff_id: Optional[int] = None,
+        session_status: str = "all",
+        search: Optional[str] = None
+    ):
+        """Apply the session list filters to a statement selecting from sessions"""
+        if session_status == "active":
+            stmt = stmt.where(SessionModel.is_deleted == False)
+        elif session_status == "deleted":
+            stmt = stmt.where(SessionModel.is_deleted == True)
+        if term_id is not None:
+            stmt = stmt.where(exists().where(
+                SessionTerm.session_id == SessionModel.id,
+                SessionTerm.term_id == term_id
+            ))
+        if staff_id is not None:
+            stmt = stmt.where(exists().where(
+                SessionStaff.session_id == SessionModel.id,
+                SessionStaff.staff_id == staff_id
+            ))
+        if city:
+            stmt = stmt.where(func.lower(SessionModel.city) == city.strip().lower())
+        if day_of_week:
+            stmt = stmt.where(func.lower(SessionModel.day_of_week) == day_of_week.strip().lower())
+        # Sessions whose age range overlaps the requested one
+        if min_age is not None:
+            stmt = stmt.where(SessionModel.max_age >= min_age)
+        if max_age is not None:
+            stmt = stmt.where(SessionModel.min_age <= max_age)
+        if search and search.strip():
+            pattern = "%" + search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            stmt = stmt.where(or_(
+                SessionModel.title.ilike(pattern),
+                SessionModel.description.ilike(pattern),
+                SessionModel.location.ilike(pattern),
+                SessionModel.city.ilike(pattern)
+            ))
+        return stmt
+
+    @staticmethod
+    def _paginate(stmt, cursor: Optional[str], limit: Optional[int]):
+        """Keyset pagination on (start_date, id), newest first; fetches one extra row when limited"""
+        if cursor is not None:
+            start_date, session_id = decode_cursor(cursor, 2)
+            try:
+                position = (date.fromisoformat(start_date), int(session_id))
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            stmt = stmt.where(tuple_(SessionModel.start_date, SessionModel.id) < position)
+
+        stmt = stmt.order_by(SessionModel.start_date.desc(), SessionModel.id.desc())
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            stmt = stmt.limit(limit + 1)
+        return stmt
+
+    @query_cache.cached("sessions", "session_documents", "session_terms", "session_staff")
+    async def list_session_documents_async(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        **filters
+    ) -> Tuple[List[str], Optional[str]]:
+        """Stored JSON documents of the filtered sessions, newest start date first, with
+        keyset pagination on (start_date, id). `filters` are those of _filter_sessions.
+
+        Returns the page and the cursor of the next one (None on the last page).
+        Without `limit` every matching session is returned, as the old list did.
+        """
+        stmt = select(
+            SessionModel.id,
+            SessionModel.start_date,
+            # Text, not JSONB: the document goes into the response without being parsed
+            cast(SessionDocument.document, Text).label('document')
+        ).outerjoin(SessionDocument, SessionDocument.session_id == SessionModel.id)
+        stmt = self._paginate(self._filter_sessions(stmt, **filters), cursor, limit)
+
+        try:
+            rows = (await self.db.execute(stmt)).all()
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1].start_date, rows[-1].id)
+            else:
+                next_cursor = None
+
+            # Sessions written before documents existed; rendered here but not
+            # stored, as list reads may be served by a replica
+            missing = [row.id for row in rows if row.document is None]
+            rendered = await SessionDocumentService.render_missing_async(self.db, missing) if missing else {}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to fetch sessions: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to fetch sessions: {str(e)}"
+            )
+
+        documents = [row.document if row.document is not None else rendered[row.id] for row in rows]
+        return documents, next_cursor
+
     def get_session_by_id(self, session_id: int) -> SessionModel:
         """Get a session by ID"""
-        from sqlalchemy.orm import joinedload
-        
         session = self.db.query(SessionModel).options(
-            joinedload(SessionModel.terms),
-            joinedload(SessionModel.staff_members)
+            selectinload(SessionModel.terms),
+            selectinload(SessionModel.staff_members)
         ).filter(SessionModel.id == session_id).first()
         
         if not session:
@@ -154,6 +278,9 @@ class SessionService:
     def update_session(self, session_id: int, request: UpdateSessionRequest, user_id: int) -> SessionModel:
         """Update an existing session"""
         session = self.get_session_by_id(session_id)
+        # Only a changed schedule, venue or staff can create a clash
+        schedule_before = self._schedule_fingerprint(session)
+        staff_before = {staff.id for staff in session.staff_members}
 
         try:
             # If terms are being updated, fetch new terms and update dates
@@ -202,6 +329,7 @@ class SessionService:
             if request.locationUrl is not None:
                 session.location_url = request.locationUrl
             if request.capacity is not None:
+                AdmissionService(self.db).check_capacity(session.id, request.capacity)
                 session.capacity = request.capacity
             if request.minAge is not None:
                 session.min_age = request.minAge
@@ -232,10 +360,20 @@ class SessionService:
             )
             session.rrule = rrule_str
 
+            # New times, venue or staff can all clash with other sessions; unrelated
+            # edits skip the check so a session saved with allowConflicts stays editable
+            session.venue_key = venue_key(session.location, session.city)
+            staff_ids = request.staffIds if request.staffIds is not None else sorted(staff_before)
+            if self._schedule_fingerprint(session) != schedule_before or set(staff_ids) != staff_before:
+                self._check_schedule_conflicts(session, staff_ids, request.allowConflicts)
+
             # Update staff assignments if provided
             if request.staffIds is not None:
                 self._assign_staff_to_session(session.id, request.staffIds)
 
+            OccurrenceService.sync_session(self.db, session)
+            SessionDocumentService.refresh(self.db, [session.id])
+
             self.db.commit()
             self.db.refresh(session)
 
@@ -243,6 +381,7 @@ class SessionService:
             return session
 
         except HTTPException:
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
@@ -275,7 +414,8 @@ class SessionService:
             
             # Mark session as deleted (soft delete)
             session.is_deleted = True
-            
+            SessionDocumentService.refresh(self.db, [session.id])
+
             self.db.commit()
             logger.info(f"Session {session_id} marked as deleted (soft delete)")
 
@@ -287,6 +427,32 @@ class SessionService:
                 detail=f"Failed to delete session: {str(e)}"
             )
 
+    @staticmethod
+    def _schedule_fingerprint(session: SessionModel) -> Tuple:
+        """The fields a schedule conflict depends on, besides staff"""
+        return (session.day_of_week, session.start_time, session.end_time,
+                session.start_date, session.end_date, session.venue_key)
+
+    def _check_schedule_conflicts(self, session: SessionModel, staff_ids: List[int], allow_conflicts: bool) -> None:
+        """Reject the save if the venue is already booked or a staff member already teaches
+        elsewhere at the same time, unless the caller explicitly allows it"""
+        checker = ScheduleConflictService(self.db)
+        problems = []
+        clashes = checker.find_venue_clashes(session)
+        if clashes:
+            problems.append(f"Venue clash: {describe_clashes(clashes)}")
+        conflicts = checker.find_session_conflicts(session, staff_ids)
+        if conflicts:
+            problems.append(f"Staff schedule conflict: {describe_conflicts(conflicts)}")
+        if not problems:
+            return
+        if not allow_conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=". ".join(problems)
+            )
+        logger.warning(f"Session {session.id} saved with schedule conflicts: {'. '.join(problems)}")
+
     def _assign_staff_to_session(self, session_id: int, staff_ids: List[int]) -> None:
         """Assign staff members to a session"""
         try:
@@ -306,8 +472,9 @@ class SessionService:
                 detail="Failed to assign staff members"
             )
 
-    def get_all_staff(self) -> List[User]:
-        """Get all users with STAFF role"""
+    @query_cache.cached("users", "user_roles", "roles")
+    def get_all_staff(self) -> List[StaffMember]:
+        """Get all users with STAFF role (cached)"""
         try:
             from models.user.role import Role
             from models.user.user_role import UserRole
@@ -320,7 +487,7 @@ class SessionService:
                 .filter(Role.name == "STAFF")
                 .all()
             )
-            return staff_users
+            return [StaffMember(id=user.id, userName=user.user_name, email=user.email) for user in staff_users]
         except Exception as e:
             logger.error(f"Failed to fetch staff: {e}")
             raise HTTPException(
@@ -1,14 +1,29 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 import logging
-from typing import List
+from typing import Dict, List
 
+from core.query_cache import query_cache
 from models.term import Term
 from schemas.term_schema import TermCreate, TermUpdate
+from services.session_document_service import SessionDocumentService
 
 logger = logging.getLogger(__name__)
 
 
+def build_term_response(term) -> Dict:
+    """Term response dict with camelCase keys"""
+    return {
+        "id": term.id,
+        "name": term.name,
+        "startDate": term.start_date.isoformat(),
+        "endDate": term.end_date.isoformat(),
+        "year": term.year,
+        "createdAt": term.created_at.isoformat() if term.created_at else None,
+        "updatedAt": term.updated_at.isoformat() if term.updated_at else None,
+    }
+
+
 class TermService:
     def __init__(self, db: Session):
         self.db = db
@@ -55,6 +70,11 @@ class TermService:
         """Get all terms ordered by year and start date"""
         return self.db.query(Term).order_by(Term.year.desc(), Term.start_date).all()
 
+    @query_cache.cached("terms")
+    def list_terms(self) -> List[Dict]:
+        """Responses for all terms, in get_all_terms order (cached)"""
+        return [build_term_response(term) for term in self.get_all_terms()]
+
     def get_term_by_id(self, term_id: int) -> Term:
         """Get term by ID"""
         term = self.db.query(Term).filter(Term.id == term_id).first()
@@ -96,7 +116,10 @@ class TermService:
         # Mark as updated
         from datetime import datetime
         term.updated_at = datetime.utcnow()
-        
+
+        # Session documents embed the term's name and dates
+        SessionDocumentService.refresh_term(self.db, term.id)
+
         self.db.commit()
         self.db.refresh(term)
         
@@ -1,19 +1,80 @@
+from sqlalchemy import and_, bindparam, func, literal, literal_column, not_, or_, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 import logging
-from typing import List
+from typing import List, Optional, Tuple, Union
 
-from models.student import Student
+from core.query_cache import query_cache
+from models.student import SchoolYear, Student
 from models.waitlist import Waitlist, WaitlistStatus
 from models.session import Session as SessionModel
 from schemas.waitlist_schema import StudentSignupRequest, WaitlistEntryWithDetails, StudentResponse, \
     StudentUpdateRequest
+from services.admission_service import AdmissionService
+from utils.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+# Shorter search terms only match name/email prefixes: trigrams need three characters
+MIN_SUBSTRING_SEARCH_LENGTH = 3
+
+
+
+def _session_waitlist_query(session_id: int):
+    """Select waitlist rows with the student columns shown in the waitlist tables"""
+    return (
+        select(
+            Waitlist.id,
+            Student.first_name,
+            Student.family_name,
+            Student.email,
+            Student.parent_name,
+            Student.parent_phone,
+            Student.school_year,
+            Student.needs_device,
+            Waitlist.status,
+            Waitlist.created_at
+        )
+        .join(Student, Waitlist.student_id == Student.id)
+        .where(Waitlist.session_id == session_id)
+        .order_by(Waitlist.created_at.asc())
+    )
+
+
+def _build_entry_details(r) -> WaitlistEntryWithDetails:
+    return WaitlistEntryWithDetails(
+        id=r.id,
+        student_name=f"{r.first_name} {r.family_name}",
+        student_email=r.email,
+        parent_name=r.parent_name,
+        parent_phone=r.parent_phone,
+        school_year=r.school_year,
+        needs_device=r.needs_device,
+        status=r.status,
+        created_at=r.created_at
+    )
+
+
+def student_search_text():
+    """Lower-cased searchable text of a student. Migration 0008 indexes this exact
+    expression (ix_students_search_trgm), so keep the two in step."""
+    space = literal_column("' '")
+    return func.lower(
+        Student.email + space + Student.first_name + space + Student.family_name
+        + space + Student.parent_name + space + Student.parent_phone
+    )
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 
 class WaitlistService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, AsyncSession]):
+        # `*_async` methods expect an AsyncSession, everything else a Session
         self.db = db
 
     def create_signup(self, request: StudentSignupRequest) -> Waitlist:
@@ -91,6 +152,13 @@ class WaitlistService:
 
         except HTTPException:
             raise
+        except IntegrityError:
+            # uq_waitlist_student_session - a concurrent signup for the same student won the race
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Student is already registered for this session"
+            )
         except Exception as e:
             self.db.rollback()
             logger.error(f"Failed to create signup: {e}")
@@ -99,42 +167,25 @@ class WaitlistService:
                 detail="Failed to create signup"
             )
 
+    @query_cache.cached("waitlist", "students")
     def get_waitlist_by_session(self, session_id: int) -> List[WaitlistEntryWithDetails]:
         """Get all waitlist entries for a specific session"""
         try:
-            results = (
-                self.db.query(
-                    Waitlist.id,
-                    Student.first_name,
-                    Student.family_name,
-                    Student.email,
-                    Student.parent_name,
-                    Student.parent_phone,
-                    Student.school_year,
-                    Student.needs_device,
-                    Waitlist.status,
-                    Waitlist.created_at
-                )
-                .join(Student, Waitlist.student_id == Student.id)
-                .filter(Waitlist.session_id == session_id)
-                .order_by(Waitlist.created_at.asc())
-                .all()
+            results = self.db.execute(_session_waitlist_query(session_id)).all()
+            return [_build_entry_details(r) for r in results]
+        except Exception as e:
+            logger.error(f"Failed to fetch waitlist: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to fetch waitlist"
             )
 
-            return [
-                WaitlistEntryWithDetails(
-                    id=r.id,
-                    student_name=f"{r.first_name} {r.family_name}",
-                    student_email=r.email,
-                    parent_name=r.parent_name,
-                    parent_phone=r.parent_phone,
-                    school_year=r.school_year,
-                    needs_device=r.needs_device,
-                    status=r.status,
-                    created_at=r.created_at
-                )
-                for r in results
-            ]
+    @query_cache.cached("waitlist", "students")
+    async def get_waitlist_by_session_async(self, session_id: int) -> List[WaitlistEntryWithDetails]:
+        """Async version of get_waitlist_by_session for use with get_async_db"""
+        try:
+            result = await self.db.execute(_session_waitlist_query(session_id))
+            return [_build_entry_details(r) for r in result.all()]
         except Exception as e:
             logger.error(f"Failed to fetch waitlist: {e}")
             raise HTTPException(
@@ -143,17 +194,9 @@ class WaitlistService:
             )
 
     def update_waitlist_status(self, waitlist_id: int, new_status: WaitlistStatus) -> Waitlist:
-        """Update waitlist entry status"""
+        """Update waitlist entry status, within the session's capacity"""
         try:
-            waitlist_entry = self.db.query(Waitlist).filter(Waitlist.id == waitlist_id).first()
-
-            if not waitlist_entry:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Waitlist entry with ID {waitlist_id} not found"
-                )
-
-            waitlist_entry.status = new_status
+            waitlist_entry, = AdmissionService(self.db).change_status([waitlist_id], new_status)
             self.db.commit()
             self.db.refresh(waitlist_entry)
 
@@ -161,6 +204,7 @@ class WaitlistService:
             return waitlist_entry
 
         except HTTPException:
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
@@ -174,7 +218,7 @@ class WaitlistService:
         """Get all students"""
         try:
             students = self.db.query(Student).order_by(Student.created_at.desc()).all()
-            return [StudentResponse.from_orm(student) for student in students]
+            return [StudentResponse.model_validate(student) for student in students]
         except Exception as e:
             logger.error(f"Failed to fetch students: {e}")
             raise HTTPException(
@@ -182,6 +226,85 @@ class WaitlistService:
                 detail="Failed to fetch students"
             )
 
+    async def search_students_async(
+        self,
+        query: Optional[str] = None,
+        school_year: Optional[SchoolYear] = None,
+        needs_device: Optional[bool] = None,
+        experience: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[StudentResponse], Optional[str]]:
+        """Students matching `query` and the filters, with keyset pagination.
+
+        Name and email prefixes rank first, then substring matches anywhere in the
+        student's email, names and parent details, then close misspellings. Within a rank students are ordered by id.
+        Returns the page and the cursor of the next one (None on the last page).
+        """
+        base = select(Student)
+        if school_year is not None:
+            base = base.where(Student.school_year == school_year)
+        if needs_device is not None:
+            base = base.where(Student.needs_device == needs_device)
+        if experience:
+            # Student.experience is the generic ARRAY, which has no contains()
+            base = base.where(Student.experience.op("@>")(postgresql.array(experience)))
+
+        # One condition per rank, each excluding the ranks before it
+        term = (query or "").strip().lower()
+        tiers = [None]
+        if term:
+            # Inlined so the planner can turn the prefix into a text_pattern_ops index range
+            prefix = bindparam("prefix", _like_escape(term) + "%", literal_execute=True)
+            prefix_match = or_(
+                func.lower(Student.family_name).like(prefix),
+                func.lower(Student.first_name).like(prefix),
+                func.lower(Student.email).like(prefix)
+            )
+            tiers = [prefix_match]
+            if len(term) >= MIN_SUBSTRING_SEARCH_LENGTH:
+                search_text = student_search_text()
+                substring_match = search_text.like("%" + _like_escape(term) + "%")
+                tiers.append(and_(substring_match, not_(prefix_match)))
+                # word_similarity(term, text) >= pg_trgm.word_similarity_threshold (0.6 by default)
+                tiers.append(and_(literal(term).op("<%")(search_text), not_(or_(prefix_match, substring_match))))
+
+        first_rank, last_id = 0, None
+        if cursor is not None:
+            first_rank, last_id = decode_cursor(cursor, 2)
+            if not isinstance(first_rank, int) or not isinstance(last_id, int) or not 0 <= first_rank < len(tiers):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+        # Ranks are read in turn, each in id order, so a page full of prefix matches
+        # never touches the (slower) substring scan. One extra row tells whether
+        # there is a next page.
+        rows = []
+        try:
+            for rank in range(first_rank, len(tiers)):
+                stmt = base
+                if tiers[rank] is not None:
+                    stmt = stmt.where(tiers[rank])
+                if rank == first_rank and last_id is not None:
+                    stmt = stmt.where(Student.id > last_id)
+                stmt = stmt.order_by(Student.id).limit(limit + 1 - len(rows))
+                students = (await self.db.execute(stmt)).scalars().all()
+                rows.extend((rank, student) for student in students)
+                if len(rows) > limit:
+                    break
+        except Exception as e:
+            logger.error(f"Failed to search students: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to search students"
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_rank, last_student = rows[-1]
+            next_cursor = encode_cursor(last_rank, last_student.id)
+        return [StudentResponse.model_validate(student) for _, student in rows], next_cursor
+
     def get_student_by_id(self, student_id: int) -> StudentResponse:
         """Get a specific student by ID"""
         try:
@@ -240,29 +363,16 @@ class WaitlistService:
             )
 
     def bulk_update_status(self, waitlist_ids: List[int], new_status: WaitlistStatus) -> int:
-        """Update status for multiple waitlist entries"""
+        """Update status for multiple waitlist entries, all or none, within session capacities"""
         try:
-            # Verify all waitlist IDs exist
-            waitlist_entries = self.db.query(Waitlist).filter(Waitlist.id.in_(waitlist_ids)).all()
-            
-            if len(waitlist_entries) != len(waitlist_ids):
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="One or more waitlist entries not found"
-                )
-
-            # Update status for all entries
-            updated_count = (
-                self.db.query(Waitlist)
-                .filter(Waitlist.id.in_(waitlist_ids))
-                .update({Waitlist.status: new_status}, synchronize_session=False)
-            )
+            updated_count = len(AdmissionService(self.db).change_status(waitlist_ids, new_status))
 
             self.db.commit()
             logger.info(f"Updated {updated_count} waitlist entries to status {new_status}")
             return updated_count
 
         except HTTPException:
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
@@ -272,6 +382,26 @@ class WaitlistService:
                 detail="Failed to bulk update status"
             )
 
+    def admit_next(self, session_id: int, count: int = 1) -> List[Waitlist]:
+        """Admit the earliest waitlisted signups of a session, up to its capacity"""
+        try:
+            admitted = AdmissionService(self.db).admit_next(session_id, count)
+            self.db.commit()
+            for entry in admitted:
+                self.db.refresh(entry)
+            return admitted
+
+        except HTTPException:
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to admit from waitlist: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to admit from waitlist"
+            )
+
     def get_waitlist_by_status(self, session_id: int, status: WaitlistStatus) -> List[WaitlistEntryWithDetails]:
         """Get waitlist entries for a specific session filtered by status"""
         try:
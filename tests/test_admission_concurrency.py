@@ -0,0 +1,143 @@
+"""Capacity checks under concurrent admissions.
+
+These run against a real, migrated Postgres database (the one the DB_* settings
+point at) because the guarantee comes from row locks. They create their own
+session, students and signups and delete them afterwards. Enable with
+RUN_DB_TESTS=1.
+"""
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_DB_TESTS"), reason="needs a migrated Postgres database (set RUN_DB_TESTS=1)"
+)
+
+CAPACITY = 10
+SIGNUPS = 60
+PARALLEL_ADMITS = 40
+
+
+@pytest.fixture
+def full_waitlist():
+    """A session with CAPACITY places and SIGNUPS students on its waitlist"""
+    from core.db_connect import SessionLocal
+    from models.session import Session as SessionModel
+    from models.student import SchoolYear, Student
+    from models.user.user import User
+    from models.waitlist import HeardFrom, Waitlist
+
+    tag = uuid.uuid4().hex[:12]
+    db = SessionLocal()
+    user = User(email=f"admission-{tag}@test.invalid", user_name=f"admission-{tag}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    session = SessionModel(
+        title=f"Admission test {tag}", term="Test", day_of_week="Monday",
+        start_date=date(2026, 1, 5), end_date=date(2026, 3, 30),
+        start_time=time(15, 0), end_time=time(16, 0),
+        location="Test venue", city="Test city", capacity=CAPACITY, min_age=8, max_age=14,
+        rrule="DTSTART:20260105T150000\nRRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20260330T160000",
+        created_by=user.id
+    )
+    db.add(session)
+    db.flush()
+    students = [
+        Student(
+            email=f"student-{i}-{tag}@test.invalid", first_name="Test", family_name=f"Student {i}",
+            school_year=SchoolYear.YEAR_6, needs_device=False, parent_name="Parent", parent_phone="000"
+        )
+        for i in range(SIGNUPS)
+    ]
+    db.add_all(students)
+    db.flush()
+    entries = [
+        Waitlist(
+            student_id=student.id, session_id=session.id, consent_share_details=True, consent_photos=True,
+            heard_from=HeardFrom.SCHOOL, newsletter_subscribe=False
+        )
+        for student in students
+    ]
+    db.add_all(entries)
+    db.commit()
+
+    try:
+        yield session.id, [entry.id for entry in entries]
+    finally:
+        db.query(Waitlist).filter(Waitlist.session_id == session.id).delete(synchronize_session=False)
+        db.query(Student).filter(Student.id.in_([student.id for student in students])).delete(synchronize_session=False)
+        db.query(SessionModel).filter(SessionModel.id == session.id).delete(synchronize_session=False)
+        db.query(User).filter(User.id == user.id).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def _admitted(session_id: int) -> int:
+    from core.db_connect import SessionLocal
+    from models.waitlist import Waitlist, WaitlistStatus
+
+    with SessionLocal() as db:
+        return db.query(Waitlist).filter(
+            Waitlist.session_id == session_id, Waitlist.status == WaitlistStatus.ADMITTED
+        ).count()
+
+
+def _run_in_parallel(call, arguments):
+    """Run `call(service, argument)` for each argument on its own connection;
+    returns the status codes (200, or the HTTPException's)"""
+    from fastapi import HTTPException
+    from core.db_connect import SessionLocal
+    from services.waitlist_service import WaitlistService
+
+    def run(argument):
+        with SessionLocal() as db:
+            try:
+                call(WaitlistService(db), argument)
+                return 200
+            except HTTPException as e:
+                return e.status_code
+
+    with ThreadPoolExecutor(max_workers=PARALLEL_ADMITS) as pool:
+        return list(pool.map(run, arguments))
+
+
+def test_parallel_status_admits_never_exceed_capacity(full_waitlist):
+    from models.waitlist import WaitlistStatus
+
+    session_id, entry_ids = full_waitlist
+    codes = _run_in_parallel(
+        lambda service, entry_id: service.update_waitlist_status(entry_id, WaitlistStatus.ADMITTED),
+        entry_ids[:PARALLEL_ADMITS]
+    )
+
+    assert _admitted(session_id) == CAPACITY
+    assert codes.count(200) == CAPACITY
+    assert set(codes) == {200, 409}
+
+
+def test_parallel_admit_next_never_exceeds_capacity(full_waitlist):
+    session_id, _ = full_waitlist
+    codes = _run_in_parallel(lambda service, _: service.admit_next(session_id, 3), range(PARALLEL_ADMITS))
+
+    assert _admitted(session_id) == CAPACITY
+    assert set(codes) <= {200, 409}
+
+
+def test_capacity_cannot_drop_below_admitted(full_waitlist):
+    from fastapi import HTTPException
+    from core.db_connect import SessionLocal
+    from schemas.session_schema import UpdateSessionRequest
+    from services.session_service import SessionService
+    from services.waitlist_service import WaitlistService
+
+    session_id, _ = full_waitlist
+    with SessionLocal() as db:
+        WaitlistService(db).admit_next(session_id, CAPACITY)
+        with pytest.raises(HTTPException) as raised:
+            SessionService(db).update_session(session_id, UpdateSessionRequest(capacity=CAPACITY - 1), user_id=0)
+
+    assert raised.value.status_code == 409
+    assert _admitted(session_id) == CAPACITY
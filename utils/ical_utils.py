@@ -1,74 +1,97 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
-DAY_MAP = {
-    "MO": 0,
-    "TU": 1,
-    "WE": 2,
-    "TH": 3,
-    "FR": 4,
-    "SA": 5,
-    "SU": 6,
-}
+from utils.recurrence import parse_recurrence
 
 
-def correct_dtstart_for_rule(dtstart_str: str, byday: str) -> str:
-    """
-    If DTSTART weekday doesn't match BYDAY, move DTSTART forward
-    until it matches the weekday defined in BYDAY.
-    """
-    dt = datetime.strptime(dtstart_str, "%Y%m%dT%H%M%S")
-    target_weekday = DAY_MAP[byday]
+# Bump when the generated calendar changes shape, so cached copies are replaced
+ICS_FORMAT_VERSION = 3
 
-    while dt.weekday() != target_weekday:
-        dt += timedelta(days=1)
+CRLF = "\r\n"
+# Content lines longer than this many octets are folded (RFC 5545 section 3.1)
+MAX_LINE_OCTETS = 75
 
-    return dt.strftime("%Y%m%dT%H%M%S")
+CALENDAR_FOOTER = "END:VCALENDAR" + CRLF
 
 
-def build_ics_from_session(session):
-    dtstamp = datetime.now().strftime("%Y%m%dT%H%M%S")
-
-    # Split the stored rrule into DTSTART + RRULE
-    lines = session.rrule.split("\n")
-    dtstart_line = next((l for l in lines if l.startswith("DTSTART:")), None)
-    rrule_line = next((l for l in lines if l.startswith("RRULE:")), None)
-
-    if not dtstart_line or not rrule_line:
-        raise ValueError("Invalid RRULE stored in session.")
+def session_last_modified(session):
+    return session.updated_at or session.created_at
 
-    # Extract DTSTART value
-    dtstart_value = dtstart_line.replace("DTSTART:", "").strip()
 
-    # Extract BYDAY value from RRULE (e.g. TH from BYDAY=TH)
-    parts = rrule_line.split(";")
-    byday_part = next((p for p in parts if p.startswith("BYDAY=")), None)
-    if not byday_part:
-        raise ValueError("RRULE missing BYDAY")
+def escape_text(value) -> str:
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
 
-    byday = byday_part.replace("BYDAY=", "")
 
-    # AUTO-FIX DTSTART if weekday mismatch
-    corrected_dtstart = correct_dtstart_for_rule(dtstart_value, byday)
+def fold_line(line: str) -> str:
+    """Terminate a content line, splitting it into 75-octet chunks without breaking UTF-8 characters"""
+    if len(line.encode()) <= MAX_LINE_OCTETS:
+        return line + CRLF
+    chunks = []
+    current = ""
+    current_octets = 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        char_octets = len(char.encode())
+        if current_octets + char_octets > limit:
+            chunks.append(current)
+            current, current_octets = "", 0
+            limit = MAX_LINE_OCTETS - 1  # continuation lines start with a space
+        current += char
+        current_octets += char_octets
+    chunks.append(current)
+    return (CRLF + " ").join(chunks) + CRLF
+
+
+def calendar_header(name: str = None) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Your App Name//EN", "CALSCALE:GREGORIAN"]
+    if name:
+        lines.append(f"X-WR-CALNAME:{escape_text(name)}")
+    return "".join(fold_line(line) for line in lines)
+
+
+def _schedule_lines(rrule: str):
+    """DTSTART, RRULE and any EXDATE lines for a stored rrule.
+    DTSTART is moved onto the first occurrence, since clients treat DTSTART
+    itself as an occurrence even when it is not on a BYDAY weekday."""
+    recurrence = parse_recurrence(rrule)
+    dtstart = recurrence.first_occurrence or recurrence.dtstart
+    lines = [f"DTSTART:{dtstart.strftime('%Y%m%dT%H%M%S')}", recurrence.rrule_line]
+    if len(recurrence.exdates):
+        start_time = recurrence.dtstart.time()
+        lines.append("EXDATE:" + ",".join(
+            datetime.combine(day, start_time).strftime("%Y%m%dT%H%M%S") for day in recurrence.exdates.tolist()
+        ))
+    return lines
+
+
+def build_vevent(session) -> str:
+    """One VEVENT for a session row (any object with the Session columns used here)"""
+    # DTSTAMP is the session's last change rather than "now", so an unchanged
+    # session always produces the same bytes (and the same ETag)
+    last_modified = session_last_modified(session) or datetime.now(timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    dtstamp = last_modified.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:session-{session.id}@yourapp.com",
+        f"DTSTAMP:{dtstamp}",
+        *_schedule_lines(session.rrule),
+        f"SUMMARY:{escape_text(session.title)}",
+        f"DESCRIPTION:{escape_text(f'Term {session.term} - Weekly Class')}",
+        f"LOCATION:{escape_text(f'{session.location}, {session.city}')}",
+        "END:VEVENT",
+    ]
+    return "".join(fold_line(line) for line in lines)
 
-    # Rebuild rrule string with corrected DTSTART
-    corrected_rrule_block = (
-            f"DTSTART:{corrected_dtstart}\n" +
-            rrule_line
-    )
 
-    ical = f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//Your App Name//EN
-CALSCALE:GREGORIAN
-BEGIN:VEVENT
-UID:session-{session.id}@yourapp.com
-DTSTAMP:{dtstamp}
-{corrected_rrule_block}
-SUMMARY:{session.title}
-DESCRIPTION:Term {session.term} - Weekly Class
-LOCATION:{session.location}, {session.city}
-END:VEVENT
-END:VCALENDAR
-"""
-
-    return ical
+def build_ics_from_session(session):
+    return calendar_header() + build_vevent(session) + CALENDAR_FOOTER
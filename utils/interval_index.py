@@ -0,0 +1,74 @@
+"""Sorted buckets of weekly time slots.
+
+Slots are bucketed by a key (e.g. (staff_id, day_of_week)) and kept sorted by
+start time within each bucket. Finding the slots that overlap a new one is a
+dict lookup, a binary search that drops slots starting after it ends, and a
+linear check of the rest, so it is O(k) in the earlier-starting slots of the
+bucket. Buckets are one staff member's or one venue's classes on one weekday,
+and the index is built per check from a query already narrowed to that
+bucket, so they stay small. Listing every overlapping pair is one sweep per
+bucket. Two slots overlap when their time ranges overlap (end times
+are exclusive, so back-to-back slots do not) and their date ranges share at
+least one day (both ends inclusive).
+"""
+from bisect import bisect_left
+from datetime import date, time
+from heapq import heappop, heappush
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+class Slot(NamedTuple):
+    key: Hashable
+    start_time: time
+    end_time: time
+    start_date: date
+    end_date: date
+    item: Any = None
+
+
+def slots_overlap(a: Slot, b: Slot) -> bool:
+    return (
+        a.key == b.key
+        and a.start_time < b.end_time and b.start_time < a.end_time
+        and a.start_date <= b.end_date and b.start_date <= a.end_date
+    )
+
+
+class IntervalIndex:
+    def __init__(self, slots: Iterable[Slot] = ()):
+        self._buckets: Dict[Hashable, List[Slot]] = {}
+        self._starts: Dict[Hashable, List[time]] = {}
+        for slot in slots:
+            self.add(slot)
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def add(self, slot: Slot) -> None:
+        bucket = self._buckets.setdefault(slot.key, [])
+        starts = self._starts.setdefault(slot.key, [])
+        position = bisect_left(starts, slot.start_time)
+        starts.insert(position, slot.start_time)
+        bucket.insert(position, slot)
+
+    def overlapping(self, slot: Slot) -> List[Slot]:
+        """Stored slots that overlap `slot`"""
+        bucket = self._buckets.get(slot.key)
+        if not bucket:
+            return []
+        # Only slots starting before `slot` ends can overlap it
+        candidates = bucket[:bisect_left(self._starts[slot.key], slot.end_time)]
+        return [other for other in candidates if slots_overlap(slot, other)]
+
+    def conflicts(self) -> Iterator[Tuple[Slot, Slot]]:
+        """Every overlapping pair of stored slots, found in one sweep per bucket"""
+        for bucket in self._buckets.values():
+            # Slots still running at the current start time, by end time
+            running: List[Tuple[time, int, Slot]] = []
+            for position, slot in enumerate(bucket):
+                while running and running[0][0] <= slot.start_time:
+                    heappop(running)
+                for _, _, other in running:
+                    if other.start_date <= slot.end_date and slot.start_date <= other.end_date:
+                        yield other, slot
+                heappush(running, (slot.end_time, position, slot))
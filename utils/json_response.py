@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    # Building the serializer is the expensive part, so once per type
+    return TypeAdapter(response_type)
+
+
+class TypedJSONResponse(Response):
+    """JSON response for service output that is already a `response_type` value.
+
+    Returning a Response skips FastAPI's response_model handling, which
+    validates the content again and encodes it with the stdlib json module.
+    Here it is serialized once by pydantic's compiled serializer, by alias
+    like response_model would. Keep response_model on the route for the
+    OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        response_type: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None
+    ):
+        # render() runs inside Response.__init__
+        self.response_type = response_type
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        return _adapter(self.response_type).dump_json(content, by_alias=True)
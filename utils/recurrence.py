@@ -0,0 +1,232 @@
+"""Parsing and expansion of the DTSTART/RRULE blocks stored in Session.rrule.
+
+A rule is parsed once (memoized by its text) into a Recurrence: one arithmetic
+series of dates per BYDAY weekday, a common step, the last allowed date and any
+EXDATE exclusions. Expanding is then NumPy day arithmetic, so the occurrences
+of thousands of sessions over a window come out of a single batched
+computation instead of one rrule iterator per session.
+
+Supported rules are the ones this app writes: FREQ=WEEKLY (with BYDAY) or
+FREQ=DAILY, with optional INTERVAL, UNTIL or COUNT, and EXDATE lines.
+Occurrences follow dateutil's semantics: a DTSTART that is not on a BYDAY
+weekday is not itself an occurrence.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Parsed rules kept in memory; sessions share a handful of distinct rrule strings
+RECURRENCE_CACHE_SIZE = 4096
+
+_EMPTY_DATES = np.array([], dtype="datetime64[D]")
+
+
+class Recurrence(NamedTuple):
+    dtstart: datetime
+    rrule_line: str
+    # First occurrence of each BYDAY series, all advancing by step_days
+    starts: np.ndarray
+    step_days: int
+    # Last date an occurrence may fall on (from UNTIL or COUNT); None if unbounded
+    last: Optional[np.datetime64]
+    exdates: np.ndarray
+
+    @property
+    def first_occurrence(self) -> Optional[datetime]:
+        """Date and time of the first occurrence, i.e. DTSTART moved onto the schedule"""
+        first = self.starts.min()
+        if self.last is not None and first > self.last:
+            return None
+        return datetime.combine(first.item(), self.dtstart.time())
+
+
+def _parse_datetime(value: str) -> Tuple[datetime, bool]:
+    """Parse an iCalendar DATE or DATE-TIME value; the flag is True for a DATE"""
+    value = value.strip().rstrip("Z")
+    if "T" in value:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S"), False
+    return datetime.strptime(value, "%Y%m%d"), True
+
+
+def _property_value(line: str) -> str:
+    # Parameters such as TZID come before the value: DTSTART;TZID=...:20250101T090000
+    return line.rsplit(":", 1)[1]
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    # Parsed rules are shared through the cache, so nobody may modify them in place
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=RECURRENCE_CACHE_SIZE)
+def parse_recurrence(rrule_block: str) -> Recurrence:
+    """Parse a stored DTSTART/RRULE(/EXDATE) block. Raises ValueError for
+    malformed or unsupported rules."""
+    dtstart = None
+    rrule_line = None
+    exdates = []
+    for line in rrule_block.splitlines():
+        line = line.strip()
+        name = line.split(":", 1)[0].split(";", 1)[0].upper()
+        if name == "DTSTART":
+            dtstart, _ = _parse_datetime(_property_value(line))
+        elif name == "RRULE":
+            rrule_line = line
+        elif name == "EXDATE":
+            exdates.extend(_parse_datetime(value)[0].date() for value in _property_value(line).split(","))
+
+    if dtstart is None or rrule_line is None:
+        raise ValueError("Invalid RRULE stored in session.")
+
+    params = {}
+    for part in rrule_line.split(":", 1)[1].split(";"):
+        key, _, value = part.partition("=")
+        params[key.strip().upper()] = value.strip()
+
+    interval = int(params.get("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError("RRULE INTERVAL must be positive")
+
+    first_day = np.datetime64(dtstart.date(), "D")
+    freq = params.get("FREQ")
+    if freq == "WEEKLY":
+        if "BYDAY" not in params:
+            raise ValueError("RRULE missing BYDAY")
+        byday = params["BYDAY"].split(",")
+        if any(day not in WEEKDAYS for day in byday):
+            raise ValueError(f"Unsupported BYDAY in RRULE: {params['BYDAY']}")
+        step_days = 7 * interval
+        # Each weekday in DTSTART's week (weeks start on Monday); days before
+        # DTSTART move on to the next week the rule runs in
+        week_start = first_day - dtstart.weekday()
+        starts = np.array(sorted({week_start + WEEKDAYS.index(day) for day in byday}), dtype="datetime64[D]")
+        starts = np.where(starts < first_day, starts + step_days, starts)
+    elif freq == "DAILY":
+        if "BYDAY" in params:
+            raise ValueError("BYDAY is not supported with FREQ=DAILY")
+        step_days = interval
+        starts = np.array([first_day], dtype="datetime64[D]")
+    else:
+        raise ValueError(f"Unsupported RRULE frequency: {freq}")
+
+    last = None
+    if "UNTIL" in params:
+        until, is_date = _parse_datetime(params["UNTIL"])
+        last = np.datetime64(until.date(), "D")
+        # An occurrence on the UNTIL date only counts if it starts by UNTIL's time
+        if not is_date and until.time() < dtstart.time():
+            last -= 1
+    elif "COUNT" in params:
+        count = int(params["COUNT"])
+        if count < 1:
+            raise ValueError("RRULE COUNT must be positive")
+        # The count-th occurrence over all series (before EXDATEs, as in RFC 5545)
+        candidates = np.sort((starts[:, None] + step_days * np.arange(count)).ravel())
+        last = candidates[count - 1]
+
+    return Recurrence(
+        dtstart=dtstart,
+        rrule_line=rrule_line,
+        starts=_readonly(starts),
+        step_days=step_days,
+        last=last,
+        exdates=_readonly(np.unique(np.array(exdates, dtype="datetime64[D]"))),
+    )
+
+
+def expand_many(rrule_blocks: Sequence[str], start: Optional[date] = None, end: Optional[date] = None,
+                exclude: Iterable[date] = ()) -> Tuple[np.ndarray, np.ndarray]:
+    """Occurrences of many rules between `start` and `end` (inclusive) in one pass.
+
+    Returns two parallel arrays: the position of the rule in `rrule_blocks` and
+    the occurrence date (datetime64[D]), sorted by position then date. EXDATEs
+    and the `exclude` dates (e.g. public holidays) are left out. Without `end`
+    every rule must be bounded by UNTIL or COUNT.
+    """
+    rules = [parse_recurrence(block) for block in rrule_blocks]
+    if not rules:
+        return np.array([], dtype=np.intp), _EMPTY_DATES.copy()
+
+    # One entry per BYDAY series
+    series_counts = np.array([len(rule.starts) for rule in rules])
+    owners = np.repeat(np.arange(len(rules)), series_counts)
+    starts = np.concatenate([rule.starts for rule in rules])
+    steps = np.repeat(np.array([rule.step_days for rule in rules], dtype=np.int64), series_counts)
+
+    window_end = np.datetime64(end, "D") if end is not None else None
+    lasts = []
+    for rule in rules:
+        if rule.last is None and window_end is None:
+            raise ValueError(f"Rule has no UNTIL or COUNT, so an end date is needed: {rule.rrule_line}")
+        candidates = [d for d in (rule.last, window_end) if d is not None]
+        lasts.append(min(candidates))
+    lasts = np.repeat(np.array(lasts, dtype="datetime64[D]"), series_counts)
+
+    # Index range [first_index, last_index] of each series inside the window
+    first_index = np.zeros(len(starts), dtype=np.int64)
+    if start is not None:
+        days_before = (np.datetime64(start, "D") - starts).astype(np.int64)
+        first_index = np.maximum(-(-days_before // steps), 0)
+    last_index = (lasts - starts).astype(np.int64) // steps
+    sizes = np.maximum(last_index - first_index + 1, 0)
+
+    # Lay every series out back to back: entry j of series i is index first_index[i] + j
+    total = int(sizes.sum())
+    series = np.repeat(np.arange(len(starts)), sizes)
+    offsets = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    dates = starts[series] + (first_index[series] + offsets) * steps[series]
+    positions = owners[series]
+
+    keep = np.ones(total, dtype=bool)
+    excluded = np.array(sorted(set(exclude)), dtype="datetime64[D]")
+    if len(excluded):
+        keep &= ~np.isin(dates, excluded)
+    exdate_counts = np.array([len(rule.exdates) for rule in rules])
+    if exdate_counts.any():
+        # Match (position, date) pairs by packing both into one integer
+        exdate_keys = (np.repeat(np.arange(len(rules)), exdate_counts).astype(np.int64) << 32) + \
+            np.concatenate([rule.exdates for rule in rules]).astype(np.int64)
+        keep &= ~np.isin((positions.astype(np.int64) << 32) + dates.astype(np.int64), exdate_keys)
+
+    positions, dates = positions[keep], dates[keep]
+    order = np.lexsort((dates, positions))
+    return positions[order], dates[order]
+
+
+def expand(rrule_block: str, start: Optional[date] = None, end: Optional[date] = None,
+           exclude: Iterable[date] = ()) -> np.ndarray:
+    """Occurrence dates (datetime64[D]) of one rule between `start` and `end`"""
+    return expand_many([rrule_block], start, end, exclude)[1]
+
+
+def occurrence_dates(rrule_block: str, start: Optional[date] = None, end: Optional[date] = None,
+                     exclude: Iterable[date] = ()) -> List[date]:
+    """Occurrence dates of one rule as datetime.date objects"""
+    return expand(rrule_block, start, end, exclude).tolist()
+
+
+def occurrences_by_rule(rrule_blocks: Sequence[str], start: Optional[date] = None, end: Optional[date] = None,
+                        exclude: Iterable[date] = ()) -> List[List[date]]:
+    """Occurrence dates of each rule, in the order of `rrule_blocks`"""
+    positions, dates = expand_many(rrule_blocks, start, end, exclude)
+    bounds = np.searchsorted(positions, np.arange(len(rrule_blocks) + 1))
+    days = dates.tolist()
+    return [days[bounds[i]:bounds[i + 1]] for i in range(len(rrule_blocks))]
+
+
+def with_exdates(rrule_block: str, exdates: Iterable[date]) -> str:
+    """The rule with an EXDATE line for `exdates` added (existing exclusions are kept)"""
+    recurrence = parse_recurrence(rrule_block)
+    dates = sorted(set(recurrence.exdates.tolist()) | set(exdates))
+    lines = [line for line in rrule_block.splitlines() if not line.upper().startswith("EXDATE")]
+    if dates:
+        start_time = recurrence.dtstart.time()
+        lines.append("EXDATE:" + ",".join(
+            datetime.combine(d, start_time).strftime("%Y%m%dT%H%M%S") for d in dates
+        ))
+    return "\n".join(lines)
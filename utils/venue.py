@@ -0,0 +1,38 @@
+import re
+import unicodedata
+
+# Common address abbreviations, so "12 Main St." and "12 Main Street" are the same venue
+_ABBREVIATIONS = {
+    "st": "street",
+    "rd": "road",
+    "ave": "avenue",
+    "av": "avenue",
+    "dr": "drive",
+    "pl": "place",
+    "tce": "terrace",
+    "cres": "crescent",
+    "hwy": "highway",
+    "ln": "lane",
+    "blvd": "boulevard",
+    "sq": "square",
+    "ct": "court",
+    "mt": "mount",
+    "rm": "room",
+    "lvl": "level",
+    "bldg": "building",
+}
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def _normalize(value: str) -> str:
+    # Drop accents, case and punctuation, then expand abbreviations word by word
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char)).casefold()
+    words = _NON_ALPHANUMERIC.sub(" ", value).split()
+    return " ".join(_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def venue_key(location: str, city: str) -> str:
+    """Canonical key for a session's venue: equal keys mean the same place"""
+    return f"{_normalize(location)}|{_normalize(city)}"